@@ -0,0 +1,72 @@
+
+import sys
+import argparse
+from paquete.benchmark import comparar, correr_benchmark, guardar_registro, presupuestos_arranque, ultimo_registro
+from paquete.generador import distribucion_tipos, leer_proporciones, mezcla_niveles
+from paquete.reglas import politicas
+
+#mide cada etapa del programa sobre documentos sinteticos de distintos tamanos y guarda los resultados para detectar regresiones
+
+def mostrar(tamano, resultado):
+    print(f'{tamano} transacciones')
+    for etapa, medicion in resultado.items():
+        memoria = medicion.get('pico_bytes', medicion.get('rss_bytes'))
+        detalle = '' if memoria is None else f"  {memoria / 2**20:10.2f} MB {'RSS' if 'rss_bytes' in medicion else 'pico'}"
+        if etapa == 'render':
+            detalle += f"  ({medicion['segundos'] * 1000 / tamano * 1000:.3f} ms cada 1000 filas)"
+        print(f"  {etapa:<14} {medicion['segundos'] * 1000:12.3f} ms{detalle}")
+
+def main(argumentos):
+    parser = argparse.ArgumentParser(description='Benchmark por etapas (parseo, validacion, clasificacion, render, escritura) sobre documentos TPS sinteticos')
+    parser.add_argument('--tamanos', default='10,1000,100000', help='cantidades de transacciones a medir separadas por coma (hasta 10000000)')
+    parser.add_argument('--repeticiones', type=int, default=3, help='se informa el mejor tiempo de N repeticiones de cada etapa')
+    parser.add_argument('--sin-memoria', action='store_true', help='no mide el pico de memoria por etapa (la pasada con tracemalloc es lenta en tamanos grandes)')
+    parser.add_argument('--datos', default='benchmarks/datos', help='directorio donde se generan y reutilizan los documentos de prueba')
+    parser.add_argument('--historial', default='benchmarks/resultados.jsonl', help='archivo JSON Lines al que se agrega cada corrida')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='empeoramiento relativo a partir del cual una etapa se informa como regresion')
+    parser.add_argument('--nivel', choices=tuple(politicas), default='GOLD', help='nivel de los clientes generados')
+    parser.add_argument('--niveles', nargs='?', const='', default=None, help="mide cada tamano con un documento por nivel y promedia segun la mezcla, por ejemplo 'CLASSIC=0.5,GOLD=0.35,BLACK=0.15' (sin valor, esa mezcla)")
+    parser.add_argument('--tipos', default=None, help="distribucion de tipos de transaccion, por ejemplo 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO=0.6,COMPRA_DOLAR=0.4'")
+    parser.add_argument('--tasa-rechazo', type=float, default=0.3, help='proporcion de transacciones rechazadas')
+    parser.add_argument('--paralelo', default=None, help="cantidades de procesos a medir con el modo paralelo en el tamano mas grande, por ejemplo '1,2,4'")
+    parser.add_argument('--semilla', type=int, default=0, help='semilla de los documentos generados')
+    args = parser.parse_args(argumentos[1:])
+
+    try:
+        tamanos = [int(tamano) for tamano in args.tamanos.split(',')]
+        tipos = leer_proporciones(args.tipos, tuple(distribucion_tipos)) if args.tipos else None
+        niveles = None if args.niveles is None else leer_proporciones(args.niveles, tuple(mezcla_niveles)) if args.niveles else dict(mezcla_niveles)
+        paralelo = [int(procesos) for procesos in args.paralelo.split(',')] if args.paralelo else ()
+    except ValueError as e:
+        print(f'Parametros incorrectos: {e}')
+        return 1
+
+    if niveles:
+        print(f"Mezcla de niveles: {', '.join(f'{nivel} {proporcion:g}' for nivel, proporcion in niveles.items())} (tiempos promediados, memoria del nivel que mas usa)")
+    registro = correr_benchmark(tamanos, args.datos, args.repeticiones, not args.sin_memoria, args.semilla, mostrar, paralelo, niveles, nivel=args.nivel, tipos=tipos, tasa_rechazo=args.tasa_rechazo)
+    print('Arranque en frio')
+    for nombre, segundos in registro['arranque'].items():
+        excedido = '  (excede el presupuesto)' if segundos > presupuestos_arranque[nombre] else ''
+        print(f'  {nombre:<18} {segundos * 1000:12.3f} ms  presupuesto {presupuestos_arranque[nombre] * 1000:.0f} ms{excedido}')
+
+    if paralelo:
+        medicion = registro['paralelo']
+        print(f"Modo paralelo ({medicion['tamano']} transacciones, {medicion['nucleos']} nucleos): secuencial {medicion['secuencial'] * 1000:.3f} ms")
+        for procesos, resultado in medicion['procesos'].items():
+            print(f"  {procesos:>3} procesos {resultado['segundos'] * 1000:12.3f} ms  aceleracion {resultado['aceleracion']:.2f}x")
+
+    anterior = ultimo_registro(args.historial)
+    guardar_registro(registro, args.historial)
+    print(f"Resultados guardados en {args.historial} (commit {registro['commit']})")
+    if anterior is None:
+        return 0
+    regresiones = comparar(anterior, registro, args.tolerancia)
+    for tamano, etapa, antes, ahora in regresiones:
+        print(f'Regresion en {etapa} ({tamano}): {antes * 1000:.3f} ms -> {ahora * 1000:.3f} ms (commit anterior {anterior["commit"]})')
+    if not regresiones:
+        print(f'Sin regresiones respecto de la corrida anterior (commit {anterior["commit"]})')
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
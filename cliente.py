@@ -1,747 +1,204 @@
 
+import os
 import sys
-import json
-from jsonschema import ValidationError, validate
-from jinja2 import Environment, PackageLoader, select_autoescape
-
-argumentos = sys.argv #guardo en variable los datos pasados por terminal
-
-if not len(argumentos) == 2: #chequeo cantidad correcta de argumentos
-    print('La cantidad de argumentos es incorrecta')
-    exit(1)
-
-archivo = argumentos[1] #declaro el nombre del archivo como el segundo argumento pasado por terminal    
-
-schema = { #declaro el schema que debera tener el JSON
-    "type" : "object",
-    "properties" : {
-        "numero": {"type": "number"},
-        "nombre": {"type": "string"},
-        "apellido": {"type": "string"},
-        "DNI": {"type": "string"},
-        "tipo": {"enum": ["BLACK","CLASSIC","GOLD"]},
-        "direccion": {
-            "type": "object",
-            "properties": {
-                "calle": {"type": "string"},
-                "numero": {"type": "string"},
-                "ciudad": {"type": "string"},
-                "provincia": {"type": "string"},
-                "pais": {"type": "string"},
-            }
-        },
-        "transacciones": {
-            "type": "array",
-            "items": {
-                "type" : "object",
-                "properties" : {
-                    "estado": {"enum": ["ACEPTADA","RECHAZADA"]},
-                    "tipo": {"enum": ["RETIRO_EFECTIVO_CAJERO_AUTOMATICO","ALTA_TARJETA_CREDITO","ALTA_CHEQUERA","COMPRAR_DOLAR","COMPRA_DOLAR","TRANSFERENCIA_ENVIADA","TRANSFERENCIA_RECIBIDA"]},
-                    "cuentaNumero": {"type": "number"},
-                    "cupoDiarioRestante": {"type": "number"},
-                    "monto": {"type": "number"},
-                    "fecha": {"type": "string"},
-                    "numero": {"type": "number"},
-                    "saldoEnCuenta": {"type": "number"},
-                    "totalTarjetasDeCreditoActualmente": {"type": "number"},
-                    "totalChequerasActualmente": {"type": "number"}
-                }
-            }
-        }
-    }
-}
-
-try: #chequeo excistencia y lectura correcta del archivo
-    with open(archivo, "r") as f:
-        data = json.load(f)
-        try: #chequeo formateo del JSON
-            validate(instance=data, schema=schema)
-        except:
-            print('El archivo se encuentra mal formado')
-            exit(1)
-
-except IOError:
-    print('El archivo ingresado es inexistente')
-    exit(1)
-
-except json.JSONDecodeError:
-    print('El archivo ingresado no tiene contenido')
-    exit(1)
-
-
-#clases Cuenta, Direccion y Cliente
-class Cuenta:
-    def __init__(self, limite_extraccion_diario, limite_transferencia_recibida, monto, costo_transferencias, saldo_descubierto_disponible):
-        self.__limite_extraccion_diario = limite_extraccion_diario #encapsulo todos los atributos con doble guión bajo
-        self.__limite_transferencia_recibida = limite_transferencia_recibida
-        self.__monto = monto
-        self.__costo_transferencias = costo_transferencias
-        self.__saldo_descubierto_disponible = saldo_descubierto_disponible
-
-    #Métodos get con el decorador property para acceder a los atributos encapsulados
-    @property
-    def limite_extraccion(self):
-        return self.__limite_extraccion_diario
-
-    @property
-    def limite_transferencia(self):
-        return self.__limite_transferencia_recibida
-
-    @property
-    def monto(self):
-        return self.__monto
-
-    @property
-    def costo_transferencias(self):
-        return self.__costo_transferencias
-
-    @property
-    def saldo_disponible(self):
-        return self.__saldo_descubierto_disponible
-    
-    #setters para modificar los valores encapsulados
-    @limite_extraccion.setter
-    def limite_extraccion(self,nuevoValor):
-        self.__limite_extraccion_diario = nuevoValor
-    
-    @limite_transferencia.setter
-    def limite_transferencia(self,nuevoValor):
-        self.__limite_transferencia_recibida = nuevoValor
-
-    @monto.setter
-    def monto(self,nuevoValor):
-        self.__monto = nuevoValor
-
-    @saldo_disponible.setter
-    def saldo_disponible(self,nuevoValor):
-        self.__saldo_descubierto_disponible = nuevoValor
-
-    @costo_transferencias.setter
-    def costo_transferencias(self,nuevoValor):
-        self.__costo_transferencias = nuevoValor
-
-class Direccion: #clase direccion dependiente de Cliente ya que se genera en su interior
-    def __init__(self, calle, numero_direccion, ciudad, provincia, pais):
-        self.__calle = calle 
-        self.__numero_direccion = numero_direccion
-        self.__ciudad = ciudad 
-        self.__provincia = provincia
-        self.__pais = pais
-
-    @property
-    def calle(self):
-        return self.__calle
-
-    @property
-    def numero_direccion(self):
-        return self.__numero_direccion
-
-    @property
-    def ciudad(self):
-        return self.__ciudad
-
-    @property
-    def provincia(self):
-        return self.__provincia
-
-    @property
-    def pais(self):
-        return self.__pais
-
-class Cliente:
-    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[]):
-        self.__nombre = nombre
-        self.__apellido = apellido 
-        self.__numero = numero
-        self.__dni = dni
-        self.__tipo = tipo
-        self.__transacciones = transacciones
-        self.__direccion = Direccion(calle, numero_direccion, ciudad, provincia, pais) 
-        self.__cuenta = objCuenta
-    
-    @property
-    def nombre(self):
-        return self.__nombre
-
-    @property
-    def apellido(self):
-        return self.__apellido
-
-    @property
-    def numero(self):
-        return self.__numero
-
-    @property
-    def dni(self):
-        return self.__dni
-
-    @property
-    def tipo(self):
-        return self.__tipo
-
-    @property
-    def transacciones(self):
-        return self.__transacciones
-
-    @property
-    def direccion(self):
-        return self.__direccion
-
-    @property
-    def cuenta(self):
-        return self.__cuenta
-
-#Las clases Classic, Gold y Black heredan de la clase Cliente
-class Classic(Cliente):
-    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[], cantChequeras=0, cantTarj=0): 
-        super().__init__(nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones)
-        self.__limiteChequeras = 0 #asigno variables arbitrariamente segun lo estipulado en los parametros de la consigna
-        self.__cantChequeras = cantChequeras
-        self.__limiteTarj = 0
-        self.__cantTarj = cantTarj
-        self.__accesoDolar = 'NO'
-    
-    @property
-    def limiteChequeras(self):
-        return self.__limiteChequeras
-    @property
-    def cantChequeras(self):
-        return self.__cantChequeras
-    @property
-    def limiteTarj(self):
-        return self.__limiteTarj
-    @property
-    def cantTarj(self):
-        return self.__cantTarj
-    @property
-    def accesoDolar(self):
-        return self.__accesoDolar
-    @cantChequeras.setter
-    def cantChequeras(self,nuevoValor):
-        self.__cantChequeras = nuevoValor
-    @cantTarj.setter
-    def cantTarj(self,nuevoValor):
-        self.__cantTarj = nuevoValor
-
-    #funciones dependientes de la clase Classic que utilizan los nuevos parametros asignados, inexistentes en Cliente
-    def puede_comprar_dolar(self):
-        if self.__accesoDolar == 'NO':
-            return False
-        else:
-            return True
-
-    def puede_crear_chequera(self):
-        if self.__cantChequeras < self.__limiteChequeras:
-            return True
-        else:
-            return False        
-    
-    def puede_crear_tarjeta_credito(self):
-        if self.__cantTarj < self.__limiteTarj:
-            return True
-        else:
-            return False
-    
-    #funciones Filtro a las cuales se accede unicamente si se cumple la igualdad en el tipo de operacion de la transaccion correspondiente
-    def filtro_compra_dolar(self,iterador,index):       
-        if self.puede_comprar_dolar():
-            if iterador['monto'] > iterador['saldoEnCuenta']:
-                globals()[f"razon{index}"] = Razon_compra_dolar('Fondos insuficientes')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_compra_dolar('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_compra_dolar(f'Los clientes {self.tipo} no pueden comprar dolares')
-            return globals()[f"razon{index}"].razon
-
-
-    def filtro_alta_tarj(self,index):
-        if self.puede_crear_tarjeta_credito():
-            globals()[f"razon{index}"] = Razon_alta_tarjeta_credito('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_alta_tarjeta_credito('Alcanzo el limite de tarjetas de credito')
-            return globals()[f"razon{index}"].razon
-
-    def filtro_alta_chequera(self,index):  
-        if self.tipo == 'CLASSIC':
-            globals()[f"razon{index}"] = Razon_alta_chequera(f'Los clientes {self.tipo} no pueden solicitar chequeras')
-            return globals()[f"razon{index}"].razon
-        else:
-            if self.puede_crear_chequera():
-                globals()[f"razon{index}"] = Razon_alta_chequera('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_alta_chequera('Alcanzo el limite de chequeras')
-                return globals()[f"razon{index}"].razon
-
-    def filtro_retiro_efectivo_cajero(self,iterador,index): 
-        if self.tipo == 'CLASSIC':
-            if iterador['monto'] > iterador['saldoEnCuenta']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Saldo en cuenta insuficiente')
-                return globals()[f"razon{index}"].razon
-            elif iterador['monto'] > iterador['cupoDiarioRestante']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('La operacion excede el limite de cupo diario restante')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-        else:
-            if iterador['monto'] > iterador['saldoEnCuenta'] + self.cuenta.saldo_disponible:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Saldo en cuenta insuficiente')
-                return globals()[f"razon{index}"].razon
-            elif iterador['monto'] > iterador['cupoDiarioRestante']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('La operacion excede el limite de cupo diario restante')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-
-    def filtro_transf_enviada(self,iterador,index):       
-        if iterador['monto'] + iterador['monto']*self.cuenta.costo_transferencias > iterador['saldoEnCuenta'] + self.cuenta.saldo_disponible:
-            globals()[f"razon{index}"] = Razon_transferencia_enviada('Saldo en cuenta insuficiente')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_transferencia_enviada('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-
-
-    def filtro_transf_recibida(self,iterador,index):        
-        if iterador['monto'] > self.cuenta.limite_transferencia:
-            globals()[f"razon{index}"] = Razon_transferencia_recibida('Excede el monto limite a recibir')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_transferencia_recibida('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-
-    def filtro(self,t,i): #funcion filtro principal que determina si la transaccion se acepto o rechazo y busca las igualdades correspondientes para ejecurar la funcion deseada
-        if t['estado'] == 'ACEPTADA':
-            globals()[f"razon{i}"] = Razon_nula('')
-            return globals()[f"razon{i}"].razon 
-        elif t['estado'] == 'RECHAZADA':
-            if t['tipo'] == 'COMPRA_DOLAR':
-                self.filtro_compra_dolar(t,i)
-            elif t['tipo'] == 'ALTA_TARJETA_CREDITO':
-                self.filtro_alta_tarj(i)
-            elif t['tipo'] == 'ALTA_CHEQUERA':    
-                self.filtro_alta_chequera(i)
-            elif t['tipo'] == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO':    
-                self.filtro_retiro_efectivo_cajero(t,i)
-            elif t['tipo'] == 'TRANSFERENCIA_ENVIADA':    
-                self.filtro_transf_enviada(t,i)
-            elif t['tipo'] == 'TRANSFERENCIA_RECIBIDA':    
-                self.filtro_transf_recibida(t,i)
-
-    def retorno(self): #funcion retorno, encargada de crear una lista que recolecta toda la informacion del cliente y sus transacciones y luego la retorna para utilizarla al exportar el HTML
-        lista_transacciones = []
-        usuario = [{'nombre_completo':f'{self.nombre} {self.apellido}'},{'numero':self.numero},{'DNI':self.dni},{'direccion':f'{self.direccion.calle} {self.direccion.numero_direccion}, {self.direccion.ciudad}, {self.direccion.provincia}, {self.direccion.pais}'}]
-        lista_transacciones.append(usuario)
-        for i, transaccion in enumerate(self.transacciones):
-            globals()[f"transaccion{i}"] = [{'fecha':transaccion['fecha']},{'tipo':transaccion['tipo']},{'estado':transaccion['estado']},{'monto':transaccion['monto']}]
-            self.filtro(transaccion,i)
-            globals()[f"transaccion{i}"].append({'razon':globals()[f"razon{i}"].razon})
-            lista_transacciones.append(globals()[f"transaccion{i}"])
-        return lista_transacciones
-
-class Gold(Cliente):
-    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[], cantChequeras=0, cantTarj=0): 
-        super().__init__(nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones)
-        self.__limiteChequeras = 1
-        self.__cantChequeras = cantChequeras
-        self.__limiteTarj = 1
-        self.__cantTarj = cantTarj
-        self.__accesoDolar = 'SI'
-    
-    @property
-    def limiteChequeras(self):
-        return self.__limiteChequeras
-    @property
-    def cantChequeras(self):
-        return self.__cantChequeras
-    @property
-    def limiteTarj(self):
-        return self.__limiteTarj
-    @property
-    def cantTarj(self):
-        return self.__cantTarj
-    @property
-    def accesoDolar(self):
-        return self.__accesoDolar
-    @cantChequeras.setter
-    def cantChequeras(self,nuevoValor):
-        self.__cantChequeras = nuevoValor
-    @cantTarj.setter
-    def cantTarj(self,nuevoValor):
-        self.__cantTarj = nuevoValor   
-
-    #funciones dependientes de la clase Classic que utilizan los nuevos parametros asignados, inexistentes en Cliente
-    def puede_comprar_dolar(self):
-        if self.__accesoDolar == 'NO':
-            return False
-        else:
-            return True
-
-    def puede_crear_chequera(self):
-        if self.__cantChequeras < self.__limiteChequeras:
-            return True
-        else:
-            return False        
-    
-    def puede_crear_tarjeta_credito(self):
-        if self.__cantTarj < self.__limiteTarj:
-            return True
-        else:
-            return False
-    
-    #funciones Filtro a las cuales se accede unicamente si se cumple la igualdad en el tipo de operacion de la transaccion correspondiente
-    def filtro_compra_dolar(self,iterador,index):       
-        if self.puede_comprar_dolar():
-            if iterador['monto'] > iterador['saldoEnCuenta']:
-                globals()[f"razon{index}"] = Razon_compra_dolar('Fondos insuficientes')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_compra_dolar('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_compra_dolar(f'Los clientes {self.tipo} no pueden comprar dolares')
-            return globals()[f"razon{index}"].razon
-
-
-    def filtro_alta_tarj(self,index):
-        if self.puede_crear_tarjeta_credito():
-            globals()[f"razon{index}"] = Razon_alta_tarjeta_credito('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_alta_tarjeta_credito('Alcanzo el limite de tarjetas de credito')
-            return globals()[f"razon{index}"].razon
-
-    def filtro_alta_chequera(self,index):  
-        if self.tipo == 'CLASSIC':
-            globals()[f"razon{index}"] = Razon_alta_chequera(f'Los clientes {self.tipo} no pueden solicitar chequeras')
-            return globals()[f"razon{index}"].razon
-        else:
-            if self.puede_crear_chequera():
-                globals()[f"razon{index}"] = Razon_alta_chequera('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_alta_chequera('Alcanzo el limite de chequeras')
-                return globals()[f"razon{index}"].razon
-
-    def filtro_retiro_efectivo_cajero(self,iterador,index): 
-        if self.tipo == 'CLASSIC':
-            if iterador['monto'] > iterador['saldoEnCuenta']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Saldo en cuenta insuficiente')
-                return globals()[f"razon{index}"].razon
-            elif iterador['monto'] > iterador['cupoDiarioRestante']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('La operacion excede el limite de cupo diario restante')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-        else:
-            if iterador['monto'] > iterador['saldoEnCuenta'] + self.cuenta.saldo_disponible:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Saldo en cuenta insuficiente')
-                return globals()[f"razon{index}"].razon
-            elif iterador['monto'] > iterador['cupoDiarioRestante']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('La operacion excede el limite de cupo diario restante')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-
-    def filtro_transf_enviada(self,iterador,index):       
-        if iterador['monto'] + iterador['monto']*self.cuenta.costo_transferencias > iterador['saldoEnCuenta'] + self.cuenta.saldo_disponible:
-            globals()[f"razon{index}"] = Razon_transferencia_enviada('Saldo en cuenta insuficiente')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_transferencia_enviada('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-
-
-    def filtro_transf_recibida(self,iterador,index):        
-        if iterador['monto'] > self.cuenta.limite_transferencia:
-            globals()[f"razon{index}"] = Razon_transferencia_recibida('Excede el monto limite a recibir')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_transferencia_recibida('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-
-    def filtro(self,t,i): #funcion filtro principal que determina si la transaccion se acepto o rechazo y busca las igualdades correspondientes para ejecurar la funcion deseada
-        if t['estado'] == 'ACEPTADA':
-            globals()[f"razon{i}"] = Razon_nula('')
-            return globals()[f"razon{i}"].razon 
-        elif t['estado'] == 'RECHAZADA':
-            if t['tipo'] == 'COMPRA_DOLAR':
-                self.filtro_compra_dolar(t,i)
-            elif t['tipo'] == 'ALTA_TARJETA_CREDITO':
-                self.filtro_alta_tarj(i)
-            elif t['tipo'] == 'ALTA_CHEQUERA':    
-                self.filtro_alta_chequera(i)
-            elif t['tipo'] == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO':    
-                self.filtro_retiro_efectivo_cajero(t,i)
-            elif t['tipo'] == 'TRANSFERENCIA_ENVIADA':    
-                self.filtro_transf_enviada(t,i)
-            elif t['tipo'] == 'TRANSFERENCIA_RECIBIDA':    
-                self.filtro_transf_recibida(t,i)
-
-    def retorno(self): #funcion retorno, encargada de crear una lista que recolecta toda la informacion del cliente y sus transacciones y luego la retorna para utilizarla al exportar el HTML
-        lista_transacciones = []
-        usuario = [{'nombre_completo':f'{self.nombre} {self.apellido}'},{'numero':self.numero},{'DNI':self.dni},{'direccion':f'{self.direccion.calle} {self.direccion.numero_direccion}, {self.direccion.ciudad}, {self.direccion.provincia}, {self.direccion.pais}'}]
-        lista_transacciones.append(usuario)
-        for i, transaccion in enumerate(self.transacciones):
-            globals()[f"transaccion{i}"] = [{'fecha':transaccion['fecha']},{'tipo':transaccion['tipo']},{'estado':transaccion['estado']},{'monto':transaccion['monto']}]
-            self.filtro(transaccion,i)
-            globals()[f"transaccion{i}"].append({'razon':globals()[f"razon{i}"].razon})
-            lista_transacciones.append(globals()[f"transaccion{i}"])
-        return lista_transacciones
-
-class Black(Cliente):
-    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[], cantChequeras=0, cantTarj=0): 
-        super().__init__(nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones)
-        self.__limiteChequeras = 2
-        self.__cantChequeras = cantChequeras
-        self.__limiteTarj = 5
-        self.__cantTarj = cantTarj
-        self.__accesoDolar = 'SI'
-    
-    @property
-    def limiteChequeras(self):
-        return self.__limiteChequeras
-    @property
-    def cantChequeras(self):
-        return self.__cantChequeras
-    @property
-    def limiteTarj(self):
-        return self.__limiteTarj
-    @property
-    def cantTarj(self):
-        return self.__cantTarj
-    @property
-    def accesoDolar(self):
-        return self.__accesoDolar
-
-    #funciones dependientes de la clase Classic que utilizan los nuevos parametros asignados, inexistentes en Cliente
-    def puede_comprar_dolar(self):
-        if self.__accesoDolar == 'NO':
-            return False
-        else:
-            return True
-
-    def puede_crear_chequera(self):
-        if self.__cantChequeras < self.__limiteChequeras:
-            return True
-        else:
-            return False        
-    
-    def puede_crear_tarjeta_credito(self):
-        if self.__cantTarj < self.__limiteTarj:
-            return True
-        else:
-            return False
-    
-    #funciones Filtro a las cuales se accede unicamente si se cumple la igualdad en el tipo de operacion de la transaccion correspondiente
-    def filtro_compra_dolar(self,iterador,index):       
-        if self.puede_comprar_dolar():
-            if iterador['monto'] > iterador['saldoEnCuenta']:
-                globals()[f"razon{index}"] = Razon_compra_dolar('Fondos insuficientes')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_compra_dolar('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_compra_dolar(f'Los clientes {self.tipo} no pueden comprar dolares')
-            return globals()[f"razon{index}"].razon
-
-
-    def filtro_alta_tarj(self,index):
-        if self.puede_crear_tarjeta_credito():
-            globals()[f"razon{index}"] = Razon_alta_tarjeta_credito('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_alta_tarjeta_credito('Alcanzo el limite de tarjetas de credito')
-            return globals()[f"razon{index}"].razon
-
-    def filtro_alta_chequera(self,index):  
-        if self.tipo == 'CLASSIC':
-            globals()[f"razon{index}"] = Razon_alta_chequera(f'Los clientes {self.tipo} no pueden solicitar chequeras')
-            return globals()[f"razon{index}"].razon
-        else:
-            if self.puede_crear_chequera():
-                globals()[f"razon{index}"] = Razon_alta_chequera('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_alta_chequera('Alcanzo el limite de chequeras')
-                return globals()[f"razon{index}"].razon
-
-    def filtro_retiro_efectivo_cajero(self,iterador,index): 
-        if self.tipo == 'CLASSIC':
-            if iterador['monto'] > iterador['saldoEnCuenta']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Saldo en cuenta insuficiente')
-                return globals()[f"razon{index}"].razon
-            elif iterador['monto'] > iterador['cupoDiarioRestante']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('La operacion excede el limite de cupo diario restante')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-        else:
-            if iterador['monto'] > iterador['saldoEnCuenta'] + self.cuenta.saldo_disponible:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Saldo en cuenta insuficiente')
-                return globals()[f"razon{index}"].razon
-            elif iterador['monto'] > iterador['cupoDiarioRestante']:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('La operacion excede el limite de cupo diario restante')
-                return globals()[f"razon{index}"].razon
-            else:
-                globals()[f"razon{index}"] = Razon_retiro_efectivo_cajero_automatico('Razon desconocida')
-                return globals()[f"razon{index}"].razon
-
-    def filtro_transf_enviada(self,iterador,index):       
-        if iterador['monto'] + iterador['monto']*self.cuenta.costo_transferencias > iterador['saldoEnCuenta'] + self.cuenta.saldo_disponible:
-            globals()[f"razon{index}"] = Razon_transferencia_enviada('Saldo en cuenta insuficiente')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_transferencia_enviada('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-
-
-    def filtro_transf_recibida(self,iterador,index):        
-        if iterador['monto'] > self.cuenta.limite_transferencia:
-            globals()[f"razon{index}"] = Razon_transferencia_recibida('Excede el monto limite a recibir')
-            return globals()[f"razon{index}"].razon
-        else:
-            globals()[f"razon{index}"] = Razon_transferencia_recibida('Razon desconocida')
-            return globals()[f"razon{index}"].razon
-
-    def filtro(self,t,i): #funcion filtro principal que determina si la transaccion se acepto o rechazo y busca las igualdades correspondientes para ejecurar la funcion deseada
-        if t['estado'] == 'ACEPTADA':
-            globals()[f"razon{i}"] = Razon_nula('')
-            return globals()[f"razon{i}"].razon 
-        elif t['estado'] == 'RECHAZADA':
-            if t['tipo'] == 'COMPRA_DOLAR':
-                self.filtro_compra_dolar(t,i)
-            elif t['tipo'] == 'ALTA_TARJETA_CREDITO':
-                self.filtro_alta_tarj(i)
-            elif t['tipo'] == 'ALTA_CHEQUERA':    
-                self.filtro_alta_chequera(i)
-            elif t['tipo'] == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO':    
-                self.filtro_retiro_efectivo_cajero(t,i)
-            elif t['tipo'] == 'TRANSFERENCIA_ENVIADA':    
-                self.filtro_transf_enviada(t,i)
-            elif t['tipo'] == 'TRANSFERENCIA_RECIBIDA':    
-                self.filtro_transf_recibida(t,i)
-
-    def retorno(self): #funcion retorno, encargada de crear una lista que recolecta toda la informacion del cliente y sus transacciones y luego la retorna para utilizarla al exportar el HTML
-        lista_transacciones = []
-        usuario = [{'nombre_completo':f'{self.nombre} {self.apellido}'},{'numero':self.numero},{'DNI':self.dni},{'direccion':f'{self.direccion.calle} {self.direccion.numero_direccion}, {self.direccion.ciudad}, {self.direccion.provincia}, {self.direccion.pais}'}]
-        lista_transacciones.append(usuario)
-        for i, transaccion in enumerate(self.transacciones):
-            globals()[f"transaccion{i}"] = [{'fecha':transaccion['fecha']},{'tipo':transaccion['tipo']},{'estado':transaccion['estado']},{'monto':transaccion['monto']}]
-            self.filtro(transaccion,i)
-            globals()[f"transaccion{i}"].append({'razon':globals()[f"razon{i}"].razon})
-            lista_transacciones.append(globals()[f"transaccion{i}"])
-        return lista_transacciones
-
-            
-#Creación de la clase Razon, asociada con la clase Cliente
-class Razon:
-    def __init__(self, razon):
-        self.__razon = razon
-
-    @property 
-    def razon(self):
-        return self.__razon
-
-#Las siguientes clases heredan de la clase Razon
-class Razon_alta_chequera(Razon):
-    def __init__(self, razon):
-        super().__init__(razon)
-
-class Razon_alta_tarjeta_credito(Razon):
-    def __init__(self, razon):
-        super().__init__(razon)
-
-class Razon_compra_dolar(Razon):
-    def __init__(self, razon):
-        super().__init__(razon)
-
-class Razon_retiro_efectivo_cajero_automatico(Razon):
-    def __init__(self, razon):
-        super().__init__(razon)
-
-class Razon_transferencia_enviada(Razon):
-    def __init__(self, razon):
-        super().__init__(razon)
-
-class Razon_transferencia_recibida(Razon):
-    def __init__(self, razon):
-        super().__init__(razon)
-
-class Razon_nula(Razon):
-    def __init__(self, razon):
-        super().__init__(razon)       
-
-
-#Ejecucion:
-#creo objeto cuenta y cliente 
-cuenta1 = Cuenta(0,0,0,0,0)
-cl = Cliente(data['nombre'],data['apellido'],data['numero'],data['dni'],data['tipo'],data['direccion']['calle'],data['direccion']['numero'],data['direccion']['ciudad'],data['direccion']['provincia'],data['direccion']['pais'],cuenta1,data['transacciones'])
-#creo clases que heredan de cliente segun el tipo de cliente
-if cl.tipo == 'BLACK':
-    if not cl.transacciones == []: #permito el funcionamiento de un JSON con usuario sin transacciones filtrando la asignacion de variables
-        cliente = Black(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta,cl.transacciones,data['transacciones'][0]['totalChequerasActualmente'],data['transacciones'][0]['totalTarjetasDeCreditoActualmente'])
-    else:
-        cliente = Black(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta)
-    # asigno por setters las variables correspondientes a cada categoria segun los limites y condiciones estipulados
-    cliente.cuenta.limite_extraccion = 100000 
-    cliente.cuenta.limite_transferencia = float('inf')
-    if not cliente.transacciones == []:
-        cliente.cuenta.monto = data['transacciones'][0]['monto']
-    cliente.cuenta.saldo_disponible = 10000
-    cliente.cuenta.costo_transferencias = 0
-elif cl.tipo == 'GOLD':
-    if not cl.transacciones == []:
-        cliente = Gold(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta,cl.transacciones,data['transacciones'][0]['totalChequerasActualmente'],data['transacciones'][0]['totalTarjetasDeCreditoActualmente'])
-    else:
-        cliente = Gold(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta)
-    cliente.cuenta.limite_extraccion = 20000
-    cliente.cuenta.limite_transferencia = 500000
-    if not cliente.transacciones == []:
-        cliente.cuenta.monto = data['transacciones'][0]['monto']
-    cliente.cuenta.saldo_disponible = 10000
-    cliente.cuenta.costo_transferencias = 0.005
-elif cl.tipo == 'CLASSIC':
-    if not cl.transacciones == []:
-        cliente = Classic(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta,cl.transacciones,data['transacciones'][0]['totalChequerasActualmente'],data['transacciones'][0]['totalTarjetasDeCreditoActualmente'])
-    else:
-        cliente = Classic(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta)
-    cliente.cuenta.limite_extraccion = 10000
-    cliente.cuenta.limite_transferencia = 150000
-    if not cliente.transacciones == []:
-        cliente.cuenta.monto = data['transacciones'][0]['monto']
-    cliente.cuenta.saldo_disponible = 0
-    cliente.cuenta.costo_transferencias = 0.01
-
-info = cliente.retorno() # retorna una lista diagramada a base de diccionarios que contiene como primer elemento los datos del cliente que se necesitan exportar y a partir del segundo elemento cada uno es una transaccion con la info a exportar 
-info_transacciones = info.copy()
-if not info_transacciones == []:
-    info_transacciones.pop(0) #creo lista de transacciones a recorrer en HTML
-
-#ejemplos para llamar a los valores:
-# cliente.retorno()[0] -->  [{'nombre_completo': 'Nicolas Gaston'}, {'numero': 100001}, {'DNI': '29494777'}, {'direccion': 'Rivadavia 7900, Capital Federal, Buenos Aires, Argentina'}]
-# cliente.retorno()[0][0] -->  {'nombre_completo': 'Nicolas Gaston'}
-# cliente.retorno()[0][0]['nombre_completo'] -->  Nicolas Gaston
-
-#Creacion de HTML
-
-env = Environment(
-    loader=PackageLoader("paquete"),
-    autoescape=select_autoescape()
-)
-template = env.get_template("template.html")
-filename = "rps.html"
-with open (filename,"w") as file:
-    file.write(template.render(info = info, info_transacciones = info_transacciones))
-
-nombre = info[0][0]['nombre_completo']
-print(f'El informe {filename} del cliente {nombre} se ha creado exitosamente') #emito mensaje de confirmacion
+import argparse
+from importlib.util import find_spec
+from paquete.esquema import modos_validacion
+from paquete.fechas import limite
+from paquete.cuarentena import ruta_cuarentena
+from paquete.estadisticas import exportar_estadisticas
+from paquete.lectura import ErrorArchivo, comparar_decodificadores, comparar_validacion, decodificadores
+from paquete.metricas import Metricas
+from paquete.perfil import ruta_perfil
+from paquete.reglas import modos_cupo
+from paquete.reporte import generar_desde_archivo
+from paquete.salida import carpeta_cache_templates, extensiones, formatos_archivo, precompilar_templates
+
+#interfaz de linea de comandos sobre el paquete: el lote y el servicio se importan solo cuando se piden
+
+def resumen_cuarentena(total, cuarentena): #se agrega al resumen del lote, del multicliente y de la vigilancia
+    return f', {total.total} transacciones procesadas y {total.cuarentena} en cuarentena' if cuarentena else ''
+
+def main(argumentos):
+    parser = argparse.ArgumentParser(description='Genera el reporte HTML de las transacciones de un cliente a partir de la informacion del TPS')
+    parser.add_argument('archivo', nargs='?', help='archivo JSON del cliente')
+    parser.add_argument('--lote', help='directorio, patron glob o manifiesto con los archivos JSON a procesar')
+    parser.add_argument('--clientes', help='archivo con varios clientes (array JSON o NDJSON con un cliente por linea): un informe por cliente en --salida y un indice')
+    parser.add_argument('--procesos', type=int, default=None, help='cantidad de procesos del lote, del multicliente o de --paralelo (por defecto uno por nucleo)')
+    parser.add_argument('--salida', default='.', help='directorio donde se escriben los informes del lote')
+    parser.add_argument('--streaming', action='store_true', help='lee, valida, clasifica y escribe las transacciones de a una con memoria constante (admite NDJSON)')
+    parser.add_argument('--paralelo', action='store_true', help='mapea el archivo en memoria y parsea, valida y clasifica las transacciones por fragmentos en --procesos procesos')
+    parser.add_argument('--incremental', metavar='ESTADO', help='base SQLite con las transacciones ya clasificadas: solo se clasifican las nuevas o modificadas desde la corrida anterior')
+    parser.add_argument('--analitica', metavar='BASE', help='guarda cada transaccion evaluada en una base SQLite para consultarla despues con consultar.py')
+    parser.add_argument('--validacion', choices=modos_validacion, default='completa', help='completa, muestreo (una de cada --muestreo transacciones) o confiable (sin validar)')
+    parser.add_argument('--muestreo', type=int, default=100, help='en modo muestreo se valida una de cada N transacciones')
+    parser.add_argument('--cuarentena', action='store_true', help='valida cada transaccion por separado: las que no respetan el schema se apartan con su error en <informe>.cuarentena.jsonl y el informe se genera con las demas')
+    parser.add_argument('--comparar-validacion', action='store_true', help='muestra el tiempo de cada modo de validacion y de cada decodificador sobre el archivo sin generar el informe')
+    parser.add_argument('--decodificador', choices=decodificadores, default='auto', help='json, msgspec (decodifica y valida en una pasada, necesita msgspec) o auto (msgspec si esta instalado y el archivo es grande)')
+    parser.add_argument('--motor', choices=('reglas', 'vectorizado'), default='reglas', help='motor de clasificacion: reglas por transaccion o vectorizado por columnas con numpy')
+    parser.add_argument('--cupo', choices=modos_cupo, default='informado', help='cupo diario de los retiros: el cupoDiarioRestante informado en cada transaccion o calculado con el limite de extraccion del nivel y los retiros aceptados del dia')
+    parser.add_argument('--desde', help="informa solo las transacciones desde esta fecha: DD/MM/AAAA o AAAA-MM-DD, con hora opcional ('01/06/2022 08:00')")
+    parser.add_argument('--hasta', help='informa solo las transacciones hasta esta fecha inclusive (sin hora, hasta el final del dia)')
+    parser.add_argument('--informe', help="archivo del informe (por defecto rps.<formato>), '-' lo escribe en la salida estandar")
+    parser.add_argument('--gzip', action='store_true', help='comprime el informe con gzip mientras se escribe')
+    parser.add_argument('--formato', choices=formatos_archivo, default='html', help='html, csv, jsonl (JSON Lines), binario (columnar compacto .tpsr) o paginado (pagina liviana que carga las transacciones de a paginas desde la carpeta <informe>_paginas)')
+    parser.add_argument('--estadisticas', help='exporta en JSON las estadisticas del informe (en --lote, el resumen global de todos los clientes)')
+    parser.add_argument('--perfil', action='store_true', help='guarda junto a cada informe un perfil JSON con tiempo real, CPU y memoria por etapa y el costo por tipo de transaccion')
+    parser.add_argument('--cprofile', action='store_true', help='con --perfil, envuelve la corrida en cProfile y guarda el .prof junto al perfil')
+    parser.add_argument('--tracemalloc', action='store_true', help='con --perfil, mide los bytes reservados por etapa y las lineas que mas memoria reservan')
+    parser.add_argument('--servidor', action='store_true', help='levanta el servicio de reportes local (POST /reporte, GET /metricas)')
+    parser.add_argument('--puerto', type=int, default=8000, help='puerto HTTP del servicio en 127.0.0.1')
+    parser.add_argument('--socket', help='atiende el servicio en un socket Unix en lugar de HTTP')
+    parser.add_argument('--cola', type=int, default=None, help='pedidos en curso como maximo en el servicio, o archivos reclamados esperando en --vigilar (por defecto el doble de --procesos)')
+    parser.add_argument('--vigilar', metavar='SPOOL', help='vigila el directorio y genera en --salida el informe de cada archivo TPS que llega; los terminados pasan a procesados/ o fallidos/')
+    parser.add_argument('--intervalo', type=float, default=0.5, help='segundos entre revisiones del directorio de --vigilar')
+    parser.add_argument('--estable', type=float, default=1.0, help='segundos sin modificarse para que --vigilar reclame un archivo')
+    parser.add_argument('--metricas', help='archivo JSON donde --vigilar deja la cola, los archivos en proceso y las latencias en cada revision')
+    parser.add_argument('--prometheus', metavar='ARCHIVO', help='escribe las metricas del pipeline (archivos, transacciones por segundo, tiempo por etapa, rechazos por Razon y tamano del informe) en formato de texto Prometheus; con --vigilar se actualiza en cada revision')
+    parser.add_argument('--puerto-prometheus', type=int, help='con --vigilar, sirve las mismas metricas en GET /metrics en 127.0.0.1:PUERTO')
+    parser.add_argument('--precompilar-templates', action='store_true', help='compila los templates HTML y guarda su bytecode, asi la primera corrida no los compila (por ejemplo al instalar)')
+    args = parser.parse_args(argumentos[1:])
+    perfil = {'cprofile': args.cprofile, 'tracemalloc': args.tracemalloc} if args.perfil or args.cprofile or args.tracemalloc else None
+    try:
+        rango = (limite(args.desde) if args.desde else None, limite(args.hasta, final=True) if args.hasta else None)
+    except ValueError as e:
+        print(f'Fecha incorrecta: {e}')
+        return 1
+    if rango == (None, None):
+        rango = None
+    elif None not in rango and rango[0] >= rango[1]:
+        print('El rango de fechas esta vacio: --desde es posterior a --hasta')
+        return 1
+    opciones = {'streaming': args.streaming, 'validacion': args.validacion, 'muestreo': args.muestreo, 'motor': args.motor, 'cupo': args.cupo, 'comprimir': args.gzip, 'formato': args.formato, 'perfil': perfil, 'incremental': args.incremental, 'decodificador': args.decodificador, 'paralelo': (args.procesos or 0) if args.paralelo else None, 'analitica': args.analitica, 'rango': rango, 'cuarentena': args.cuarentena}
+
+    if args.motor == 'vectorizado' and find_spec('numpy') is None:
+        print('El motor vectorizado necesita numpy (pip install numpy)')
+        return 1
+
+    if args.decodificador == 'msgspec' and find_spec('msgspec') is None:
+        print('El decodificador msgspec necesita msgspec (pip install msgspec)')
+        return 1
+
+    if args.incremental and args.streaming:
+        print('El modo incremental no se puede combinar con --streaming')
+        return 1
+
+    if args.paralelo and (args.streaming or args.incremental or args.lote or args.clientes or args.vigilar):
+        print('El modo paralelo no se puede combinar con --streaming, --incremental, --lote, --clientes ni --vigilar')
+        return 1
+
+    if rango is not None and (args.paralelo or args.analitica):
+        print('El rango de fechas no se puede combinar con --paralelo ni --analitica')
+        return 1
+
+    if args.cuarentena and (args.validacion != 'completa' or args.paralelo or args.incremental):
+        print('La cuarentena valida cada transaccion: no se puede combinar con --validacion muestreo o confiable, --paralelo ni --incremental')
+        return 1
+
+    if (args.prometheus or args.puerto_prometheus is not None) and (args.servidor or args.comparar_validacion):
+        print('Las metricas Prometheus no se pueden combinar con --servidor ni --comparar-validacion')
+        return 1
+
+    if args.puerto_prometheus is not None and not args.vigilar:
+        print('--puerto-prometheus solo se usa con --vigilar, en las demas corridas las metricas van a --prometheus')
+        return 1
+
+    registro = Metricas() if args.prometheus else None #las metricas de las corridas que terminan se escriben una vez al final
+
+    if args.precompilar_templates:
+        print(f"Templates compilados en {carpeta_cache_templates}: {', '.join(precompilar_templates())}")
+        return 0
+
+    if args.servidor:
+        from paquete.servicio import servir
+        return servir(args.puerto, args.socket, args.procesos, args.cola, validacion=args.validacion, muestreo=args.muestreo, motor=args.motor, cupo=args.cupo, decodificador=args.decodificador)
+
+    if args.vigilar is not None:
+        from paquete.vigilancia import vigilar
+        def informar(archivo, informe, error, latencia):
+            print(f'{os.path.basename(archivo)}: {error or informe} ({latencia:.3f} s)', flush=True)
+        print(f'Vigilando {args.vigilar} (Ctrl+C para terminar)', flush=True)
+        vigilante = vigilar(args.vigilar, args.salida, args.procesos, args.cola, args.intervalo, args.estable, args.metricas, informar, args.prometheus, args.puerto_prometheus, **opciones)
+        resumen = vigilante.resumen()
+        if vigilante.huerfanos:
+            print(f"{len(vigilante.huerfanos)} archivos de una corrida anterior quedaron en {os.path.join(args.vigilar, 'procesando')} sin procesar")
+        if args.estadisticas:
+            exportar_estadisticas(vigilante.total, args.estadisticas)
+        print(f"Vigilancia finalizada: {resumen['pedidos'] - resumen['errores']} informes creados exitosamente, {resumen['errores']} archivos con errores{resumen_cuarentena(vigilante.total, args.cuarentena)}")
+        return 0
+
+    if [args.archivo, args.lote, args.clientes].count(None) != 2: #chequeo cantidad correcta de argumentos
+        print('La cantidad de argumentos es incorrecta')
+        return 1
+
+    if args.clientes is not None:
+        if args.streaming or args.incremental or perfil is not None:
+            print('El modo multicliente no se puede combinar con --streaming, --incremental ni --perfil')
+            return 1
+        from paquete.multicliente import procesar_multicliente
+        try:
+            correctos, fallidos, total, indice = procesar_multicliente(args.clientes, args.salida, args.procesos, args.validacion, args.muestreo, args.motor, args.cupo, args.gzip, args.formato, args.decodificador, args.analitica, rango, args.cuarentena, registro)
+        except ErrorArchivo as e:
+            print(e)
+            return 1
+        if registro is not None:
+            registro.guardar(args.prometheus)
+        for posicion, numero, error in fallidos:
+            print(f"Cliente {posicion}{'' if numero is None else f' ({numero})'}: {error}")
+        if args.estadisticas:
+            exportar_estadisticas(total, args.estadisticas)
+        print(f'Multicliente finalizado: {len(correctos)} informes creados exitosamente, {len(fallidos)} clientes con errores, indice en {indice}{resumen_cuarentena(total, args.cuarentena)}')
+        return 1 if fallidos else 0
+
+    if args.lote is not None:
+        from paquete.lote import procesar_lote
+        try:
+            correctos, fallidos, total = procesar_lote(args.lote, args.salida, args.procesos, registro, **opciones)
+        except IOError:
+            print('El lote ingresado es inexistente')
+            return 1
+        if registro is not None:
+            registro.guardar(args.prometheus)
+        for archivo, error in fallidos:
+            print(f'{archivo}: {error}')
+        if args.estadisticas:
+            exportar_estadisticas(total, args.estadisticas)
+        print(f'Lote finalizado: {len(correctos)} informes creados exitosamente, {len(fallidos)} archivos con errores{resumen_cuarentena(total, args.cuarentena)}')
+        return 1 if fallidos else 0
+
+    if args.comparar_validacion:
+        try:
+            cantidad, tiempos = comparar_validacion(args.archivo, args.muestreo)
+            decodificacion = comparar_decodificadores(args.archivo, args.muestreo)
+        except ErrorArchivo as e:
+            print(e)
+            return 1
+        print(f'Validacion de {cantidad} transacciones:')
+        for modo, (segundos, valido) in tiempos.items():
+            print(f"  {modo:<10} {segundos * 1000:10.3f} ms  {'valido' if valido else 'mal formado'}")
+        print('Decodificacion y validacion:')
+        for (decodificador, modo), (segundos, valido) in decodificacion.items():
+            print(f"  {decodificador:<8} {modo:<10} {segundos * 1000:10.3f} ms  {'valido' if valido else 'mal formado'}")
+        return 0
+
+    try:
+        destino = args.informe or f"rps.{extensiones[args.formato]}{'.gz' if args.gzip else ''}"
+        filename, nombre, estadisticas = generar_desde_archivo(args.archivo, lambda data: destino, metricas=registro, **opciones)
+    except ErrorArchivo as e:
+        print(e)
+        return 1
+    finally:
+        if registro is not None: #tambien con error: el archivo fallido queda contado
+            registro.guardar(args.prometheus)
+    if args.estadisticas:
+        exportar_estadisticas(estadisticas, args.estadisticas)
+    print(f'El informe {filename} del cliente {nombre} se ha creado exitosamente', file=sys.stderr if filename == '-' else sys.stdout) #emito mensaje de confirmacion, sin mezclarlo con el informe si va por stdout
+    if args.cuarentena:
+        print(f"{estadisticas.total} transacciones procesadas, {estadisticas.cuarentena} en cuarentena{f' en {ruta_cuarentena(filename)}' if estadisticas.cuarentena else ''}", file=sys.stderr if filename == '-' else sys.stdout)
+    if perfil is not None:
+        print(f'Perfil guardado en {ruta_perfil(filename)}.json', file=sys.stderr if filename == '-' else sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,60 @@
+
+import sys
+import time
+import sqlite3
+import argparse
+from paquete.analitica import AlmacenAnalitico, campos_agrupables, dia_iso
+from paquete.reglas import politicas
+
+#consulta la base analitica que deja cliente.py --analitica, sin volver a procesar los archivos
+
+def mostrar(columnas, filas):
+    textos = [columnas] + [tuple('' if valor is None else str(valor) for valor in fila) for fila in filas]
+    anchos = [max(len(fila[i]) for fila in textos) for i in range(len(columnas))]
+    for fila in textos:
+        print('  '.join(valor.ljust(ancho) for valor, ancho in zip(fila, anchos)).rstrip())
+
+def main(argumentos):
+    parser = argparse.ArgumentParser(description='Consulta las transacciones evaluadas guardadas con cliente.py --analitica')
+    parser.add_argument('base', help='base SQLite de --analitica')
+    parser.add_argument('--nivel', choices=tuple(politicas), help='nivel del cliente')
+    parser.add_argument('--tipo', help='tipo de transaccion, por ejemplo TRANSFERENCIA_ENVIADA')
+    parser.add_argument('--estado', choices=('ACEPTADA', 'RECHAZADA'), help='estado de la transaccion')
+    parser.add_argument('--razon', help="razon de rechazo, por ejemplo 'Saldo en cuenta insuficiente'")
+    parser.add_argument('--cliente', type=int, help='numero de cliente')
+    parser.add_argument('--desde', help='primer dia incluido (AAAA-MM-DD o DD/MM/AAAA)')
+    parser.add_argument('--hasta', help='ultimo dia incluido (AAAA-MM-DD o DD/MM/AAAA)')
+    parser.add_argument('--agrupar', default='', help=f"campos por los que se agrupa separados por coma: {', '.join(campos_agrupables)}")
+    parser.add_argument('--sql', help='consulta SQL libre sobre las tablas informes y transacciones (la base se abre de solo lectura)')
+    args = parser.parse_args(argumentos[1:])
+
+    try:
+        desde = dia_iso(args.desde) if args.desde else None
+        hasta = dia_iso(args.hasta) if args.hasta else None
+    except ValueError as e:
+        print(f'Fecha incorrecta: {e}')
+        return 1
+    agrupar = tuple(campo for campo in args.agrupar.split(',') if campo)
+    desconocidos = [campo for campo in agrupar if campo not in campos_agrupables]
+    if desconocidos:
+        print(f"No se puede agrupar por {', '.join(desconocidos)}")
+        return 1
+
+    try:
+        with AlmacenAnalitico(args.base, solo_lectura=True) as almacen:
+            inicio = time.perf_counter()
+            if args.sql:
+                columnas, filas = almacen.ejecutar(args.sql)
+            else:
+                columnas, filas = almacen.consultar(args.nivel, args.tipo, args.estado, args.razon, args.cliente, desde, hasta, agrupar)
+            segundos = time.perf_counter() - inicio
+    except sqlite3.Error as e:
+        print(f'Error en la consulta sobre {args.base}: {e}')
+        return 1
+    mostrar(columnas, filas)
+    print(f'{len(filas)} filas en {segundos * 1000:.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
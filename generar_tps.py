@@ -0,0 +1,42 @@
+
+import sys
+import argparse
+from paquete.generador import distribucion_tipos, generar_archivo, generar_lote, leer_proporciones, mezcla_niveles
+from paquete.reglas import politicas
+
+#genera documentos TPS sinteticos para probar el programa con volumenes reales
+
+def main(argumentos):
+    parser = argparse.ArgumentParser(description='Genera documentos TPS sinteticos que respetan el schema del programa')
+    parser.add_argument('destino', help='archivo a generar (.json, o .ndjson para NDJSON) o directorio con --archivos')
+    parser.add_argument('--transacciones', type=int, default=10, help='cantidad de transacciones por cliente (de 10 a 10M)')
+    parser.add_argument('--archivos', type=int, default=None, help='genera un directorio con N clientes, un archivo por cliente, listo para --lote')
+    parser.add_argument('--nivel', choices=tuple(politicas), help='nivel del cliente (por defecto se sortea con --niveles)')
+    parser.add_argument('--niveles', default=None, help="mezcla de niveles, por ejemplo 'CLASSIC=0.5,GOLD=0.35,BLACK=0.15'")
+    parser.add_argument('--tipos', default=None, help="distribucion de tipos de transaccion, por ejemplo 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO=0.6,COMPRA_DOLAR=0.4'")
+    parser.add_argument('--tasa-rechazo', type=float, default=0.3, help='proporcion de transacciones rechazadas (0 a 1)')
+    parser.add_argument('--semilla', type=int, default=None, help='semilla para generar siempre los mismos documentos')
+    args = parser.parse_args(argumentos[1:])
+
+    try:
+        niveles = leer_proporciones(args.niveles, tuple(mezcla_niveles)) if args.niveles else None
+        tipos = leer_proporciones(args.tipos, tuple(distribucion_tipos)) if args.tipos else None
+    except ValueError as e:
+        print(e)
+        return 1
+    if not 0 <= args.tasa_rechazo <= 1:
+        print('La tasa de rechazo debe estar entre 0 y 1')
+        return 1
+    opciones = {'nivel': args.nivel, 'niveles': niveles, 'tipos': tipos, 'tasa_rechazo': args.tasa_rechazo}
+
+    if args.archivos is not None:
+        rutas = generar_lote(args.destino, args.archivos, args.transacciones, args.semilla, **opciones)
+        print(f'Se generaron {len(rutas)} archivos con {args.transacciones} transacciones cada uno en {args.destino}')
+    else:
+        generar_archivo(args.destino, args.transacciones, semilla=args.semilla, **opciones)
+        print(f'Se genero {args.destino} con {args.transacciones} transacciones')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -1 +1,38 @@
+import importlib
 
+#API publica del paquete: cada nombre se importa recien la primera vez que se usa, asi `import paquete` no carga
+#el schema, jsonschema, jinja2 ni numpy hasta que se pide una validacion, un informe HTML o el motor vectorizado
+_exportados = {
+    'generar_reporte': 'reporte',
+    'generar_informe': 'reporte',
+    'generar_desde_archivo': 'reporte',
+    'cargar_archivo': 'lectura',
+    'abrir_streaming': 'lectura',
+    'ErrorArchivo': 'lectura',
+    'validar_documento': 'esquema',
+    'crear_cliente': 'modelo',
+    'DatosUsuario': 'modelo',
+    'FilaTransaccion': 'modelo',
+    'Estadisticas': 'estadisticas',
+    'generar_partes': 'salida',
+    'leer_binario': 'salida',
+    'Perfil': 'perfil',
+    'Metricas': 'metricas',
+    'formatos': 'salida',
+    'procesar_lote': 'lote',
+    'procesar_multicliente': 'multicliente',
+    'servir': 'servicio',
+    'vigilar': 'vigilancia',
+}
+
+__all__ = list(_exportados)
+
+def __getattr__(nombre):
+    if nombre not in _exportados:
+        raise AttributeError(f'module {__name__!r} has no attribute {nombre!r}')
+    valor = getattr(importlib.import_module(f'.{_exportados[nombre]}', __name__), nombre)
+    globals()[nombre] = valor #las siguientes busquedas ya no pasan por __getattr__
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(_exportados))
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+from functools import partial
+from itertools import islice
+from urllib.request import pathname2url
+
+#Almacen analitico: cada transaccion evaluada (cliente, nivel, fecha, tipo, estado, monto y razon) se guarda en una base
+#SQLite con indices por nivel, tipo, razon y fecha, para contestar consultas sobre todas las corridas sin volver a procesar
+#los archivos. Mientras se escribe el informe las filas se insertan de a bloques en una tabla temporal de la conexion, que
+#no bloquea la base, y al terminar se publican en una sola transaccion que reemplaza la evaluacion anterior del mismo
+#archivo: un informe que falla a la mitad no deja filas y volver a procesar un archivo no las duplica
+filas_por_bloque = 10000
+
+#fecha del TPS (DD/MM/AAAA HH:MM:SS) como texto ordenable AAAA-MM-DD HH:MM:SS, o NULL si no tiene esa forma
+_fecha_iso = "CASE WHEN fecha GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*' THEN substr(fecha, 7, 4) || '-' || substr(fecha, 4, 2) || '-' || substr(fecha, 1, 2) || substr(fecha, 11) END"
+
+campos_agrupables = {'nivel': 'nivel', 'tipo': 'tipo', 'estado': 'estado', 'razon': 'razon', 'cliente': 'cliente', 'dia': 'substr(fecha, 1, 10)', 'mes': 'substr(fecha, 1, 7)', 'anio': 'substr(fecha, 1, 4)'}
+
+def dia_iso(texto): #AAAA-MM-DD o DD/MM/AAAA -> date; ValueError si no es ninguna de las dos
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        return datetime.strptime(texto, '%d/%m/%Y').date()
+
+class AlmacenAnalitico:
+    def __init__(self, ruta, solo_lectura=False):
+        self.__solo_lectura = solo_lectura
+        if solo_lectura: #las consultas no crean la base si no existe
+            self.__conexion = sqlite3.connect(f'file:{pathname2url(os.path.abspath(ruta))}?mode=ro', uri=True)
+            return
+        self.__conexion = sqlite3.connect(ruta, timeout=60, isolation_level=None) #transacciones explicitas; los procesos de un lote comparten la base
+        self.__conexion.execute('PRAGMA journal_mode=WAL') #se puede consultar mientras se publica
+        self.__conexion.executescript('''
+            CREATE TABLE IF NOT EXISTS informes (
+                id INTEGER PRIMARY KEY,
+                archivo TEXT,
+                cliente,
+                nivel TEXT,
+                evaluado TEXT,
+                transacciones INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS transacciones (
+                informe INTEGER NOT NULL,
+                cliente,
+                nivel TEXT,
+                fecha TEXT,
+                fecha_tps,
+                tipo TEXT,
+                estado TEXT,
+                monto,
+                razon TEXT
+            );
+            CREATE INDEX IF NOT EXISTS informes_archivo ON informes (archivo);
+            CREATE INDEX IF NOT EXISTS transacciones_informe ON transacciones (informe);
+            CREATE INDEX IF NOT EXISTS transacciones_nivel ON transacciones (nivel);
+            CREATE INDEX IF NOT EXISTS transacciones_tipo ON transacciones (tipo);
+            CREATE INDEX IF NOT EXISTS transacciones_razon ON transacciones (razon);
+            CREATE INDEX IF NOT EXISTS transacciones_fecha ON transacciones (fecha);
+            CREATE TEMP TABLE IF NOT EXISTS pendientes (fecha, tipo, estado, monto, razon);
+        ''')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *error):
+        self.cerrar()
+
+    def cerrar(self):
+        if not self.__solo_lectura and not self.__conexion.in_transaction:
+            self.__conexion.execute('PRAGMA optimize') #actualiza las estadisticas de los indices si hace falta
+        self.__conexion.close()
+
+    def registrador(self, archivo): #funcion (data, filas) -> filas que guarda las filas del informe de este archivo
+        return partial(self.registrar, archivo)
+
+    def registrar(self, archivo, data, filas): #deja pasar las filas del informe y las guarda; se publican cuando se terminaron de recorrer
+        self.__conexion.execute('DELETE FROM temp.pendientes') #lo que dejo un informe anterior que fallo
+        filas = iter(filas)
+        while True:
+            bloque = list(islice(filas, filas_por_bloque))
+            if not bloque:
+                break
+            self.__conexion.execute('BEGIN')
+            self.__conexion.executemany('INSERT INTO temp.pendientes VALUES (?, ?, ?, ?, ?)', bloque)
+            self.__conexion.execute('COMMIT')
+            yield from bloque
+        self.__publicar(archivo, data.get('numero'), data.get('tipo'))
+
+    def __publicar(self, archivo, cliente, nivel):
+        conexion = self.__conexion
+        conexion.execute('BEGIN IMMEDIATE') #toma la escritura al empezar, asi no falla a la mitad si otro proceso publico antes
+        try:
+            for informe, in conexion.execute('SELECT id FROM informes WHERE archivo = ? AND cliente IS ?', (archivo, cliente)).fetchall():
+                conexion.execute('DELETE FROM transacciones WHERE informe = ?', (informe,))
+                conexion.execute('DELETE FROM informes WHERE id = ?', (informe,))
+            informe = conexion.execute('INSERT INTO informes (archivo, cliente, nivel, evaluado, transacciones) VALUES (?, ?, ?, ?, (SELECT count(*) FROM temp.pendientes))', (archivo, cliente, nivel, datetime.now().isoformat(sep=' ', timespec='seconds'))).lastrowid
+            conexion.execute(f'INSERT INTO transacciones SELECT ?, ?, ?, {_fecha_iso}, fecha, tipo, estado, monto, razon FROM temp.pendientes', (informe, cliente, nivel))
+            conexion.execute('DELETE FROM temp.pendientes')
+            conexion.execute('COMMIT')
+        except BaseException:
+            conexion.execute('ROLLBACK')
+            raise
+
+    def consultar(self, nivel=None, tipo=None, estado=None, razon=None, cliente=None, desde=None, hasta=None, agrupar=()): #devuelve (columnas, filas) con la cantidad y el monto total de las transacciones que cumplen los filtros; desde y hasta son date, inclusive
+        condiciones, parametros = [], []
+        for columna, valor in (('nivel', nivel), ('tipo', tipo), ('estado', estado), ('razon', razon), ('cliente', cliente)):
+            if valor is not None:
+                condiciones.append(f'{columna} = ?')
+                parametros.append(valor)
+        if desde is not None:
+            condiciones.append('fecha >= ?')
+            parametros.append(desde.isoformat())
+        if hasta is not None:
+            condiciones.append('fecha < ?')
+            parametros.append((hasta + timedelta(days=1)).isoformat())
+        grupos = [campos_agrupables[campo] for campo in agrupar]
+        consulta = f"SELECT {''.join(grupo + ', ' for grupo in grupos)}count(*), sum(monto) FROM transacciones"
+        if condiciones:
+            consulta += ' WHERE ' + ' AND '.join(condiciones)
+        if grupos:
+            consulta += f" GROUP BY {', '.join(grupos)} ORDER BY {', '.join(grupos)}"
+        return (*agrupar, 'transacciones', 'monto'), self.__conexion.execute(consulta, parametros).fetchall()
+
+    def ejecutar(self, consulta, parametros=()): #consulta SQL libre, devuelve (columnas, filas)
+        cursor = self.__conexion.execute(consulta, parametros)
+        return tuple(columna[0] for columna in cursor.description or ()), cursor.fetchall()
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import zlib
+import tracemalloc
+from datetime import datetime
+from .escritura import agrupar, escribir_atomico
+from .esquema import validar_documento
+from .generador import generar_archivo
+from .lectura import ErrorArchivo, cargar_archivo, decodificar_documento, msgspec_instalado
+from .modelo import crear_cliente
+from .salida import generar_partes, obtener_template
+
+#Benchmark por etapas: cada tamano se mide por separado en parseo JSON, validacion, clasificacion (filtro/retorno), render
+#de Jinja y escritura, con el mejor tiempo de varias repeticiones y el pico de memoria de Python de cada etapa (tracemalloc,
+#en una pasada aparte para no distorsionar los tiempos). Si msgspec esta instalado se mide ademas la decodificacion con
+#validacion fusionada, que reemplaza a parseo + validacion. Tambien se mide el arranque en frio y la corrida completa del CLI
+#en un proceso hijo con su pico de RSS. Cada corrida se agrega como una linea JSON al historial y se compara con la anterior
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+presupuestos_arranque = {'import_paquete': 0.005, 'import_reporte': 0.05, 'template': 0.005, 'template_sin_cache': 0.02} #segundos, documentados en el README
+mediciones_arranque = { #(preparacion, lo que se mide) en un proceso nuevo; el template se mide con jinja2 ya importado, con y sin la cache de bytecode
+    'import_paquete': ('', 'import paquete'),
+    'import_reporte': ('', 'import paquete.reporte'),
+    'template': ('import jinja2, paquete.salida as salida', 'salida.obtener_template()'),
+    'template_sin_cache': ('import jinja2, paquete.salida as salida\nsalida._cache_bytecode = lambda carpeta: None', 'salida.obtener_template()'),
+}
+
+def medir(funcion, repeticiones=3): #mejor tiempo de varias repeticiones
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+def medir_memoria(funcion): #pico de memoria reservada por Python durante la funcion, descontando lo que ya estaba reservado
+    antes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    funcion()
+    return tracemalloc.get_traced_memory()[1] - antes
+
+def medir_proceso(argumentos): #corre un proceso hijo y devuelve su tiempo y su pico de RSS en bytes (None donde no hay wait4)
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(argumentos, cwd=raiz, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if hasattr(os, 'wait4'):
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+        rss = uso.ru_maxrss * (1 if sys.platform == 'darwin' else 1024) #Linux informa KB, macOS bytes
+    else:
+        proceso.wait()
+        rss = None
+    segundos = time.perf_counter() - inicio
+    error = proceso.stderr.read().decode(errors='replace')
+    proceso.stderr.close()
+    if proceso.returncode != 0:
+        raise RuntimeError(f'{" ".join(argumentos)} termino con codigo {proceso.returncode}: {error.strip()}')
+    return segundos, rss
+
+def medir_arranque(repeticiones=5): #tiempos de import y de compilar el template medidos dentro de procesos nuevos, asi cada medicion es en frio
+    resultado = {}
+    for nombre, (preparacion, medicion) in mediciones_arranque.items():
+        codigo = f'import time\n{preparacion}\ninicio = time.perf_counter()\n{medicion}\nprint(time.perf_counter() - inicio)'
+        resultado[nombre] = min(float(subprocess.run([sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True, check=True).stdout) for _ in range(repeticiones))
+    return resultado
+
+def etapas(archivo, destino): #las etapas en orden, cada una deja su resultado para la siguiente
+    estado = {}
+    def parseo():
+        with open(archivo, "r") as f:
+            estado['data'] = json.load(f)
+    def validacion():
+        if not validar_documento(estado['data']):
+            raise ErrorArchivo('El archivo se encuentra mal formado')
+    def msgspec(): #decodificacion y validacion fusionadas, se compara con parseo + validacion
+        with open(archivo, "rb") as f:
+            if not decodificar_documento(f.read(), rapido=True)[1]:
+                raise ErrorArchivo('El archivo se encuentra mal formado')
+    def clasificacion():
+        estado['info'], estado['filas'] = crear_cliente(estado['data']).retorno()
+    def render():
+        _, partes = generar_partes(estado['info'], estado['filas'], 'html')
+        estado['bloques'] = list(agrupar(partes))
+    def escritura():
+        escribir_atomico(destino, estado['bloques'])
+    fusionada = [('msgspec', msgspec)] if msgspec_instalado() else []
+    return [('parseo', parseo), ('validacion', validacion), *fusionada, ('clasificacion', clasificacion), ('render', render), ('escritura', escritura)]
+
+def archivo_de_prueba(carpeta, transacciones, semilla=0, **opciones): #los documentos se generan una sola vez y se reutilizan entre corridas
+    os.makedirs(carpeta, exist_ok=True)
+    variante = zlib.crc32(json.dumps(opciones, sort_keys=True).encode()) #distintas opciones del generador no comparten archivo
+    ruta = os.path.join(carpeta, f'tps_{transacciones}_{semilla}_{variante:08x}.json')
+    if not os.path.exists(ruta):
+        generar_archivo(ruta, transacciones, semilla=semilla, **opciones)
+    return ruta
+
+def medir_tamano(archivo, carpeta, repeticiones=3, memoria=True):
+    destino = os.path.join(carpeta, 'benchmark_rps.html')
+    resultado = {}
+    for nombre, funcion in etapas(archivo, destino):
+        resultado[nombre] = {'segundos': medir(funcion, repeticiones)}
+    if memoria:
+        tracemalloc.start()
+        try:
+            for nombre, funcion in etapas(archivo, destino):
+                resultado[nombre]['pico_bytes'] = medir_memoria(funcion)
+        finally:
+            tracemalloc.stop()
+    segundos, rss = medir_proceso([sys.executable, os.path.join(raiz, 'cliente.py'), archivo, '--informe', destino])
+    resultado['cli'] = {'segundos': segundos, 'rss_bytes': rss}
+    os.remove(destino)
+    return resultado
+
+def medir_paralelo(archivo, procesos, repeticiones=3): #parseo, validacion y clasificacion con la lectura normal y con --paralelo en cada cantidad de procesos, contra los nucleos de la maquina
+    from .paralelo import filas_fragmentos, leer_en_paralelo
+    def secuencial():
+        crear_cliente(cargar_archivo(archivo, decodificador='json')).retorno()
+    resultado = {'nucleos': os.cpu_count(), 'secuencial': medir(secuencial, repeticiones), 'procesos': {}}
+    for n in procesos:
+        def paralelo():
+            _, _, fragmentos = leer_en_paralelo(archivo, n, decodificador='json') #el mismo decodificador que la lectura normal
+            list(filas_fragmentos(fragmentos))
+        segundos = medir(paralelo, repeticiones)
+        resultado['procesos'][str(n)] = {'segundos': segundos, 'aceleracion': resultado['secuencial'] / segundos}
+    return resultado
+
+def commit_actual(): #commit de git sobre el que se midio, marcado si hay cambios sin commitear
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=raiz, capture_output=True, text=True, check=True).stdout.strip()
+        sucio = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], cwd=raiz).returncode != 0
+        return commit + ('-sucio' if sucio else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def combinar_niveles(resultados, niveles): #tiempo de cada etapa promediado segun la mezcla de niveles; la memoria es la del nivel que mas usa
+    total = sum(niveles.values())
+    primero = next(iter(resultados.values()))
+    combinado = {}
+    for etapa, medicion in primero.items():
+        combinado[etapa] = {'segundos': sum(niveles[nivel] * resultado[etapa]['segundos'] for nivel, resultado in resultados.items()) / total}
+        for campo in ('pico_bytes', 'rss_bytes'):
+            if campo in medicion:
+                valores = [resultado[etapa][campo] for resultado in resultados.values() if resultado[etapa][campo] is not None]
+                combinado[etapa][campo] = max(valores) if valores else None
+    return combinado
+
+def correr_benchmark(tamanos, carpeta, repeticiones=3, memoria=True, semilla=0, informar=None, paralelo=(), niveles=None, **opciones): #informar recibe (tamano, resultado) a medida que termina cada tamano; paralelo: cantidades de procesos a medir con --paralelo en el tamano mas grande; niveles: None o la mezcla {nivel: proporcion}, cada tamano se mide con un documento por nivel
+    obtener_template() #el template se compila antes de medir (y queda en la cache de bytecode), su costo queda dentro del arranque
+    registro = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semilla': semilla,
+        'arranque': medir_arranque(),
+        'tamanos': {},
+    }
+    if niveles:
+        registro['niveles'] = {'mezcla': niveles, 'tamanos': {}} #el detalle de cada nivel, 'tamanos' queda con el promedio para comparar corridas
+    for tamano in tamanos:
+        if niveles:
+            por_nivel = {nivel: medir_tamano(archivo_de_prueba(carpeta, tamano, semilla, **{**opciones, 'nivel': nivel}), carpeta, repeticiones, memoria) for nivel, proporcion in niveles.items() if proporcion > 0}
+            registro['niveles']['tamanos'][str(tamano)] = por_nivel
+            resultado = combinar_niveles(por_nivel, niveles)
+        else:
+            resultado = medir_tamano(archivo_de_prueba(carpeta, tamano, semilla, **opciones), carpeta, repeticiones, memoria)
+        registro['tamanos'][str(tamano)] = resultado
+        if informar:
+            informar(tamano, resultado)
+    if paralelo:
+        registro['paralelo'] = {'tamano': max(tamanos), **medir_paralelo(archivo_de_prueba(carpeta, max(tamanos), semilla, **opciones), paralelo, repeticiones)}
+    return registro
+
+def ultimo_registro(historial):
+    try:
+        with open(historial, "r") as f:
+            lineas = [linea for linea in f if linea.strip()]
+    except IOError:
+        return None
+    return json.loads(lineas[-1]) if lineas else None
+
+def guardar_registro(registro, historial):
+    os.makedirs(os.path.dirname(historial) or '.', exist_ok=True)
+    with open(historial, "a") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+def comparar(anterior, actual, tolerancia=0.2, minimo=0.002): #devuelve (tamano, etapa, segundos antes, segundos ahora) de las etapas que empeoraron mas que la tolerancia y mas de `minimo` segundos
+    regresiones = []
+    for nombre, segundos in actual['arranque'].items():
+        antes = anterior.get('arranque', {}).get(nombre)
+        if antes and segundos > antes * (1 + tolerancia) and segundos - antes > minimo / 10: #el arranque se mide en milisegundos
+            regresiones.append(('arranque', nombre, antes, segundos))
+    for tamano, etapas_actuales in actual['tamanos'].items():
+        for etapa, medicion in etapas_actuales.items():
+            antes = anterior.get('tamanos', {}).get(tamano, {}).get(etapa, {}).get('segundos')
+            if antes and medicion['segundos'] > antes * (1 + tolerancia) and medicion['segundos'] - antes > minimo:
+                regresiones.append((tamano, etapa, antes, medicion['segundos']))
+    return regresiones
@@ -0,0 +1,74 @@
+import os
+import json
+from .escritura import escribir_atomico
+from .esquema import explicar_transaccion, validar_transaccion
+from .reglas import campos_rechazo
+
+#Cuarentena (modo tolerante): cada transaccion se valida por separado y las que no respetan el schema se apartan con su
+#posicion en el archivo y el error, en lugar de descartar el archivo entero. El informe se genera con las demas y las
+#apartadas se escriben al lado del informe en <informe>.cuarentena.jsonl, una por linea, para corregirlas y reenviarlas.
+#El encabezado del cliente se sigue validando entero: sin cliente valido no hay informe. Como el schema no exige ningun
+#campo, tambien se apartan las transacciones a las que les falta un campo que el informe o el motor necesitan, que de otra
+#forma cortarian el archivo entero con un KeyError al clasificarlas
+campos_fila = ('fecha', 'tipo', 'estado', 'monto')
+campos_cliente = ('totalChequerasActualmente', 'totalTarjetasDeCreditoActualmente') #la primera transaccion da los totales del cliente
+
+def campo_faltante(transaccion, cupo='informado', primera=False): #primer campo necesario para clasificar la transaccion que no esta, o None
+    for campo in campos_fila:
+        if campo not in transaccion:
+            return campo
+    if primera:
+        for campo in campos_cliente:
+            if campo not in transaccion:
+                return campo
+    tipo = transaccion['tipo']
+    if cupo == 'calculado' and tipo == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO' and 'cuentaNumero' not in transaccion: #el cupo se acumula por cuenta y dia
+        return 'cuentaNumero'
+    if transaccion['estado'] != 'ACEPTADA':
+        for campo in campos_rechazo.get(tipo, ()):
+            if campo == 'cupoDiarioRestante' and cupo == 'calculado':
+                continue
+            if campo not in transaccion:
+                return campo
+    return None
+
+def ruta_cuarentena(filename): #al lado del informe, sin la extension .gz; si el informe sale por stdout va al directorio actual
+    if filename == '-':
+        return 'rps.cuarentena.jsonl'
+    return f"{filename[:-3] if filename.endswith('.gz') else filename}.cuarentena.jsonl"
+
+class Cuarentena:
+    __slots__ = ('__apartadas', '__cupo')
+
+    def __init__(self, cupo='informado'):
+        self.__apartadas = [] #(posicion, error, transaccion); son pocas, se escriben al terminar el informe
+        self.__cupo = cupo
+
+    def __len__(self):
+        return len(self.__apartadas)
+
+    @property
+    def apartadas(self):
+        return self.__apartadas
+
+    def filtrar(self, transacciones): #deja pasar las transacciones validas y completas y aparta las demas con su error
+        primera = True
+        for posicion, transaccion in enumerate(transacciones):
+            if not validar_transaccion(transaccion):
+                self.__apartadas.append((posicion, explicar_transaccion(transaccion), transaccion))
+                continue
+            campo = campo_faltante(transaccion, self.__cupo, primera)
+            if campo is not None:
+                self.__apartadas.append((posicion, f'{campo}: falta y se necesita para clasificar la transaccion', transaccion))
+                continue
+            primera = False
+            yield transaccion
+
+    def guardar(self, filename, archivo): #escribe las apartadas al lado del informe y devuelve la ruta; sin apartadas borra la de una corrida anterior y devuelve None
+        ruta = ruta_cuarentena(filename)
+        if not self.__apartadas:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            return None
+        escribir_atomico(ruta, (json.dumps({'archivo': archivo, 'posicion': posicion, 'error': error, 'transaccion': transaccion}, ensure_ascii=False) + '\n' for posicion, error, transaccion in self.__apartadas))
+        return ruta
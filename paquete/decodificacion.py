@@ -0,0 +1,58 @@
+from typing import Any, List, Literal, TypedDict, Union
+import msgspec
+from .esquema import schema
+
+#Decodificacion fusionada (opcional, necesita msgspec): el documento se decodifica directo a los tipos del cliente, la
+#direccion y las transacciones, chequeando tipos y enums en la misma pasada en lugar de json.load y despues el schema.
+#Los tipos son TypedDict, asi el resultado son los mismos diccionarios que devuelve json y el resto del programa no cambia.
+#Como el schema no declara campos obligatorios todos son opcionales: se aceptan y rechazan los mismos documentos que con
+#validar_documento. Los TypedDict descartan los campos que no declaran: ninguna salida los usa (informes, analitica y
+#servicio leen solo los campos del schema), pero la cuarentena guarda las transacciones apartadas enteras, asi que con
+#cuarentena se decodifica sin tipos. Este modulo se importa recien cuando se elige msgspec (ver usar_msgspec en lectura)
+Numero = Union[int, float] #"number" del schema: bool no es un numero y los enteros siguen siendo int
+
+_transaccion = schema['properties']['transacciones']['items']['properties']
+
+class DireccionTPS(TypedDict, total=False):
+    calle: str
+    numero: str
+    ciudad: str
+    provincia: str
+    pais: str
+
+class TransaccionTPS(TypedDict, total=False):
+    estado: Literal[tuple(_transaccion['estado']['enum'])]
+    tipo: Literal[tuple(_transaccion['tipo']['enum'])]
+    cuentaNumero: Numero
+    cupoDiarioRestante: Numero
+    monto: Numero
+    fecha: str
+    numero: Numero
+    saldoEnCuenta: Numero
+    totalTarjetasDeCreditoActualmente: Numero
+    totalChequerasActualmente: Numero
+
+class ClienteTPS(TypedDict, total=False):
+    numero: Numero
+    nombre: str
+    apellido: str
+    DNI: str
+    dni: Any #no esta en el schema pero lo usa el reporte, se conserva sin chequear
+    tipo: Literal[tuple(schema['properties']['tipo']['enum'])]
+    direccion: DireccionTPS
+    transacciones: List[TransaccionTPS]
+
+_tipados = {False: msgspec.json.Decoder(ClienteTPS), True: msgspec.json.Decoder(List[TransaccionTPS])}
+_sin_tipos = msgspec.json.Decoder()
+
+def decodificar(contenido, modo='completa', transacciones=False, tipos=True): #bytes de un documento (o de un array de transacciones) -> (datos, valido), valido None si falta validar. ValueError si no es JSON; sin tipos se conservan todos los campos
+    try:
+        if tipos:
+            try:
+                return _tipados[transacciones].decode(contenido), True #decodificar con tipos es ademas mas rapido que sin ellos
+            except msgspec.ValidationError:
+                if modo == 'completa':
+                    return None, False
+        return _sin_tipos.decode(contenido), None #muestreo y confiable aceptan documentos que el schema completo rechaza, la validacion queda para validar_documento
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from None
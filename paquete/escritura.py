@@ -0,0 +1,45 @@
+import os
+import sys
+import gzip
+
+def agrupar(partes, tam_bloque=1 << 16): #junta las partes chicas que genera Jinja en bloques de ~64 KB para escribir de a bloques
+    bloque = []
+    tam = 0
+    for parte in partes:
+        bloque.append(parte)
+        tam += len(parte)
+        if tam >= tam_bloque:
+            yield ''.join(bloque)
+            bloque = []
+            tam = 0
+    if bloque:
+        yield ''.join(bloque)
+
+def escribir_informe(filename, partes, comprimir=False, binario=False): #escribe el informe por bloques a medida que se genera, en stdout si filename es '-' y opcionalmente comprimido con gzip
+    if not binario:
+        partes = agrupar(partes)
+    if filename == '-':
+        if comprimir:
+            with gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb') as file:
+                for bloque in partes:
+                    file.write(bloque if binario else bloque.encode())
+        else:
+            salida = sys.stdout.buffer if binario else sys.stdout
+            for bloque in partes:
+                salida.write(bloque)
+                salida.flush() #cada bloque sale apenas se genera al encadenar con otras herramientas
+        return
+    escribir_atomico(filename, partes, comprimir, binario)
+
+def escribir_atomico(filename, partes, comprimir=False, binario=False): #escribo en un archivo temporal del mismo directorio y lo renombro, asi nunca queda un informe a medio escribir
+    temporal = f'{filename}.{os.getpid()}.tmp'
+    modo = "wb" if binario else ("wt" if comprimir else "w")
+    try:
+        with gzip.open(temporal, modo) if comprimir else open(temporal, modo) as file:
+            for parte in partes:
+                file.write(parte)
+        os.replace(temporal, filename)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
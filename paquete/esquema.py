@@ -0,0 +1,147 @@
+import json
+
+schema = { #declaro el schema que debera tener el JSON
+    "type" : "object",
+    "properties" : {
+        "numero": {"type": "number"},
+        "nombre": {"type": "string"},
+        "apellido": {"type": "string"},
+        "DNI": {"type": "string"},
+        "tipo": {"enum": ["BLACK","CLASSIC","GOLD"]},
+        "direccion": {
+            "type": "object",
+            "properties": {
+                "calle": {"type": "string"},
+                "numero": {"type": "string"},
+                "ciudad": {"type": "string"},
+                "provincia": {"type": "string"},
+                "pais": {"type": "string"},
+            }
+        },
+        "transacciones": {
+            "type": "array",
+            "items": {
+                "type" : "object",
+                "properties" : {
+                    "estado": {"enum": ["ACEPTADA","RECHAZADA"]},
+                    "tipo": {"enum": ["RETIRO_EFECTIVO_CAJERO_AUTOMATICO","ALTA_TARJETA_CREDITO","ALTA_CHEQUERA","COMPRAR_DOLAR","COMPRA_DOLAR","TRANSFERENCIA_ENVIADA","TRANSFERENCIA_RECIBIDA"]},
+                    "cuentaNumero": {"type": "number"},
+                    "cupoDiarioRestante": {"type": "number"},
+                    "monto": {"type": "number"},
+                    "fecha": {"type": "string"},
+                    "numero": {"type": "number"},
+                    "saldoEnCuenta": {"type": "number"},
+                    "totalTarjetasDeCreditoActualmente": {"type": "number"},
+                    "totalChequerasActualmente": {"type": "number"}
+                }
+            }
+        }
+    }
+}
+
+
+#Validacion: el schema se compila una unica vez al importar el modulo en funciones de chequeo especializadas, jsonschema solo se importa si hace falta
+def compilar_esquema(esquema, nombre): #genera codigo Python para el subconjunto de JSON Schema que usa el modulo (type, enum, properties, items)
+    lineas = [f'def {nombre}(v0):']
+    _compilar_nodo(esquema, 'v0', lineas, 1, [0])
+    lineas.append('    return True')
+    espacio = {}
+    exec(compile('\n'.join(lineas), f'<schema {nombre}>', 'exec'), espacio)
+    return espacio[nombre]
+
+class _NoCompilable(Exception): #el schema usa algo fuera del subconjunto que se compila
+    pass
+
+_chequeos_tipo = {'object': 'dict', 'array': 'list', 'string': 'str'}
+
+def _compilar_nodo(esquema, variable, lineas, nivel, contador):
+    sangria = '    ' * nivel
+    desconocidas = set(esquema) - {'type', 'enum', 'properties', 'items'}
+    if desconocidas or not isinstance(esquema.get('items', {}), dict):
+        raise _NoCompilable(f'Palabras del schema sin compilar: {sorted(desconocidas)}')
+    tipo = esquema.get('type')
+    if tipo == 'number': #bool no es un numero para JSON Schema
+        lineas.append(f'{sangria}if type({variable}) is not int and type({variable}) is not float: return False')
+    elif tipo in _chequeos_tipo:
+        lineas.append(f'{sangria}if type({variable}) is not {_chequeos_tipo[tipo]}: return False')
+    elif tipo is not None:
+        raise _NoCompilable(f'Tipo del schema sin compilar: {tipo}')
+    if 'enum' in esquema:
+        if not all(isinstance(valor, str) for valor in esquema['enum']):
+            raise _NoCompilable('Solo se compilan enums de strings')
+        lineas.append(f'{sangria}if type({variable}) is not str or {variable} not in {frozenset(esquema["enum"])!r}: return False')
+    if 'properties' in esquema:
+        if tipo != 'object': #properties solo aplica si la instancia es un objeto
+            lineas.append(f'{sangria}if type({variable}) is dict:')
+            nivel += 1
+            sangria = '    ' * nivel
+        for clave, subesquema in esquema['properties'].items():
+            contador[0] += 1
+            hijo = f'v{contador[0]}'
+            lineas.append(f'{sangria}if {clave!r} in {variable}:')
+            lineas.append(f'{sangria}    {hijo} = {variable}[{clave!r}]')
+            _compilar_nodo(subesquema, hijo, lineas, nivel + 1, contador)
+            lineas.append(f'{sangria}    pass')
+    if 'items' in esquema:
+        contador[0] += 1
+        hijo = f'v{contador[0]}'
+        if tipo != 'array':
+            lineas.append(f'{sangria}if type({variable}) is list:')
+            sangria += '    '
+            nivel += 1
+        lineas.append(f'{sangria}for {hijo} in {variable}:')
+        _compilar_nodo(esquema['items'], hijo, lineas, nivel + 1, contador)
+        lineas.append(f'{sangria}    pass')
+
+def _crear_validador(esquema, nombre): #si el schema usa algo que no se compila, se usa un validador de jsonschema construido una sola vez
+    try:
+        return compilar_esquema(esquema, nombre)
+    except _NoCompilable:
+        from jsonschema import validators
+        ValidadorEsquema = validators.validator_for(esquema)
+        ValidadorEsquema.check_schema(esquema)
+        return ValidadorEsquema(esquema).is_valid
+
+esquema_transaccion = schema["properties"]["transacciones"]["items"]
+esquema_encabezado = {**schema, "properties": {**schema["properties"], "transacciones": {k: v for k, v in schema["properties"]["transacciones"].items() if k != "items"}}} #el schema sin los items de transacciones
+validar_encabezado = _crear_validador(esquema_encabezado, 'validar_encabezado')
+validar_transaccion = _crear_validador(esquema_transaccion, 'validar_transaccion')
+
+modos_validacion = ('completa', 'muestreo', 'confiable')
+
+def validar_documento(data, modo='completa', cada=100): #completa: todo el documento, muestreo: el encabezado y una de cada `cada` transacciones, confiable: nada (feeds ya validados)
+    if modo == 'confiable':
+        return True
+    if not validar_encabezado(data):
+        return False
+    transacciones = data.get('transacciones', [])
+    paso = cada if modo == 'muestreo' else 1
+    for transaccion in transacciones[::paso] if paso > 1 else transacciones:
+        if not validar_transaccion(transaccion):
+            return False
+    return True
+
+_nombres_json = {dict: 'object', list: 'array', str: 'string', int: 'number', float: 'number', bool: 'boolean', type(None): 'null'}
+
+def explicar(esquema, valor, ruta=''): #primer error del valor contra el schema (el subconjunto que se compila), o None si lo respeta; solo se usa para el mensaje de una transaccion rechazada
+    nombre = ruta or 'la transaccion'
+    tipo = esquema.get('type')
+    if tipo is not None and _nombres_json.get(type(valor)) != tipo:
+        return f"{nombre}: se esperaba {tipo} y es {_nombres_json.get(type(valor), type(valor).__name__)}"
+    if 'enum' in esquema and (type(valor) is not str or valor not in esquema['enum']):
+        return f"{nombre}: {json.dumps(valor, ensure_ascii=False, default=str)} no es uno de {', '.join(esquema['enum'])}"
+    if type(valor) is dict:
+        for clave, subesquema in esquema.get('properties', {}).items():
+            if clave in valor:
+                error = explicar(subesquema, valor[clave], f'{ruta}.{clave}' if ruta else clave)
+                if error is not None:
+                    return error
+    if type(valor) is list and 'items' in esquema:
+        for i, elemento in enumerate(valor):
+            error = explicar(esquema['items'], elemento, f'{ruta}[{i}]')
+            if error is not None:
+                return error
+    return None
+
+def explicar_transaccion(transaccion):
+    return explicar(esquema_transaccion, transaccion) or 'la transaccion no respeta el schema'
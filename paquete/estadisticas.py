@@ -0,0 +1,98 @@
+import json
+from .escritura import escribir_atomico
+
+#Estadisticas del reporte
+class Estadisticas: #contadores que se llenan en una sola pasada sobre las filas clasificadas y se pueden sumar entre clientes y procesos
+    __slots__ = ('__total', '__aceptadas', '__monto_rechazado_maximo', '__rechazos', '__cuarentena')
+
+    def __init__(self):
+        self.__total = 0
+        self.__aceptadas = 0
+        self.__monto_rechazado_maximo = None
+        self.__rechazos = {} #tipo -> razon -> [cantidad, monto]
+        self.__cuarentena = 0 #transacciones invalidas apartadas en el modo tolerante, no estan en el total
+
+    @property
+    def total(self):
+        return self.__total
+
+    @property
+    def aceptadas(self):
+        return self.__aceptadas
+
+    @property
+    def rechazadas(self):
+        return self.__total - self.__aceptadas
+
+    @property
+    def tasa_aceptacion(self):
+        return self.__aceptadas / self.__total if self.__total else 0.0
+
+    @property
+    def monto_rechazado_maximo(self):
+        return self.__monto_rechazado_maximo
+
+    @property
+    def rechazos(self):
+        return self.__rechazos
+
+    @property
+    def cuarentena(self):
+        return self.__cuarentena
+
+    @cuarentena.setter
+    def cuarentena(self, cantidad):
+        self.__cuarentena = cantidad
+
+    def rechazos_por_tipo(self): #tipo -> (cantidad, monto) sumando todas las razones
+        return {tipo: (sum(c for c, _ in razones.values()), sum(m for _, m in razones.values())) for tipo, razones in self.__rechazos.items()}
+
+    def contar(self, filas): #deja pasar las filas tal cual y las cuenta, asi las estadisticas salen de la misma pasada que escribe el informe
+        for fila in filas:
+            self.__total += 1
+            if fila.estado == 'ACEPTADA':
+                self.__aceptadas += 1
+            else:
+                acumulado = self.__rechazos.setdefault(fila.tipo, {}).setdefault(fila.razon, [0, 0])
+                acumulado[0] += 1
+                acumulado[1] += fila.monto
+                if self.__monto_rechazado_maximo is None or fila.monto > self.__monto_rechazado_maximo:
+                    self.__monto_rechazado_maximo = fila.monto
+            yield fila
+
+    def sumar(self, otra): #combina los contadores de otro cliente o proceso en estos
+        self.__total += otra.total
+        self.__aceptadas += otra.aceptadas
+        self.__cuarentena += otra.cuarentena
+        if otra.monto_rechazado_maximo is not None and (self.__monto_rechazado_maximo is None or otra.monto_rechazado_maximo > self.__monto_rechazado_maximo):
+            self.__monto_rechazado_maximo = otra.monto_rechazado_maximo
+        for tipo, razones in otra.rechazos.items():
+            for razon, (cantidad, monto) in razones.items():
+                acumulado = self.__rechazos.setdefault(tipo, {}).setdefault(razon, [0, 0])
+                acumulado[0] += cantidad
+                acumulado[1] += monto
+        return self
+
+    def a_dict(self): #formato de exportacion JSON
+        return {
+            'total': self.__total,
+            'aceptadas': self.__aceptadas,
+            'rechazadas': self.rechazadas,
+            'tasa_aceptacion': self.tasa_aceptacion,
+            'monto_rechazado_maximo': self.__monto_rechazado_maximo,
+            'rechazos': {tipo: {razon: {'cantidad': cantidad, 'monto': monto} for razon, (cantidad, monto) in razones.items()} for tipo, razones in self.__rechazos.items()},
+            'cuarentena': self.__cuarentena,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        estadisticas = cls()
+        estadisticas.__total = datos['total']
+        estadisticas.__aceptadas = datos['aceptadas']
+        estadisticas.__monto_rechazado_maximo = datos['monto_rechazado_maximo']
+        estadisticas.__rechazos = {tipo: {razon: [valores['cantidad'], valores['monto']] for razon, valores in razones.items()} for tipo, razones in datos['rechazos'].items()}
+        estadisticas.__cuarentena = datos.get('cuarentena', 0) #estadisticas exportadas antes de la cuarentena
+        return estadisticas
+
+def exportar_estadisticas(estadisticas, filename):
+    escribir_atomico(filename, [json.dumps(estadisticas.a_dict(), ensure_ascii=False, indent=2)])
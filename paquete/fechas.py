@@ -0,0 +1,78 @@
+import re
+from datetime import date
+from functools import lru_cache
+
+#Fechas de las transacciones como segundos enteros (la hora del TPS tal cual, sin zona horaria) para recortar un informe
+#a un rango de fechas en una sola pasada. El formato del TPS es DD/MM/AAAA HH:MM:SS; las que tienen exactamente esa forma
+#se leen por posicion con el dia cacheado (las transacciones de un mismo dia comparten la conversion del dia) y las demas
+#pasan por un parser tolerante, tambien cacheado, que acepta espacios de mas ('16: 00: 55'), dia o mes de un digito, la hora
+#sin segundos o sin hora, y AAAA-MM-DD. Una fecha que no se puede leer vale None y queda fuera de cualquier rango
+segundos_dia = 86400
+_epoca = date(1970, 1, 1).toordinal()
+
+_hora = r'(?:(?:\s+|\s*T\s*)(?P<h>\d{1,2})\s*:\s*(?P<mi>\d{1,2})(?:\s*:\s*(?P<s>\d{1,2}))?)?\s*$'
+_formatos = (
+    re.compile(r'\s*(?P<d>\d{1,2})\s*/\s*(?P<m>\d{1,2})\s*/\s*(?P<a>\d{4})' + _hora, re.ASCII),
+    re.compile(r'\s*(?P<a>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})' + _hora, re.ASCII),
+)
+
+def _segundos(anio, mes, dia, hora=0, minuto=0, segundo=0): #None si la fecha o la hora no existen
+    if hora > 23 or minuto > 59 or segundo > 59:
+        return None
+    try:
+        return (date(anio, mes, dia).toordinal() - _epoca) * segundos_dia + hora * 3600 + minuto * 60 + segundo
+    except ValueError:
+        return None
+
+def _partes(texto): #(anio, mes, dia, hora, minuto, segundo) con None en lo que no se escribio, o None si no tiene ninguna de las formas
+    for formato in _formatos:
+        encontrado = formato.match(texto)
+        if encontrado:
+            return tuple(None if valor is None else int(valor) for valor in encontrado.group('a', 'm', 'd', 'h', 'mi', 's'))
+    return None
+
+@lru_cache(maxsize=4096)
+def _inicio_dia(texto): #'DD/MM/AAAA' -> segundos al comenzar el dia, o None
+    if texto[2:3] == texto[5:6] == '/' and texto[:2].isdecimal() and texto[3:5].isdecimal() and texto[6:].isdecimal():
+        return _segundos(int(texto[6:]), int(texto[3:5]), int(texto[:2]))
+    return None
+
+@lru_cache(maxsize=None) #como mucho 86400 horas distintas
+def _segundos_hora(texto): #'HH:MM:SS' -> segundos desde el comienzo del dia, o None
+    if texto[2:3] == texto[5:6] == ':' and texto[:2].isdecimal() and texto[3:5].isdecimal() and texto[6:].isdecimal():
+        hora, minuto, segundo = int(texto[:2]), int(texto[3:5]), int(texto[6:])
+        if hora < 24 and minuto < 60 and segundo < 60:
+            return hora * 3600 + minuto * 60 + segundo
+    return None
+
+@lru_cache(maxsize=65536)
+def _timestamp_tolerante(fecha):
+    partes = _partes(fecha)
+    if partes is None:
+        return None
+    anio, mes, dia, hora, minuto, segundo = partes
+    return _segundos(anio, mes, dia, hora or 0, minuto or 0, segundo or 0)
+
+def timestamp(fecha): #fecha del TPS -> segundos enteros, o None si no se puede leer
+    if type(fecha) is not str:
+        return None
+    if len(fecha) == 19 and fecha[10] == ' ': #el dia y la hora se buscan por separado en sus caches, sin armar nada por transaccion
+        inicio, hora = _inicio_dia(fecha[:10]), _segundos_hora(fecha[11:])
+        if inicio is not None and hora is not None:
+            return inicio + hora
+    return _timestamp_tolerante(fecha)
+
+def limite(texto, final=False): #extremo de un rango escrito como DD/MM/AAAA o AAAA-MM-DD con hora opcional; el final incluye todo el dia, minuto o segundo escrito. ValueError si no es una fecha
+    partes = _partes(texto)
+    if partes is None:
+        raise ValueError(f"'{texto}' no tiene la forma DD/MM/AAAA [HH:MM[:SS]] ni AAAA-MM-DD [HH:MM[:SS]]")
+    anio, mes, dia, hora, minuto, segundo = partes
+    segundos = _segundos(anio, mes, dia, hora or 0, minuto or 0, segundo or 0)
+    if segundos is None:
+        raise ValueError(f"'{texto}' no es una fecha valida")
+    if final:
+        segundos += segundos_dia if hora is None else 60 if segundo is None else 1
+    return segundos
+
+def dias_completos(desde, hasta): #extiende [desde, hasta) al comienzo del primer dia y al final del ultimo
+    return (None if desde is None else desde - desde % segundos_dia), (None if hasta is None else -(-hasta // segundos_dia) * segundos_dia)
@@ -0,0 +1,131 @@
+import os
+import json
+import random
+from datetime import datetime, timedelta
+from .reglas import politicas
+
+#Generador de documentos TPS sinteticos con el formato del schema: un cliente por documento y sus transacciones en orden de fecha.
+#Los saldos, cupos diarios y totales de chequeras y tarjetas evolucionan con las transacciones aceptadas, y los rechazos
+#se generan en su mayoria con montos que disparan una razon concreta (saldo, cupo, limite) para que el reporte sea realista
+mezcla_niveles = {'CLASSIC': 0.5, 'GOLD': 0.35, 'BLACK': 0.15}
+distribucion_tipos = {
+    'RETIRO_EFECTIVO_CAJERO_AUTOMATICO': 0.35,
+    'TRANSFERENCIA_ENVIADA': 0.25,
+    'TRANSFERENCIA_RECIBIDA': 0.2,
+    'COMPRA_DOLAR': 0.1,
+    'ALTA_TARJETA_CREDITO': 0.05,
+    'ALTA_CHEQUERA': 0.05,
+}
+nombres = ('Nicolas', 'Lucia', 'Martin', 'Sofia', 'Juan', 'Valentina', 'Diego', 'Camila', 'Federico', 'Agustina')
+apellidos = ('Gaston', 'Gomez', 'Fernandez', 'Lopez', 'Martinez', 'Perez', 'Romero', 'Sosa', 'Benitez', 'Bidarra')
+calles = ('Rivadavia', 'Corrientes', 'Santa Fe', 'Cabildo', 'San Martin', 'Belgrano', 'Mitre', 'Sarmiento')
+localidades = (('Capital Federal', 'Buenos Aires'), ('La Plata', 'Buenos Aires'), ('Rosario', 'Santa Fe'), ('Cordoba', 'Cordoba'), ('Mendoza', 'Mendoza'))
+formato_fecha = '%d/%m/%Y %H:%M:%S'
+
+def leer_proporciones(texto, validas): #'CLASSIC=0.5,GOLD=0.3' -> {'CLASSIC': 0.5, 'GOLD': 0.3}
+    proporciones = {}
+    for par in texto.split(','):
+        clave, _, valor = par.partition('=')
+        clave = clave.strip().upper()
+        if clave not in validas:
+            raise ValueError(f'Valor desconocido: {clave} (validos: {", ".join(validas)})')
+        proporciones[clave] = float(valor)
+    if sum(proporciones.values()) <= 0:
+        raise ValueError('Las proporciones deben sumar mas de 0')
+    return proporciones
+
+def datos_cliente(numero, nivel, rng): #encabezado del documento con los mismos campos que los ejemplos
+    localidad, provincia = rng.choice(localidades)
+    return {
+        'numero': numero,
+        'nombre': rng.choice(nombres),
+        'apellido': rng.choice(apellidos),
+        'dni': str(rng.randint(20000000, 45000000)),
+        'tipo': nivel,
+        'direccion': {'calle': rng.choice(calles), 'numero': str(rng.randint(1, 9999)), 'ciudad': localidad, 'provincia': provincia, 'pais': 'Argentina'},
+    }
+
+def transacciones_sinteticas(n, nivel, tipos=None, tasa_rechazo=0.3, rng=None, inicio=datetime(2022, 6, 1, 9, 0, 0), bloque=4096): #genera las transacciones de a una, con memoria constante para cualquier n
+    rng = rng or random.Random()
+    politica = politicas[nivel]
+    tipos = tipos or distribucion_tipos
+    nombres_tipo, pesos = list(tipos), list(tipos.values())
+    limite_recibida = min(politica['limite_transferencia'], 1000000) #BLACK no tiene limite para recibir
+    cuenta = rng.randint(100, 999)
+    saldo = rng.randint(0, 200000)
+    chequeras = rng.randint(0, politica['limiteChequeras'])
+    tarjetas = rng.randint(0, politica['limiteTarj'])
+    fecha = inicio
+    dia = None
+    cupo = 0
+    numero = 0
+    while numero < n:
+        for tipo in rng.choices(nombres_tipo, pesos, k=min(bloque, n - numero)): #los tipos se sortean por bloques, no por transaccion
+            numero += 1
+            fecha += timedelta(seconds=rng.randint(30, 7200))
+            if fecha.date() != dia: #el cupo de extraccion se renueva cada dia
+                dia = fecha.date()
+                cupo = politica['limite_extraccion']
+            rechazada = rng.random() < tasa_rechazo
+            forzar = rechazada and rng.random() < 0.8 #la mayoria de los rechazos tienen una razon concreta, el resto queda como razon desconocida
+            if tipo == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO':
+                if forzar:
+                    monto = saldo + politica['saldo_disponible'] + rng.randint(1, 50000) if rng.random() < 0.5 else cupo + rng.randint(1, 5000)
+                else:
+                    monto = rng.randint(1, max(1, min(saldo + politica['saldo_disponible'], cupo)))
+            elif tipo in ('TRANSFERENCIA_ENVIADA', 'COMPRA_DOLAR'):
+                monto = saldo + politica['saldo_disponible'] + rng.randint(1, 50000) if forzar else rng.randint(1, max(1, saldo // 2))
+            elif tipo == 'TRANSFERENCIA_RECIBIDA':
+                monto = limite_recibida + rng.randint(1, 100000) if forzar else rng.randint(100, limite_recibida)
+            else:
+                monto = 0
+            yield {
+                'estado': 'RECHAZADA' if rechazada else 'ACEPTADA',
+                'tipo': tipo,
+                'cuentaNumero': cuenta,
+                'cupoDiarioRestante': cupo,
+                'monto': monto,
+                'fecha': fecha.strftime(formato_fecha),
+                'numero': numero,
+                'saldoEnCuenta': saldo,
+                'totalTarjetasDeCreditoActualmente': tarjetas,
+                'totalChequerasActualmente': chequeras,
+            }
+            if not rechazada: #las aceptadas actualizan el estado de la cuenta que ven las siguientes
+                if tipo == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO':
+                    saldo -= monto
+                    cupo = max(0, cupo - monto)
+                elif tipo in ('TRANSFERENCIA_ENVIADA', 'COMPRA_DOLAR'):
+                    saldo -= monto
+                elif tipo == 'TRANSFERENCIA_RECIBIDA':
+                    saldo += monto
+                elif tipo == 'ALTA_CHEQUERA':
+                    chequeras += 1
+                else:
+                    tarjetas += 1
+
+def escribir_documento(f, encabezado, transacciones, ndjson=False): #escribe el documento por partes, sin armarlo completo en memoria
+    if ndjson:
+        f.write(json.dumps(encabezado) + '\n')
+        for transaccion in transacciones:
+            f.write(json.dumps(transaccion) + '\n')
+        return
+    f.write(json.dumps(encabezado)[:-1] + ', "transacciones": [')
+    separador = ''
+    for transaccion in transacciones:
+        f.write(separador + json.dumps(transaccion))
+        separador = ', '
+    f.write(']}\n')
+
+def generar_archivo(ruta, transacciones=10, nivel=None, niveles=None, tipos=None, tasa_rechazo=0.3, semilla=None, numero=100001): #genera un documento TPS; sin nivel se sortea segun la mezcla de niveles
+    rng = random.Random(semilla)
+    niveles = niveles or mezcla_niveles
+    nivel = nivel or rng.choices(list(niveles), list(niveles.values()))[0]
+    with open(ruta, "w") as f:
+        escribir_documento(f, datos_cliente(numero, nivel, rng), transacciones_sinteticas(transacciones, nivel, tipos, tasa_rechazo, rng), ruta.endswith(('.ndjson', '.jsonl')))
+    return ruta
+
+def generar_lote(carpeta, archivos, transacciones=10, semilla=None, **opciones): #un archivo por cliente, listo para --lote; cada archivo tiene su propia semilla derivada
+    os.makedirs(carpeta, exist_ok=True)
+    rng = random.Random(semilla)
+    return [generar_archivo(os.path.join(carpeta, f'cliente_{i:06d}.json'), transacciones, semilla=rng.getrandbits(64), numero=100001 + i, **opciones) for i in range(archivos)]
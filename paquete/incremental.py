@@ -0,0 +1,277 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+from .esquema import validar_documento
+from .fechas import timestamp
+from .lectura import ErrorArchivo, _esperar, _leer_elementos, _saltar, _valor
+from .modelo import FilaTransaccion, crear_cliente
+from .perfil import perfil_nulo
+from .reglas import politicas
+from .salida import exportar
+
+#Re-evaluacion incremental: el estado (SQLite) guarda por cliente las filas ya clasificadas, cada una con su numero, fecha
+#y una firma de su contenido, y cuantos bytes del archivo de origen ya se procesaron con la firma de ese prefijo.
+#Si el archivo solo crecio (feed append-only) se verifica la firma del prefijo y se leen, validan y clasifican solo las
+#transacciones nuevas. Si el archivo cambio de otra forma se lee completo y se reutiliza la razon de cada transaccion
+#cuya firma no cambio. En los dos casos el informe se arma con las filas guardadas en el estado. Cada fila guarda tambien
+#su fecha en segundos (ver fechas) en un indice ordenado por cliente y marca, asi un rango de fechas es una consulta por
+#rango sobre el indice en lugar de releer las fechas de todas las filas
+version_reglas = 2 #subir al cambiar las reglas de rechazo: invalida las razones guardadas
+
+def _firma(datos):
+    return hashlib.blake2b(datos, digest_size=16).digest()
+
+def _leer_json(texto): #devuelve el encabezado, las transacciones con su posicion en el texto y donde termina la ultima (None sin transacciones)
+    i = _esperar(texto, _saltar(texto, 0), '{')
+    encabezado = {}
+    transacciones = []
+    fin_prefijo = None
+    i = _saltar(texto, i)
+    if texto[i:i + 1] != '}':
+        while True:
+            clave, i = _valor(texto, i)
+            i = _saltar(texto, _esperar(texto, _saltar(texto, i), ':'))
+            if clave == 'transacciones' and texto[i:i + 1] == '[':
+                transacciones, i = _leer_elementos(texto, i + 1, True)
+                fin_prefijo = transacciones[-1][2] if transacciones else texto.rindex('[', 0, i) + 1 #sin transacciones el prefijo llega hasta el '['
+            else:
+                encabezado[clave], i = _valor(texto, i)
+            i = _saltar(texto, i)
+            if texto[i:i + 1] != ',':
+                break
+            i = _saltar(texto, i + 1)
+    i = _esperar(texto, i, '}')
+    if _saltar(texto, i) != len(texto):
+        raise json.JSONDecodeError('Datos despues del documento', texto, i)
+    return encabezado, transacciones, fin_prefijo
+
+def _leer_cola_json(texto, vacio): #la parte nueva de un documento JSON que solo crecio: transacciones nuevas y el cierre ']}'
+    elementos, i = _leer_elementos(texto, 0, vacio)
+    i = _esperar(texto, _saltar(texto, i), '}')
+    if _saltar(texto, i) != len(texto):
+        return None #hay claves despues de las transacciones, se procesa el archivo completo
+    return elementos
+
+def _lineas(texto, desde=0): #(valor, inicio, fin) de cada linea no vacia de un NDJSON
+    for linea in re.finditer(r'[^\n]+', texto):
+        if linea.group().strip():
+            yield json.loads(linea.group()), desde + linea.start(), desde + linea.end()
+
+def _leer_ndjson(texto):
+    lineas = list(_lineas(texto))
+    if not lineas:
+        raise json.JSONDecodeError('Archivo vacio', texto, 0)
+    encabezado = lineas[0][0]
+    encabezado.pop('transacciones', None)
+    return encabezado, lineas[1:], lineas[-1][2]
+
+class EstadoIncremental:
+    def __init__(self, ruta):
+        self.__conexion = sqlite3.connect(ruta, timeout=60) #los procesos de un lote comparten el archivo, SQLite serializa las escrituras
+        self.__conexion.executescript('''
+            CREATE TABLE IF NOT EXISTS clientes (
+                numero PRIMARY KEY,
+                archivo TEXT,
+                prefijo INTEGER,
+                firma_prefijo BLOB,
+                cantidad INTEGER,
+                contexto TEXT,
+                encabezado TEXT,
+                primera TEXT
+            );
+            CREATE TABLE IF NOT EXISTS transacciones (
+                cliente NOT NULL,
+                posicion INTEGER NOT NULL,
+                numero,
+                fecha TEXT,
+                firma BLOB,
+                tipo TEXT,
+                estado TEXT,
+                monto,
+                razon TEXT,
+                marca INTEGER,
+                PRIMARY KEY (cliente, posicion)
+            ) WITHOUT ROWID;
+            DROP TABLE IF EXISTS cupos; -- version anterior, con el dia como texto
+            CREATE TABLE IF NOT EXISTS cupos_diarios (
+                cliente NOT NULL,
+                cuenta,
+                dia,
+                retirado,
+                PRIMARY KEY (cliente, cuenta, dia)
+            ) WITHOUT ROWID;
+        ''')
+        if 'marca' not in [columna[1] for columna in self.__conexion.execute('PRAGMA table_info(transacciones)')]: #estado de una version anterior: se agrega la marca de las filas guardadas
+            self.__conexion.create_function('marca', 1, timestamp, deterministic=True)
+            self.__conexion.execute('ALTER TABLE transacciones ADD COLUMN marca INTEGER')
+            self.__conexion.execute('UPDATE transacciones SET marca = marca(fecha)')
+            self.__conexion.commit()
+        self.__conexion.execute('CREATE INDEX IF NOT EXISTS transacciones_marca ON transacciones (cliente, marca)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *error):
+        self.cerrar()
+
+    def cerrar(self):
+        self.__conexion.close()
+
+    def cliente_de_archivo(self, archivo): #estado guardado del cliente que se leyo por ultima vez de este archivo
+        return self.__conexion.execute('SELECT numero, prefijo, firma_prefijo, cantidad, contexto, encabezado, primera FROM clientes WHERE archivo = ?', (archivo,)).fetchone()
+
+    def contexto(self, numero):
+        fila = self.__conexion.execute('SELECT contexto FROM clientes WHERE numero = ?', (numero,)).fetchone()
+        return fila[0] if fila else None
+
+    def razones(self, numero): #(numero, fecha) -> (posicion, firma, razon) de las transacciones guardadas del cliente
+        return {(numero_tx, fecha): (posicion, firma, razon) for posicion, numero_tx, fecha, firma, razon in self.__conexion.execute('SELECT posicion, numero, fecha, firma, razon FROM transacciones WHERE cliente = ?', (numero,))}
+
+    def agregar(self, numero, desde, filas): #filas: (numero, fecha, firma, tipo, estado, monto, razon) a partir de la posicion desde
+        self.__conexion.executemany('INSERT OR REPLACE INTO transacciones VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', ((numero, desde + i, *fila, timestamp(fila[1])) for i, fila in enumerate(filas)))
+
+    def actualizar(self, numero, cambios, cantidad): #cambios: (posicion, fila) de las filas que no estaban guardadas en esa posicion; descarta las que sobran
+        self.__conexion.executemany('INSERT OR REPLACE INTO transacciones VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', ((numero, posicion, *fila, timestamp(fila[1])) for posicion, fila in cambios))
+        self.__conexion.execute('DELETE FROM transacciones WHERE cliente = ? AND posicion >= ?', (numero, cantidad))
+
+    def cupos(self, numero): #con cupo calculado: (cuenta, dia) -> retiros aceptados ya clasificados, para seguir acumulando
+        return {(cuenta, dia): retirado for cuenta, dia, retirado in self.__conexion.execute('SELECT cuenta, dia, retirado FROM cupos_diarios WHERE cliente = ?', (numero,))}
+
+    def guardar_cupos(self, numero, retirado):
+        self.__conexion.execute('DELETE FROM cupos_diarios WHERE cliente = ?', (numero,))
+        self.__conexion.executemany('INSERT INTO cupos_diarios VALUES (?, ?, ?, ?)', ((numero, cuenta, dia, suma) for (cuenta, dia), suma in retirado.items()))
+
+    def guardar_cliente(self, numero, archivo, prefijo, firma_prefijo, cantidad, contexto, encabezado, primera):
+        self.__conexion.execute('DELETE FROM clientes WHERE archivo = ? AND numero != ?', (archivo, numero)) #el archivo ahora es de otro cliente
+        self.__conexion.execute('INSERT OR REPLACE INTO clientes VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (numero, archivo, prefijo, firma_prefijo, cantidad, contexto, encabezado, primera))
+        self.__conexion.commit()
+
+    def filas(self, numero, rango=None): #filas del informe en el orden del archivo, leidas de a bloques del cursor; rango: None o (desde, hasta) en segundos, con None en un extremo abierto
+        if rango is None:
+            cursor = self.__conexion.execute('SELECT fecha, tipo, estado, monto, razon FROM transacciones WHERE cliente = ? ORDER BY posicion', (numero,))
+        else: #las filas del rango salen del indice por marca y solo esas se ordenan por posicion; una fecha que no se pudo leer (marca NULL) queda afuera
+            desde, hasta = rango
+            cursor = self.__conexion.execute('SELECT fecha, tipo, estado, monto, razon FROM transacciones INDEXED BY transacciones_marca WHERE cliente = ? AND marca >= ? AND marca < ? ORDER BY posicion', (numero, -2 ** 63 if desde is None else desde, 2 ** 63 - 1 if hasta is None else hasta))
+        return map(FilaTransaccion._make, cursor)
+
+def contexto_cliente(cliente, cupo='informado'): #lo que determina las razones de rechazo ademas de la transaccion: nivel, totales de la primera transaccion, politica y modo de cupo
+    return json.dumps([version_reglas, cliente.tipo, cliente.cantChequeras, cliente.cantTarj, politicas[cliente.tipo], cupo])
+
+def _razones(cliente, transacciones, motor, cupo, retirado=None): #devuelve las razones y, con cupo calculado, las sumas de retiros por cuenta y dia actualizadas
+    if motor == 'vectorizado':
+        clasificador = cliente.motor_vectorial(cupo, retirado)
+        razones = clasificador.razones_texto(transacciones) if transacciones else []
+    else:
+        clasificador = cliente.motor(cupo, retirado)
+        razones = [clasificador.razon(transaccion).razon for transaccion in transacciones]
+    return razones, clasificador.cupo.retirado if cupo == 'calculado' else {}
+
+def _firmas(texto, contenido, elementos): #firma del texto de cada transaccion; si el archivo es ASCII las posiciones valen en bytes y no hace falta codificar
+    if len(texto) == len(contenido):
+        return [_firma(contenido[inicio:fin]) for _, inicio, fin in elementos]
+    return [_firma(texto[inicio:fin].encode()) for _, inicio, fin in elementos]
+
+def _filas_estado(transacciones, firmas, razones):
+    return [(t['numero'], t['fecha'], firma, t['tipo'], t['estado'], t['monto'], razon) for t, firma, razon in zip(transacciones, firmas, razones)]
+
+def _es_ndjson(archivo):
+    return archivo.endswith(('.ndjson', '.jsonl'))
+
+def _agregar_nuevas(estado, guardado, archivo, ruta, contenido, validacion, muestreo, motor, cupo, perfil): #camino rapido: el archivo solo crecio desde la ultima corrida
+    numero, prefijo, firma_prefijo, cantidad, contexto, encabezado, primera = guardado
+    if prefijo is None or len(contenido) < prefijo or _firma(contenido[:prefijo]) != firma_prefijo:
+        return None
+    try:
+        with perfil.etapa('parseo'):
+            cola = contenido[prefijo:].decode()
+            elementos = list(_lineas(cola)) if _es_ndjson(archivo) else _leer_cola_json(cola, cantidad == 0)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ErrorArchivo('El archivo ingresado no tiene contenido')
+    if elementos is None:
+        return None
+    encabezado = json.loads(encabezado)
+    nuevas = [valor for valor, _, _ in elementos]
+    primera = json.loads(primera) if primera else (nuevas[0] if nuevas else None)
+    with perfil.etapa('validacion'):
+        if not validar_documento({**encabezado, 'transacciones': nuevas}, validacion, muestreo):
+            raise ErrorArchivo('El archivo se encuentra mal formado')
+    with perfil.etapa('clasificacion'):
+        cliente = crear_cliente({**encabezado, 'transacciones': [primera] if primera else []})
+        if cantidad and contexto_cliente(cliente, cupo) != contexto:
+            return None #cambiaron las reglas, la politica del nivel o el modo de cupo desde la ultima corrida, se reclasifica todo
+        if nuevas:
+            firmas = _firmas(cola, contenido[prefijo:], elementos)
+            razones, retirado = _razones(cliente, nuevas, motor, cupo, estado.cupos(numero) if cupo == 'calculado' else None)
+            estado.agregar(numero, cantidad, _filas_estado(nuevas, firmas, razones))
+            if cupo == 'calculado':
+                estado.guardar_cupos(numero, retirado)
+            prefijo += len(cola[:elementos[-1][2]].encode())
+            estado.guardar_cliente(numero, ruta, prefijo, _firma(contenido[:prefijo]), cantidad + len(nuevas), contexto_cliente(cliente, cupo), json.dumps(encabezado), json.dumps(primera))
+    return encabezado, cliente
+
+def _procesar_completo(estado, archivo, ruta, contenido, validacion, muestreo, motor, cupo, perfil): #camino lento: se lee todo y se reutilizan las razones de las transacciones cuya firma no cambio
+    try:
+        with perfil.etapa('parseo'):
+            texto = contenido.decode()
+            encabezado, elementos, fin_prefijo = _leer_ndjson(texto) if _es_ndjson(archivo) else _leer_json(texto)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ErrorArchivo('El archivo ingresado no tiene contenido')
+    transacciones = [valor for valor, _, _ in elementos]
+    data = {**encabezado, 'transacciones': transacciones}
+    with perfil.etapa('validacion'):
+        if not validar_documento({**encabezado, 'transacciones': transacciones[:1]}, validacion, muestreo): #el encabezado y la primera transaccion antes de crear el cliente
+            raise ErrorArchivo('El archivo se encuentra mal formado')
+    with perfil.etapa('clasificacion'):
+        cliente = crear_cliente(data)
+        contexto = contexto_cliente(cliente, cupo)
+        guardadas = estado.razones(cliente.numero) if estado.contexto(cliente.numero) == contexto else {}
+        firmas = _firmas(texto, contenido, elementos)
+        razones = []
+        pendientes = [] #posiciones de las transacciones nuevas o modificadas
+        movidas = [] #posiciones de transacciones sin cambios que quedaron en otro lugar del archivo
+        for i, (transaccion, firma) in enumerate(zip(transacciones, firmas)):
+            previa = guardadas.get((transaccion.get('numero'), transaccion.get('fecha')))
+            if previa is not None and previa[1] == firma and (cupo == 'informado' or transaccion.get('tipo') != 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO'): #con cupo calculado un retiro depende de los anteriores del dia, se recorren todos en orden
+                razones.append(previa[2])
+                if previa[0] != i:
+                    movidas.append(i)
+            else:
+                razones.append(None)
+                pendientes.append(i)
+        a_clasificar = [transacciones[i] for i in pendientes]
+    with perfil.etapa('validacion'):
+        if not validar_documento({**encabezado, 'transacciones': a_clasificar}, validacion, muestreo): #las transacciones con la misma firma ya se validaron en una corrida anterior
+            raise ErrorArchivo('El archivo se encuentra mal formado')
+    with perfil.etapa('clasificacion'):
+        razones_nuevas, retirado = _razones(cliente, a_clasificar, motor, cupo)
+        for i, razon in zip(pendientes, razones_nuevas):
+            razones[i] = razon
+        estado.guardar_cupos(cliente.numero, retirado)
+        cambios = sorted(pendientes + movidas)
+        estado.actualizar(cliente.numero, zip(cambios, _filas_estado([transacciones[i] for i in cambios], [firmas[i] for i in cambios], [razones[i] for i in cambios])), len(transacciones))
+    prefijo = None if fin_prefijo is None else len(texto[:fin_prefijo].encode())
+    estado.guardar_cliente(cliente.numero, ruta, prefijo, None if prefijo is None else _firma(contenido[:prefijo]), len(transacciones), contexto, json.dumps(encabezado), json.dumps(transacciones[0]) if transacciones else None)
+    return encabezado, cliente
+
+def generar_incremental(archivo, nombrar, ruta_estado, validacion='completa', muestreo=100, motor='reglas', comprimir=False, formato='html', perfil=perfil_nulo, cupo='informado', registrar=None, rango=None): #mismo informe que generar_desde_archivo, clasificando solo lo que cambio desde la corrida anterior. Con rango se clasifica igual todo lo que cambio, el estado guarda el archivo completo, y se informan solo las filas del rango
+    try:
+        with open(archivo, "rb") as f:
+            contenido = f.read()
+    except IOError:
+        raise ErrorArchivo('El archivo ingresado es inexistente')
+    ruta = os.path.abspath(archivo)
+    with EstadoIncremental(ruta_estado) as estado:
+        guardado = estado.cliente_de_archivo(ruta)
+        resultado = _agregar_nuevas(estado, guardado, archivo, ruta, contenido, validacion, muestreo, motor, cupo, perfil) if guardado else None
+        if resultado is None:
+            resultado = _procesar_completo(estado, archivo, ruta, contenido, validacion, muestreo, motor, cupo, perfil)
+        encabezado, cliente = resultado
+        info = cliente.datos_usuario()
+        filename = nombrar(encabezado)
+        filas = perfil.iterar('estado', estado.filas(cliente.numero, rango))
+        if registrar is not None: #se guardan todas las filas del informe, tambien las que no se volvieron a clasificar
+            filas = registrar(encabezado, filas)
+        estadisticas = exportar(info, filas, filename, formato, comprimir, perfil)
+    return filename, info.nombre_completo, estadisticas
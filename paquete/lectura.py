@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import time
+from functools import lru_cache
+from importlib.util import find_spec
+from itertools import chain
+from contextlib import contextmanager
+from .esquema import modos_validacion, validar_documento, validar_encabezado, validar_transaccion
+from .perfil import perfil_nulo
+
+class ErrorArchivo(Exception): #error de lectura o formato de un archivo TPS, lleva el mensaje a mostrar al usuario
+    pass
+
+#Lectura de un texto JSON ya cargado conservando la posicion de cada elemento (para el modo incremental y los archivos multicliente)
+_espacios = re.compile(r'[ \t\n\r]*')
+_separador = re.compile(r'[ \t\n\r]*(,?)[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+_scan = _decoder.scan_once
+
+def _saltar(texto, i):
+    return _espacios.match(texto, i).end()
+
+def _esperar(texto, i, caracter):
+    if texto[i:i + 1] != caracter:
+        raise json.JSONDecodeError(f'Se esperaba {caracter!r}', texto, i)
+    return i + 1
+
+def _valor(texto, i): #como raw_decode pero sin su envoltorio, se llama una vez por transaccion
+    try:
+        return _scan(texto, i)
+    except StopIteration as e:
+        raise json.JSONDecodeError('Se esperaba un valor', texto, e.value) from None
+
+def _leer_elementos(texto, i, vacio, agregar=None, leer=_valor): #lee elementos de un array desde i (justo despues del '[' si vacio, si no despues del ultimo elemento) hasta el ']'; leer(texto, i) devuelve (valor, fin) de cada elemento
+    elementos = [] #(valor, inicio, fin) de cada elemento, o se le pasan a agregar sin guardarlos
+    agregar = agregar or elementos.append
+    separador = _separador.match(texto, i)
+    if vacio:
+        if texto[separador.end():separador.end() + 1] == ']':
+            return elementos, separador.end() + 1
+        valor, fin = leer(texto, separador.end())
+        agregar((valor, separador.end(), fin))
+        separador = _separador.match(texto, fin)
+    while separador.group(1):
+        inicio = separador.end()
+        valor, fin = leer(texto, inicio)
+        agregar((valor, inicio, fin))
+        separador = _separador.match(texto, fin)
+    return elementos, _esperar(texto, separador.end(), ']')
+
+
+#Decodificador: json (siempre disponible) o msgspec, que decodifica y valida en una sola pasada (ver decodificacion).
+#Importar msgspec cuesta unos 40 ms, asi que 'auto' lo usa solo si esta instalado y el archivo es grande
+decodificadores = ('auto', 'msgspec', 'json')
+umbral_msgspec = 2 * 2**20 #bytes, por debajo json y el schema compilado terminan antes
+
+@lru_cache(maxsize=None)
+def msgspec_instalado():
+    return find_spec('msgspec') is not None
+
+def usar_msgspec(decodificador='auto', tamano=None): #tamano None: el proceso decodifica muchos documentos y el import se amortiza
+    if decodificador != 'auto':
+        return decodificador == 'msgspec'
+    return (tamano is None or tamano >= umbral_msgspec) and msgspec_instalado()
+
+def validar_tolerante(data, cuarentena): #valida el encabezado entero y cada transaccion por separado: las invalidas pasan a la cuarentena y el documento se queda con las demas
+    if not validar_encabezado(data):
+        return False
+    if 'transacciones' in data:
+        data['transacciones'] = list(cuarentena.filtrar(data['transacciones']))
+    return True
+
+def decodificar_documento(contenido, modo='completa', cada=100, rapido=False, cuarentena=None): #bytes -> (documento, valido), ValueError si no es JSON; cuarentena: None o la Cuarentena del modo tolerante
+    if rapido: #decodifica con msgspec
+        from .decodificacion import decodificar
+        data, valido = decodificar(contenido, modo, tipos=cuarentena is None) #las transacciones apartadas se guardan con todos sus campos
+        if valido is not None:
+            return data, valido
+    else:
+        data = json.loads(contenido)
+    if cuarentena is not None:
+        return data, isinstance(data, dict) and validar_tolerante(data, cuarentena)
+    return data, isinstance(data, dict) and validar_documento(data, modo, cada)
+
+def cargar_archivo(archivo, modo='completa', cada=100, perfil=perfil_nulo, decodificador='auto', cuarentena=None): #chequeo excistencia, lectura correcta y formato del archivo y devuelvo los datos; con cuarentena las transacciones invalidas se apartan en lugar de rechazar el archivo
+    valido = None
+    try:
+        with open(archivo, "rb") as f, perfil.etapa('parseo'):
+            if usar_msgspec(decodificador, os.fstat(f.fileno()).st_size):
+                from .decodificacion import decodificar
+                contenido = f.read()
+                data, valido = decodificar(contenido, modo, tipos=cuarentena is None) #los tipos y enums se chequean al decodificar; con cuarentena se lee sin tipos y las transacciones se separan una por una
+                del contenido
+            else:
+                data = json.load(f)
+    except IOError:
+        raise ErrorArchivo('El archivo ingresado es inexistente')
+    except ValueError: #JSONDecodeError, UnicodeDecodeError o error de msgspec
+        raise ErrorArchivo('El archivo ingresado no tiene contenido')
+    if valido is None:
+        with perfil.etapa('validacion'):
+            if cuarentena is None:
+                valido = validar_documento(data, modo, cada) #chequeo formateo del JSON
+            else:
+                valido = isinstance(data, dict) and validar_tolerante(data, cuarentena)
+    if not valido:
+        raise ErrorArchivo('El archivo se encuentra mal formado')
+    return data
+
+def comparar_validacion(archivo, cada=100, repeticiones=5): #mide el mejor tiempo de cada modo de validacion sobre un archivo para elegir el modo por feed
+    data = cargar_archivo(archivo, 'confiable')
+    tiempos = {}
+    for modo in modos_validacion:
+        mejor = float('inf')
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            valido = validar_documento(data, modo, cada)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        tiempos[modo] = (mejor, valido)
+    return len(data.get('transacciones', [])), tiempos
+
+def comparar_decodificadores(archivo, cada=100, repeticiones=5): #mejor tiempo de decodificar y validar el archivo con cada decodificador disponible y cada modo
+    try:
+        with open(archivo, "rb") as f:
+            contenido = f.read()
+    except IOError:
+        raise ErrorArchivo('El archivo ingresado es inexistente')
+    tiempos = {}
+    for nombre, rapido in (('json', False), ('msgspec', True)) if msgspec_instalado() else (('json', False),):
+        for modo in modos_validacion:
+            mejor = float('inf')
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                try:
+                    _, valido = decodificar_documento(contenido, modo, cada, rapido)
+                except ValueError:
+                    raise ErrorArchivo('El archivo ingresado no tiene contenido')
+                mejor = min(mejor, time.perf_counter() - inicio)
+            tiempos[nombre, modo] = (mejor, valido)
+    return tiempos
+
+
+#Lectura incremental (modo streaming): el encabezado del cliente se lee completo y las transacciones se entregan de a una
+campos_encabezado = ('numero', 'nombre', 'apellido', 'dni', 'tipo', 'direccion')
+
+class LectorIncremental: #parser JSON que mantiene en memoria solo el bloque leido y el valor que se esta decodificando
+    def __init__(self, f, tam_bloque=1 << 16):
+        self.__f = f
+        self.__tam_bloque = tam_bloque
+        self.__buffer = ''
+        self.__pos = 0
+        self.__fin = False
+        self.__decoder = json.JSONDecoder()
+
+    def __cargar(self): #descarto lo ya consumido y agrego el siguiente bloque del archivo
+        bloque = self.__f.read(self.__tam_bloque)
+        if not bloque:
+            self.__fin = True
+        self.__buffer = self.__buffer[self.__pos:] + bloque
+        self.__pos = 0
+
+    def caracter(self): #devuelve el proximo caracter que no sea espacio sin consumirlo ('' al final del archivo)
+        while True:
+            while self.__pos < len(self.__buffer) and self.__buffer[self.__pos] in ' \t\n\r':
+                self.__pos += 1
+            if self.__pos < len(self.__buffer) or self.__fin:
+                return self.__buffer[self.__pos:self.__pos + 1]
+            self.__cargar()
+
+    def consumir(self, esperado):
+        if self.caracter() != esperado:
+            raise json.JSONDecodeError(f'Se esperaba {esperado!r}', self.__buffer, self.__pos)
+        self.__pos += 1
+
+    def valor(self): #decodifica el proximo valor completo, pidiendo mas bloques si quedo cortado
+        self.caracter()
+        while True:
+            try:
+                obj, fin = self.__decoder.raw_decode(self.__buffer, self.__pos)
+                if fin < len(self.__buffer) or self.__fin: #un numero al final del bloque puede seguir en el proximo
+                    self.__pos = fin
+                    return obj
+            except json.JSONDecodeError:
+                if self.__fin:
+                    raise
+            self.__cargar()
+
+    def elementos(self): #recorre un array devolviendo sus elementos de a uno
+        self.consumir('[')
+        if self.caracter() == ']':
+            self.__pos += 1
+            return
+        while True:
+            yield self.valor()
+            if self.caracter() == ',':
+                self.__pos += 1
+            else:
+                self.consumir(']')
+                return
+
+def leer_json_incremental(f): #devuelve el encabezado del cliente y un iterador sobre sus transacciones
+    lector = LectorIncremental(f)
+    lector.consumir('{')
+    encabezado = {}
+    if lector.caracter() == '}':
+        return encabezado, iter(())
+    while True:
+        clave = lector.valor()
+        lector.consumir(':')
+        if clave == 'transacciones':
+            if not all(campo in encabezado for campo in campos_encabezado):
+                raise ErrorArchivo('En modo streaming los datos del cliente deben estar antes de las transacciones')
+            return encabezado, _resto_transacciones(lector)
+        encabezado[clave] = lector.valor()
+        if lector.caracter() == ',':
+            lector.consumir(',')
+        else:
+            lector.consumir('}')
+            return encabezado, iter(())
+
+def _resto_transacciones(lector): #entrega las transacciones y al final verifica que el resto del documento este bien formado
+    yield from lector.elementos()
+    while lector.caracter() == ',':
+        lector.consumir(',')
+        lector.valor()
+        lector.consumir(':')
+        lector.valor()
+    lector.consumir('}')
+
+def leer_ndjson(f): #NDJSON: la primera linea es el cliente y cada linea siguiente es una transaccion
+    primera = f.readline()
+    if not primera.strip():
+        raise json.JSONDecodeError('Archivo vacio', primera, 0)
+    encabezado = json.loads(primera)
+    encabezado.pop('transacciones', None)
+    return encabezado, (json.loads(linea) for linea in f if linea.strip())
+
+def validar_transacciones(transacciones, modo='completa', cada=100): #valida las transacciones a medida que se leen segun el modo de validacion
+    paso = cada if modo == 'muestreo' else 1
+    try:
+        for i, transaccion in enumerate(transacciones):
+            if modo != 'confiable' and i % paso == 0 and not validar_transaccion(transaccion):
+                raise ErrorArchivo('El archivo se encuentra mal formado')
+            yield transaccion
+    except json.JSONDecodeError:
+        raise ErrorArchivo('El archivo se encuentra mal formado')
+
+@contextmanager
+def abrir_streaming(archivo, modo='completa', cada=100, perfil=perfil_nulo, cuarentena=None): #devuelve los datos del cliente (con solo la primera transaccion) y el iterador de todas sus transacciones
+    try:
+        f = open(archivo, "r")
+    except IOError:
+        raise ErrorArchivo('El archivo ingresado es inexistente')
+    with f:
+        try:
+            with perfil.etapa('parseo'):
+                if archivo.endswith(('.ndjson', '.jsonl')):
+                    encabezado, transacciones = leer_ndjson(f)
+                else:
+                    encabezado, transacciones = leer_json_incremental(f)
+        except json.JSONDecodeError:
+            raise ErrorArchivo('El archivo ingresado no tiene contenido')
+        with perfil.etapa('validacion'):
+            if modo != 'confiable' and not validar_encabezado(encabezado):
+                raise ErrorArchivo('El archivo se encuentra mal formado')
+        transacciones = perfil.iterar('parseo', transacciones)
+        if cuarentena is not None: #las invalidas se apartan al leerlas
+            transacciones, modo = cuarentena.filtrar(transacciones), 'confiable'
+        transacciones = perfil.iterar('validacion', validar_transacciones(transacciones, modo, cada)) #el parseo de cada transaccion ocurre dentro de su validacion, el perfil lo descuenta
+        primera = next(transacciones, None) #crear_cliente toma los totales de chequeras y tarjetas de la primera transaccion
+        if primera is None:
+            yield {**encabezado, 'transacciones': []}, iter(())
+        else:
+            yield {**encabezado, 'transacciones': [primera]}, chain([primera], transacciones)
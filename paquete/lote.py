@@ -0,0 +1,64 @@
+import os
+import glob
+from collections import Counter
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from .estadisticas import Estadisticas
+from .lectura import ErrorArchivo
+from .metricas import Metricas
+from .reporte import generar_desde_archivo
+from .salida import extensiones, obtener_template
+
+#Procesamiento por lotes
+def listar_archivos(entrada): #la entrada del lote puede ser un directorio, un patron glob o un manifiesto con una ruta por linea
+    if os.path.isdir(entrada):
+        return sorted(glob.glob(os.path.join(entrada, '*.json')))
+    if glob.has_magic(entrada):
+        return sorted(glob.glob(entrada))
+    base = os.path.dirname(entrada)
+    with open(entrada, "r") as manifiesto:
+        lineas = [linea.strip() for linea in manifiesto]
+    return [os.path.join(base, linea) for linea in lineas if linea and not linea.startswith('#')]
+
+def origen_archivo(archivo): #nombre del archivo sin carpeta ni extension
+    return os.path.splitext(os.path.basename(archivo))[0]
+
+def origenes_lote(archivos): #origen de cada archivo para nombrar su informe, con la posicion en el lote si el nombre se repite (el mismo nombre en distintas carpetas o con otra extension)
+    origenes = [origen_archivo(archivo) for archivo in archivos]
+    repetidos = Counter(origenes)
+    return [origen if repetidos[origen] == 1 else f'{origen}_{posicion}' for posicion, origen in enumerate(origenes)]
+
+def nombre_informe(data, origen, carpeta, comprimir=False, formato='html'): #un informe por cliente, nombrado por numero de cliente y archivo de origen para que los procesos no se pisen
+    return os.path.join(carpeta, f"rps_{data['numero']}_{origen}.{extensiones[formato]}{'.gz' if comprimir else ''}")
+
+def procesar_archivo(archivo, carpeta, origen=None, medir=False, **opciones): #procesa un archivo del lote y devuelve (archivo, informe, error, estadisticas, metricas) sin cortar la ejecucion del resto; origen: None o el de origenes_lote; con medir, las Metricas del archivo para sumarlas en el proceso principal
+    metricas = Metricas() if medir else None
+    origen = origen_archivo(archivo) if origen is None else origen
+    try:
+        filename, _, estadisticas = generar_desde_archivo(archivo, lambda data: nombre_informe(data, origen, carpeta, opciones.get('comprimir', False), opciones.get('formato', 'html')), metricas=metricas, **opciones)
+        return archivo, filename, None, estadisticas, metricas
+    except ErrorArchivo as e:
+        return archivo, None, str(e), None, metricas
+    except Exception as e:
+        return archivo, None, f'{type(e).__name__}: {e}', None, metricas
+
+def _procesar_en_lote(archivo, origen, carpeta, **opciones): #pool.map pasa el archivo y su origen
+    return procesar_archivo(archivo, carpeta, origen, **opciones)
+
+def procesar_lote(entrada, carpeta, procesos=None, metricas=None, **opciones): #metricas: None o las Metricas donde se suman las de cada archivo
+    archivos = listar_archivos(entrada)
+    os.makedirs(carpeta, exist_ok=True)
+    correctos = []
+    fallidos = []
+    total = Estadisticas() #resumen global del lote, sumando los contadores que devuelve cada proceso
+    with ProcessPoolExecutor(max_workers=procesos, initializer=obtener_template) as pool:
+        chunksize = max(1, len(archivos) // ((procesos or os.cpu_count() or 1) * 4))
+        for archivo, filename, error, estadisticas, medidas in pool.map(partial(_procesar_en_lote, carpeta=carpeta, medir=metricas is not None, **opciones), archivos, origenes_lote(archivos), chunksize=chunksize):
+            if medidas is not None:
+                metricas.sumar(medidas)
+            if error is None:
+                correctos.append(filename)
+                total.sumar(estadisticas)
+            else:
+                fallidos.append((archivo, error))
+    return correctos, fallidos, total
@@ -0,0 +1,208 @@
+import os
+from bisect import bisect_left
+from .escritura import escribir_atomico
+from .razones import Razon, razones_por_tipo
+
+#Metricas del pipeline en el formato de texto de Prometheus: archivos procesados, transacciones (y por segundo), tiempo
+#propio de cada etapa (parseo, validacion, clasificacion, template, render, escritura), rechazos por subclase de Razon y
+#tamano del informe. Se registran una vez por archivo a partir de las estadisticas y de MedidorEtapas, que mide cada
+#etapa una vez (o por bloques), nunca cada transaccion, asi pueden quedar prendidas en produccion. Como Estadisticas, las
+#metricas de cada proceso se suman en el proceso principal
+buckets_segundos = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+buckets_bytes = (1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+tipo_contenido = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Histograma:
+    __slots__ = ('__limites', '__cuentas', '__suma')
+
+    def __init__(self, limites):
+        self.__limites = limites
+        self.__cuentas = [0] * (len(limites) + 1) #la ultima es +Inf
+        self.__suma = 0.0
+
+    @property
+    def limites(self):
+        return self.__limites
+
+    @property
+    def cuentas(self):
+        return self.__cuentas
+
+    @property
+    def suma(self):
+        return self.__suma
+
+    @property
+    def cantidad(self):
+        return sum(self.__cuentas)
+
+    def observar(self, valor):
+        self.__cuentas[bisect_left(self.__limites, valor)] += 1
+        self.__suma += valor
+
+    def sumar(self, otro):
+        self.__cuentas = [a + b for a, b in zip(self.__cuentas, otro.cuentas)]
+        self.__suma += otro.suma
+        return self
+
+    def lineas(self, nombre, etiquetas=''): #buckets acumulados, suma y cantidad
+        separador = ',' if etiquetas else ''
+        acumulado = 0
+        for limite, cuenta in zip((*self.__limites, '+Inf'), self.__cuentas):
+            acumulado += cuenta
+            yield f'{nombre}_bucket{{{etiquetas}{separador}le="{limite}"}} {acumulado}'
+        yield f'{nombre}_sum{_llaves(etiquetas)} {_numero(self.__suma)}'
+        yield f'{nombre}_count{_llaves(etiquetas)} {acumulado}'
+
+def _llaves(etiquetas):
+    return f'{{{etiquetas}}}' if etiquetas else ''
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def _etiqueta(valor): #escapa las comillas, las barras y los saltos de linea del valor de una etiqueta
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metricas:
+    __slots__ = ('__archivos', '__transacciones', '__cuarentena', '__segundos', '__duracion', '__etapas', '__rechazos', '__tamano')
+
+    def __init__(self):
+        self.__archivos = {} #resultado (ok o error) -> cantidad
+        self.__transacciones = 0
+        self.__cuarentena = 0
+        self.__segundos = 0.0 #tiempo de los archivos correctos, para las transacciones por segundo
+        self.__duracion = Histograma(buckets_segundos)
+        self.__etapas = {} #etapa -> Histograma de su tiempo propio por archivo
+        self.__rechazos = {} #(subclase de Razon, razon) -> cantidad
+        self.__tamano = Histograma(buckets_bytes)
+
+    @property
+    def archivos(self):
+        return self.__archivos
+
+    @property
+    def transacciones(self):
+        return self.__transacciones
+
+    @property
+    def cuarentena(self):
+        return self.__cuarentena
+
+    @property
+    def segundos(self):
+        return self.__segundos
+
+    @property
+    def duracion(self):
+        return self.__duracion
+
+    @property
+    def etapas(self):
+        return self.__etapas
+
+    @property
+    def rechazos(self):
+        return self.__rechazos
+
+    @property
+    def tamano(self):
+        return self.__tamano
+
+    @property
+    def transacciones_por_segundo(self):
+        return self.__transacciones / self.__segundos if self.__segundos else 0.0
+
+    def registrar_informe(self, filename, estadisticas, segundos, etapas): #un archivo terminado: sus estadisticas, su duracion y el tiempo propio de cada etapa
+        self.__archivos['ok'] = self.__archivos.get('ok', 0) + 1
+        self.__transacciones += estadisticas.total
+        self.__cuarentena += estadisticas.cuarentena
+        self.__segundos += segundos
+        self.__duracion.observar(segundos)
+        for etapa, tiempo in etapas.items():
+            histograma = self.__etapas.get(etapa)
+            if histograma is None:
+                histograma = self.__etapas[etapa] = Histograma(buckets_segundos)
+            histograma.observar(tiempo)
+        for tipo, razones in estadisticas.rechazos.items():
+            clase = razones_por_tipo.get(tipo, Razon).__name__
+            for razon, (cantidad, _) in razones.items():
+                self.__rechazos[clase, razon] = self.__rechazos.get((clase, razon), 0) + cantidad
+        if filename != '-':
+            try:
+                self.__tamano.observar(os.path.getsize(filename))
+            except OSError:
+                pass
+
+    def registrar_error(self, segundos):
+        self.__archivos['error'] = self.__archivos.get('error', 0) + 1
+        self.__duracion.observar(segundos)
+
+    def sumar(self, otra): #combina las metricas de otro proceso en estas
+        for resultado, cantidad in otra.archivos.items():
+            self.__archivos[resultado] = self.__archivos.get(resultado, 0) + cantidad
+        self.__transacciones += otra.transacciones
+        self.__cuarentena += otra.cuarentena
+        self.__segundos += otra.segundos
+        self.__duracion.sumar(otra.duracion)
+        for etapa, histograma in otra.etapas.items():
+            if etapa in self.__etapas:
+                self.__etapas[etapa].sumar(histograma)
+            else:
+                self.__etapas[etapa] = Histograma(histograma.limites).sumar(histograma)
+        for clave, cantidad in otra.rechazos.items():
+            self.__rechazos[clave] = self.__rechazos.get(clave, 0) + cantidad
+        self.__tamano.sumar(otra.tamano)
+        return self
+
+    def texto(self, medidores=()): #formato de texto de Prometheus; medidores: (nombre, ayuda, valor) que agrega quien corre el pipeline, por ejemplo la cola del vigilante
+        lineas = []
+        def metrica(nombre, tipo, ayuda):
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+        metrica('tps_archivos_total', 'counter', 'Archivos TPS procesados por resultado')
+        for resultado in ('ok', 'error'):
+            lineas.append(f'tps_archivos_total{{resultado="{resultado}"}} {self.__archivos.get(resultado, 0)}')
+        metrica('tps_transacciones_total', 'counter', 'Transacciones clasificadas e informadas')
+        lineas.append(f'tps_transacciones_total {self.__transacciones}')
+        metrica('tps_transacciones_cuarentena_total', 'counter', 'Transacciones apartadas en cuarentena')
+        lineas.append(f'tps_transacciones_cuarentena_total {self.__cuarentena}')
+        metrica('tps_transacciones_por_segundo', 'gauge', 'Transacciones por segundo de procesamiento de los archivos correctos')
+        lineas.append(f'tps_transacciones_por_segundo {_numero(self.transacciones_por_segundo)}')
+        metrica('tps_archivo_segundos', 'histogram', 'Duracion del procesamiento de cada archivo')
+        lineas.extend(self.__duracion.lineas('tps_archivo_segundos'))
+        metrica('tps_etapa_segundos', 'histogram', 'Tiempo propio de cada etapa del pipeline por archivo')
+        for etapa in sorted(self.__etapas):
+            lineas.extend(self.__etapas[etapa].lineas('tps_etapa_segundos', f'etapa="{_etiqueta(etapa)}"'))
+        metrica('tps_rechazos_total', 'counter', 'Transacciones rechazadas por subclase de Razon y razon')
+        for (clase, razon), cantidad in sorted(self.__rechazos.items()):
+            lineas.append(f'tps_rechazos_total{{clase="{_etiqueta(clase)}",razon="{_etiqueta(razon)}"}} {cantidad}')
+        metrica('tps_informe_bytes', 'histogram', 'Tamano de cada informe escrito')
+        lineas.extend(self.__tamano.lineas('tps_informe_bytes'))
+        for nombre, ayuda, valor in medidores:
+            metrica(nombre, 'gauge', ayuda)
+            lineas.append(f'{nombre} {_numero(valor)}')
+        return '\n'.join(lineas) + '\n'
+
+    def guardar(self, filename, medidores=()): #archivo de texto para el textfile collector de node_exporter, reemplazado de forma atomica
+        escribir_atomico(filename, [self.texto(medidores)])
+
+def servir_metricas(puerto, texto): #GET /metrics en 127.0.0.1:puerto en un hilo aparte; texto() devuelve el contenido del momento. Devuelve el servidor, se detiene con shutdown()
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    class ManejadorMetricas(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                contenido, estado, tipo = b'No encontrado', 404, 'text/plain; charset=utf-8'
+            else:
+                contenido, estado, tipo = texto().encode(), 200, tipo_contenido
+            self.send_response(estado)
+            self.send_header('Content-Type', tipo)
+            self.send_header('Content-Length', str(len(contenido)))
+            self.end_headers()
+            self.wfile.write(contenido)
+
+        def log_message(self, formato, *args):
+            pass
+    servidor = ThreadingHTTPServer(('127.0.0.1', puerto), ManejadorMetricas) #solo acepta conexiones locales
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
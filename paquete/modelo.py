@@ -0,0 +1,347 @@
+from collections import namedtuple
+from .reglas import politicas, motor_razones, CupoDiario, MotorCupoCalculado
+
+#clases Cuenta, Direccion y Cliente
+class Cuenta:
+    __slots__ = ('__limite_extraccion_diario', '__limite_transferencia_recibida', '__monto', '__costo_transferencias', '__saldo_descubierto_disponible')
+
+    def __init__(self, limite_extraccion_diario, limite_transferencia_recibida, monto, costo_transferencias, saldo_descubierto_disponible):
+        self.__limite_extraccion_diario = limite_extraccion_diario #encapsulo todos los atributos con doble guión bajo
+        self.__limite_transferencia_recibida = limite_transferencia_recibida
+        self.__monto = monto
+        self.__costo_transferencias = costo_transferencias
+        self.__saldo_descubierto_disponible = saldo_descubierto_disponible
+
+    #Métodos get con el decorador property para acceder a los atributos encapsulados
+    @property
+    def limite_extraccion(self):
+        return self.__limite_extraccion_diario
+
+    @property
+    def limite_transferencia(self):
+        return self.__limite_transferencia_recibida
+
+    @property
+    def monto(self):
+        return self.__monto
+
+    @property
+    def costo_transferencias(self):
+        return self.__costo_transferencias
+
+    @property
+    def saldo_disponible(self):
+        return self.__saldo_descubierto_disponible
+    
+    #setters para modificar los valores encapsulados
+    @limite_extraccion.setter
+    def limite_extraccion(self,nuevoValor):
+        self.__limite_extraccion_diario = nuevoValor
+    
+    @limite_transferencia.setter
+    def limite_transferencia(self,nuevoValor):
+        self.__limite_transferencia_recibida = nuevoValor
+
+    @monto.setter
+    def monto(self,nuevoValor):
+        self.__monto = nuevoValor
+
+    @saldo_disponible.setter
+    def saldo_disponible(self,nuevoValor):
+        self.__saldo_descubierto_disponible = nuevoValor
+
+    @costo_transferencias.setter
+    def costo_transferencias(self,nuevoValor):
+        self.__costo_transferencias = nuevoValor
+
+class Direccion: #clase direccion dependiente de Cliente ya que se genera en su interior
+    __slots__ = ('__calle', '__numero_direccion', '__ciudad', '__provincia', '__pais')
+
+    def __init__(self, calle, numero_direccion, ciudad, provincia, pais):
+        self.__calle = calle 
+        self.__numero_direccion = numero_direccion
+        self.__ciudad = ciudad 
+        self.__provincia = provincia
+        self.__pais = pais
+
+    @property
+    def calle(self):
+        return self.__calle
+
+    @property
+    def numero_direccion(self):
+        return self.__numero_direccion
+
+    @property
+    def ciudad(self):
+        return self.__ciudad
+
+    @property
+    def provincia(self):
+        return self.__provincia
+
+    @property
+    def pais(self):
+        return self.__pais
+
+#filas compactas del reporte: tuplas con nombre en lugar de listas de diccionarios de una sola clave
+DatosUsuario = namedtuple('DatosUsuario', ('nombre_completo', 'numero', 'DNI', 'direccion'))
+FilaTransaccion = namedtuple('FilaTransaccion', ('fecha', 'tipo', 'estado', 'monto', 'razon'))
+
+class Cliente:
+    __slots__ = ('__nombre', '__apellido', '__numero', '__dni', '__tipo', '__transacciones', '__direccion', '__cuenta')
+
+    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[]):
+        self.__nombre = nombre
+        self.__apellido = apellido 
+        self.__numero = numero
+        self.__dni = dni
+        self.__tipo = tipo
+        self.__transacciones = transacciones
+        self.__direccion = Direccion(calle, numero_direccion, ciudad, provincia, pais) 
+        self.__cuenta = objCuenta
+    
+    @property
+    def nombre(self):
+        return self.__nombre
+
+    @property
+    def apellido(self):
+        return self.__apellido
+
+    @property
+    def numero(self):
+        return self.__numero
+
+    @property
+    def dni(self):
+        return self.__dni
+
+    @property
+    def tipo(self):
+        return self.__tipo
+
+    @property
+    def transacciones(self):
+        return self.__transacciones
+
+    @transacciones.setter
+    def transacciones(self, transacciones): #por ejemplo solo las de un rango de fechas; el nivel y las cantidades del cliente no cambian
+        self.__transacciones = transacciones
+
+    @property
+    def direccion(self):
+        return self.__direccion
+
+    @property
+    def cuenta(self):
+        return self.__cuenta
+
+    def motor(self, cupo='informado', retirado=None): #reglas de rechazo del cliente, las subclases Classic, Gold y Black definen cantChequeras y cantTarj; con cupo calculado el motor es propio del cliente
+        if cupo == 'calculado':
+            return MotorCupoCalculado(self.tipo, self.cantChequeras, self.cantTarj, self.cuenta.limite_extraccion, retirado)
+        return motor_razones(self.tipo, self.cantChequeras, self.cantTarj)
+
+    def motor_vectorial(self, cupo='informado', retirado=None): #el motor vectorizado (y numpy) se importa recien cuando se usa
+        from .vectorizado import MotorVectorialCupo, motor_vectorial
+        motor = motor_vectorial(self.tipo, self.cantChequeras, self.cantTarj)
+        if cupo == 'calculado':
+            return MotorVectorialCupo(motor, CupoDiario(self.cuenta.limite_extraccion, retirado))
+        return motor
+
+    def filtro(self,t): #devuelve la razon de la transaccion: vacia si se acepto, la de la regla de su tipo si se rechazo
+        return self.motor().razon(t).razon
+
+    def retorno(self, vectorizado=False, cupo='informado'): #funcion retorno, devuelve los datos del cliente y la lista de filas de sus transacciones para exportar el HTML
+        if vectorizado: #todas las razones se calculan de una vez por columnas
+            razones = self.motor_vectorial(cupo).razones_texto(self.transacciones)
+        else:
+            motor = self.motor(cupo)
+            razones = (motor.razon(transaccion).razon for transaccion in self.transacciones)
+        filas = [FilaTransaccion(transaccion['fecha'], transaccion['tipo'], transaccion['estado'], transaccion['monto'], razon) for transaccion, razon in zip(self.transacciones, razones)]
+        return self.datos_usuario(), filas
+
+    def datos_usuario(self): #datos del cliente que se exportan en el encabezado del reporte
+        return DatosUsuario(f'{self.nombre} {self.apellido}', self.numero, self.dni, f'{self.direccion.calle} {self.direccion.numero_direccion}, {self.direccion.ciudad}, {self.direccion.provincia}, {self.direccion.pais}')
+
+#Las clases Classic, Gold y Black heredan de la clase Cliente, sus limites salen de la tabla de politicas
+class Classic(Cliente):
+    __slots__ = ('__limiteChequeras', '__cantChequeras', '__limiteTarj', '__cantTarj', '__accesoDolar')
+
+    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[], cantChequeras=0, cantTarj=0): 
+        super().__init__(nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones)
+        politica = politicas['CLASSIC']
+        self.__limiteChequeras = politica['limiteChequeras']
+        self.__cantChequeras = cantChequeras
+        self.__limiteTarj = politica['limiteTarj']
+        self.__cantTarj = cantTarj
+        self.__accesoDolar = politica['accesoDolar']
+    
+    @property
+    def limiteChequeras(self):
+        return self.__limiteChequeras
+    @property
+    def cantChequeras(self):
+        return self.__cantChequeras
+    @property
+    def limiteTarj(self):
+        return self.__limiteTarj
+    @property
+    def cantTarj(self):
+        return self.__cantTarj
+    @property
+    def accesoDolar(self):
+        return self.__accesoDolar
+    @cantChequeras.setter
+    def cantChequeras(self,nuevoValor):
+        self.__cantChequeras = nuevoValor
+    @cantTarj.setter
+    def cantTarj(self,nuevoValor):
+        self.__cantTarj = nuevoValor
+
+    #funciones dependientes de la clase que utilizan los nuevos parametros asignados, inexistentes en Cliente
+    def puede_comprar_dolar(self):
+        if self.__accesoDolar == 'NO':
+            return False
+        else:
+            return True
+
+    def puede_crear_chequera(self):
+        if self.__cantChequeras < self.__limiteChequeras:
+            return True
+        else:
+            return False        
+    
+    def puede_crear_tarjeta_credito(self):
+        if self.__cantTarj < self.__limiteTarj:
+            return True
+        else:
+            return False
+
+class Gold(Cliente):
+    __slots__ = ('__limiteChequeras', '__cantChequeras', '__limiteTarj', '__cantTarj', '__accesoDolar')
+
+    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[], cantChequeras=0, cantTarj=0): 
+        super().__init__(nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones)
+        politica = politicas['GOLD']
+        self.__limiteChequeras = politica['limiteChequeras']
+        self.__cantChequeras = cantChequeras
+        self.__limiteTarj = politica['limiteTarj']
+        self.__cantTarj = cantTarj
+        self.__accesoDolar = politica['accesoDolar']
+    
+    @property
+    def limiteChequeras(self):
+        return self.__limiteChequeras
+    @property
+    def cantChequeras(self):
+        return self.__cantChequeras
+    @property
+    def limiteTarj(self):
+        return self.__limiteTarj
+    @property
+    def cantTarj(self):
+        return self.__cantTarj
+    @property
+    def accesoDolar(self):
+        return self.__accesoDolar
+    @cantChequeras.setter
+    def cantChequeras(self,nuevoValor):
+        self.__cantChequeras = nuevoValor
+    @cantTarj.setter
+    def cantTarj(self,nuevoValor):
+        self.__cantTarj = nuevoValor
+
+    #funciones dependientes de la clase que utilizan los nuevos parametros asignados, inexistentes en Cliente
+    def puede_comprar_dolar(self):
+        if self.__accesoDolar == 'NO':
+            return False
+        else:
+            return True
+
+    def puede_crear_chequera(self):
+        if self.__cantChequeras < self.__limiteChequeras:
+            return True
+        else:
+            return False        
+    
+    def puede_crear_tarjeta_credito(self):
+        if self.__cantTarj < self.__limiteTarj:
+            return True
+        else:
+            return False
+
+class Black(Cliente):
+    __slots__ = ('__limiteChequeras', '__cantChequeras', '__limiteTarj', '__cantTarj', '__accesoDolar')
+
+    def __init__(self, nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones=[], cantChequeras=0, cantTarj=0): 
+        super().__init__(nombre, apellido, numero, dni, tipo, calle, numero_direccion, ciudad, provincia, pais, objCuenta, transacciones)
+        politica = politicas['BLACK']
+        self.__limiteChequeras = politica['limiteChequeras']
+        self.__cantChequeras = cantChequeras
+        self.__limiteTarj = politica['limiteTarj']
+        self.__cantTarj = cantTarj
+        self.__accesoDolar = politica['accesoDolar']
+    
+    @property
+    def limiteChequeras(self):
+        return self.__limiteChequeras
+    @property
+    def cantChequeras(self):
+        return self.__cantChequeras
+    @property
+    def limiteTarj(self):
+        return self.__limiteTarj
+    @property
+    def cantTarj(self):
+        return self.__cantTarj
+    @property
+    def accesoDolar(self):
+        return self.__accesoDolar
+
+    #funciones dependientes de la clase que utilizan los nuevos parametros asignados, inexistentes en Cliente
+    def puede_comprar_dolar(self):
+        if self.__accesoDolar == 'NO':
+            return False
+        else:
+            return True
+
+    def puede_crear_chequera(self):
+        if self.__cantChequeras < self.__limiteChequeras:
+            return True
+        else:
+            return False        
+    
+    def puede_crear_tarjeta_credito(self):
+        if self.__cantTarj < self.__limiteTarj:
+            return True
+        else:
+            return False
+
+
+#Ejecucion:
+clases_cliente = {'CLASSIC': Classic, 'GOLD': Gold, 'BLACK': Black}
+
+def crear_cliente(data): #creo objeto cuenta y cliente y devuelvo la clase que hereda de cliente segun el tipo de cliente
+    cuenta1 = Cuenta(0,0,0,0,0)
+    cl = Cliente(data['nombre'],data['apellido'],data['numero'],data['dni'],data['tipo'],data['direccion']['calle'],data['direccion']['numero'],data['direccion']['ciudad'],data['direccion']['provincia'],data['direccion']['pais'],cuenta1,data['transacciones'])
+    #creo la clase que hereda de cliente segun el tipo de cliente
+    clase = clases_cliente[cl.tipo]
+    if not cl.transacciones == []: #permito el funcionamiento de un JSON con usuario sin transacciones filtrando la asignacion de variables
+        cliente = clase(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta,cl.transacciones,data['transacciones'][0]['totalChequerasActualmente'],data['transacciones'][0]['totalTarjetasDeCreditoActualmente'])
+    else:
+        cliente = clase(cl.nombre,cl.apellido,cl.numero,cl.dni,cl.tipo,cl.direccion.calle,cl.direccion.numero_direccion,cl.direccion.ciudad,cl.direccion.provincia,cl.direccion.pais,cl.cuenta)
+    # asigno por setters las variables correspondientes a cada categoria segun la tabla de politicas
+    politica = politicas[cl.tipo]
+    cliente.cuenta.limite_extraccion = politica['limite_extraccion']
+    cliente.cuenta.limite_transferencia = politica['limite_transferencia']
+    if not cliente.transacciones == []:
+        cliente.cuenta.monto = data['transacciones'][0]['monto']
+    cliente.cuenta.saldo_disponible = politica['saldo_disponible']
+    cliente.cuenta.costo_transferencias = politica['costo_transferencias']
+    return cliente
+
+#ejemplos para llamar a los valores:
+# cliente.retorno()[0] -->  DatosUsuario(nombre_completo='Nicolas Gaston', numero=100001, DNI='29494777', direccion='Rivadavia 7900, Capital Federal, Buenos Aires, Argentina')
+# cliente.retorno()[0].nombre_completo -->  Nicolas Gaston
+# cliente.retorno()[1][0] -->  FilaTransaccion(fecha='10/06/2022 16:00:55', tipo='RETIRO_EFECTIVO_CAJERO_AUTOMATICO', estado='ACEPTADA', monto=1000, razon='')
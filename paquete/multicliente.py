@@ -0,0 +1,181 @@
+import os
+import re
+import json
+import time
+import heapq
+from collections import Counter, namedtuple
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from .cuarentena import Cuarentena
+from .escritura import escribir_atomico
+from .estadisticas import Estadisticas
+from .lectura import ErrorArchivo, _esperar, _leer_elementos, _saltar, _separador, _valor, decodificar_documento, usar_msgspec
+from .metricas import Metricas
+from .perfil import MedidorEtapas, perfil_nulo
+from .reporte import generar_informe
+from .salida import extensiones, obtener_template
+
+#Archivos multicliente: un array JSON de documentos de cliente o un NDJSON con un cliente por linea. El proceso principal
+#ubica cada cliente en el archivo (bytes de inicio y fin y cantidad de transacciones) sin decodificar sus transacciones,
+#los reparte en un fragmento por proceso equilibrando la cantidad de transacciones, y cada proceso lee del archivo solo
+#sus clientes y escribe sus informes. Los nombres, el indice y el resumen salen del orden del archivo, asi el resultado no depende de la
+#cantidad de procesos ni del orden en que terminan
+UbicacionCliente = namedtuple('UbicacionCliente', ('posicion', 'inicio', 'fin', 'numero', 'transacciones'))
+ResultadoCliente = namedtuple('ResultadoCliente', ('posicion', 'numero', 'informe', 'nombre', 'error', 'estadisticas'))
+
+def _saltar_transacciones(texto, i): #(cantidad, fin) del array de transacciones en i sin construirlo
+    fin = texto.find(']', i)
+    if texto[i:i + 1] == '[' and fin != -1 and texto.find('[', i + 1, fin) == -1 and texto.find('\\', i, fin) == -1 and texto.count('"', i, fin) % 2 == 0:
+        return texto.count('{', i, fin), fin + 1 #sin escapes ni arrays adentro, el primer ']' fuera de un string cierra el array y cada '{' abre una transaccion
+    transacciones, fin = _valor(texto, i) #transacciones anidadas o con escapes: se decodifican como antes
+    return len(transacciones) if isinstance(transacciones, list) else 0, fin
+
+def _datos_cliente(texto, i): #((numero, cantidad de transacciones), fin) del cliente en i, solo para nombrar y repartir; el encabezado se decodifica y las transacciones solo se cuentan
+    if texto[i:i + 1] != '{':
+        return (None, 0), _valor(texto, i)[1]
+    numero, cantidad = None, 0
+    i = _saltar(texto, i + 1)
+    while texto[i:i + 1] == '"':
+        clave, i = _valor(texto, i)
+        i = _saltar(texto, _esperar(texto, _saltar(texto, i), ':'))
+        if clave == 'transacciones':
+            cantidad, i = _saltar_transacciones(texto, i)
+        else:
+            valor, i = _valor(texto, i)
+            if clave == 'numero':
+                numero = valor if isinstance(valor, int) and not isinstance(valor, bool) else None
+        separador = _separador.match(texto, i)
+        i = separador.end()
+        if not separador.group(1):
+            break
+    return (numero, cantidad), _esperar(texto, i, '}')
+
+def ubicar_json(contenido): #array JSON de clientes; las posiciones se pasan a bytes para que cada proceso lea solo sus clientes
+    texto = contenido.decode()
+    ascii = len(texto) == len(contenido)
+    clientes = []
+    bytes_leidos = [0, 0] #posicion en el texto y en bytes del final del ultimo cliente, para convertir sin recorrer desde el principio
+    def agregar(elemento):
+        valor, inicio, fin = elemento
+        if ascii:
+            inicio_bytes, fin_bytes = inicio, fin
+        else:
+            inicio_bytes = bytes_leidos[1] + len(texto[bytes_leidos[0]:inicio].encode())
+            fin_bytes = inicio_bytes + len(texto[inicio:fin].encode())
+            bytes_leidos[:] = fin, fin_bytes
+        clientes.append(UbicacionCliente(len(clientes), inicio_bytes, fin_bytes, *valor))
+    _, i = _leer_elementos(texto, _esperar(texto, _saltar(texto, 0), '['), True, agregar, _datos_cliente)
+    if _saltar(texto, i) != len(texto):
+        raise json.JSONDecodeError('Datos despues del array de clientes', texto, i)
+    return clientes
+
+def ubicar_ndjson(contenido): #un cliente por linea; una linea ilegible queda como un cliente con error
+    clientes = []
+    for linea in re.finditer(rb'[^\n]+', contenido):
+        if not linea.group().strip():
+            continue
+        try:
+            texto = linea.group().decode()
+            datos, fin = _datos_cliente(texto, _saltar(texto, 0))
+            if _saltar(texto, fin) != len(texto):
+                datos = None, 0
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            datos = None, 0
+        clientes.append(UbicacionCliente(len(clientes), linea.start(), linea.end(), *datos))
+    return clientes
+
+def repartir(clientes, fragmentos): #de mayor a menor cantidad de transacciones, cada cliente va al fragmento con menos transacciones (los empates por orden), siempre igual para la misma entrada
+    cargas = [(0, i) for i in range(fragmentos)]
+    repartidos = [[] for _ in range(fragmentos)]
+    for cliente in sorted(clientes, key=lambda cliente: (-cliente.transacciones, cliente.posicion)):
+        carga, i = heapq.heappop(cargas)
+        repartidos[i].append(cliente)
+        heapq.heappush(cargas, (carga + max(1, cliente.transacciones), i)) #un cliente sin transacciones igual escribe su informe
+    return [sorted(fragmento) for fragmento in repartidos if fragmento]
+
+def nombres_informes(clientes, formato='html', comprimir=False): #rps_<numero>, o con la posicion si el numero falta o se repite
+    repetidos = Counter(cliente.numero for cliente in clientes)
+    extension = f"{extensiones[formato]}{'.gz' if comprimir else ''}"
+    return [f'rps_{cliente.numero}.{extension}' if cliente.numero is not None and repetidos[cliente.numero] == 1 else f"rps_{'cliente' if cliente.numero is None else cliente.numero}_{cliente.posicion}.{extension}" for cliente in clientes]
+
+def procesar_fragmento(archivo, fragmento, nombres, carpeta, validacion='completa', muestreo=100, motor='reglas', cupo='informado', comprimir=False, formato='html', decodificador='auto', analitica=None, rango=None, cuarentena=False, medir=False): #corre en un proceso del pool: lee sus clientes del archivo, escribe sus informes y devuelve (resultados, metricas); con medir, las Metricas del fragmento
+    resultados = []
+    metricas = Metricas() if medir else None
+    rapido = usar_msgspec(decodificador) #cada proceso decodifica muchos clientes, el import de msgspec se amortiza
+    almacen = None
+    if analitica is not None: #una conexion por proceso para todos sus clientes
+        from .analitica import AlmacenAnalitico
+        almacen = AlmacenAnalitico(analitica)
+    ruta = os.path.abspath(archivo)
+    with open(archivo, "rb") as f, almacen or nullcontext():
+        for cliente, nombre in zip(fragmento, nombres):
+            apartadas = Cuarentena(cupo) if cuarentena else None #las transacciones invalidas de cada cliente van al lado de su informe
+            medidor = MedidorEtapas() if medir else perfil_nulo
+            inicio = time.perf_counter()
+            try:
+                f.seek(cliente.inicio)
+                try:
+                    with medidor.etapa('parseo'): #decodifica y valida
+                        data, valido = decodificar_documento(f.read(cliente.fin - cliente.inicio), validacion, muestreo, rapido, apartadas)
+                except ValueError:
+                    raise ErrorArchivo('El cliente no tiene contenido')
+                if not valido:
+                    raise ErrorArchivo('El cliente se encuentra mal formado')
+                filename = os.path.join(carpeta, nombre)
+                registrar = almacen and almacen.registrador(f'{ruta}#{cliente.posicion}') #cada cliente del archivo es un informe aparte
+                nombre_cliente, estadisticas = generar_informe(data, filename, motor, comprimir, formato, medidor, cupo, registrar, rango)
+                if apartadas is not None:
+                    apartadas.guardar(filename, f'{ruta}#{cliente.posicion}')
+                    estadisticas.cuarentena = len(apartadas)
+                resultados.append(ResultadoCliente(cliente.posicion, cliente.numero, filename, nombre_cliente, None, estadisticas))
+            except ErrorArchivo as e:
+                resultados.append(ResultadoCliente(cliente.posicion, cliente.numero, None, None, str(e), None))
+            except Exception as e:
+                resultados.append(ResultadoCliente(cliente.posicion, cliente.numero, None, None, f'{type(e).__name__}: {e}', None))
+            if metricas is not None:
+                resultado = resultados[-1]
+                if resultado.error is None:
+                    metricas.registrar_informe(resultado.informe, resultado.estadisticas, time.perf_counter() - inicio, medidor.segundos_propios())
+                else:
+                    metricas.registrar_error(time.perf_counter() - inicio)
+    return resultados, metricas
+
+def escribir_indice(filename, origen, resultados, total): #pagina HTML con un enlace a cada informe y los totales de cada cliente, en el orden del archivo
+    carpeta = os.path.dirname(filename)
+    clientes = [{**resultado._asdict(), 'enlace': resultado.informe and os.path.relpath(resultado.informe, carpeta)} for resultado in resultados]
+    partes = obtener_template("indice.html").generate(origen=origen, clientes=clientes, total=total, errores=sum(1 for resultado in resultados if resultado.error))
+    escribir_atomico(filename, partes)
+
+def procesar_multicliente(archivo, carpeta, procesos=None, validacion='completa', muestreo=100, motor='reglas', cupo='informado', comprimir=False, formato='html', decodificador='auto', analitica=None, rango=None, cuarentena=False, metricas=None): #metricas: None o las Metricas donde se suman las de cada cliente; devuelve (informes, [(posicion, numero, error)], estadisticas totales, indice)
+    try:
+        with open(archivo, "rb") as f:
+            contenido = f.read()
+    except IOError:
+        raise ErrorArchivo('El archivo ingresado es inexistente')
+    try:
+        clientes = ubicar_ndjson(contenido) if archivo.endswith(('.ndjson', '.jsonl')) else ubicar_json(contenido)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ErrorArchivo('El archivo ingresado no tiene contenido')
+    del contenido
+    os.makedirs(carpeta, exist_ok=True)
+    nombres = nombres_informes(clientes, formato, comprimir)
+    fragmentos = repartir(clientes, procesos or os.cpu_count() or 1)
+    resultados = [None] * len(clientes)
+    opciones = {'validacion': validacion, 'muestreo': muestreo, 'motor': motor, 'cupo': cupo, 'comprimir': comprimir, 'formato': formato, 'decodificador': decodificador, 'analitica': analitica, 'rango': rango, 'cuarentena': cuarentena}
+    with ProcessPoolExecutor(max_workers=len(fragmentos) or 1, initializer=obtener_template) as pool:
+        tareas = [pool.submit(procesar_fragmento, archivo, fragmento, [nombres[cliente.posicion] for cliente in fragmento], carpeta, medir=metricas is not None, **opciones) for fragmento in fragmentos]
+        for tarea in tareas:
+            devueltos, medidas = tarea.result()
+            for resultado in devueltos:
+                resultados[resultado.posicion] = resultado
+            if medidas is not None:
+                metricas.sumar(medidas)
+    total = Estadisticas() #se suma en el orden del archivo
+    for resultado in resultados:
+        if resultado.error is None:
+            total.sumar(resultado.estadisticas)
+    indice = os.path.join(carpeta, 'indice.html')
+    escribir_indice(indice, os.path.basename(archivo), resultados, total)
+    correctos = [resultado.informe for resultado in resultados if resultado.error is None]
+    fallidos = [(resultado.posicion, resultado.numero, resultado.error) for resultado in resultados if resultado.error is not None]
+    return correctos, fallidos, total, indice
@@ -0,0 +1,157 @@
+import os
+import re
+import json
+import mmap
+import codecs
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from .esquema import validar_encabezado, validar_transaccion
+from .lectura import ErrorArchivo, _esperar, _saltar, _separador, _valor, usar_msgspec
+from .modelo import FilaTransaccion, crear_cliente
+from .perfil import perfil_nulo
+from .salida import exportar
+
+#Lectura en paralelo de un cliente con muchas transacciones: el proceso principal mapea el archivo en memoria, lee el
+#encabezado y la primera transaccion, y corta el array de transacciones en fragmentos en los '},{' mas cercanos a cortes
+#parejos. Cada proceso mapea el mismo archivo (las paginas se comparten, no se copia el archivo a cada proceso), decodifica
+#solo su fragmento (con json o msgspec), lo valida y lo clasifica, y devuelve las filas por columnas, que cuestan diez veces
+#menos de pasar entre procesos que las FilaTransaccion. Un corte puede caer adentro de un string o de un valor anidado: el
+#fragmento anterior lo detecta porque deja de ser JSON valido, y en ese caso (o si el documento no termina con el array de
+#transacciones) se devuelve None y se lee el archivo entero como siempre
+_frontera = re.compile(rb'\}[ \t\n\r]*,[ \t\n\r]*\{')
+_cierre = re.compile(rb'\][ \t\n\r]*\}[ \t\n\r]*\Z')
+minimo_fragmento = 2**20 #bytes, con fragmentos mas chicos repartir cuesta mas que parsear
+maximo_prefijo = 2**26 #bytes que se leen como mucho buscando el comienzo de las transacciones
+campos_retiro = ('tipo', 'estado', 'monto', 'saldoEnCuenta', 'cuentaNumero', 'fecha')
+
+def _leer_encabezado(texto): #(encabezado, primera transaccion, byte del primer elemento) o None si el documento no tiene la forma esperada
+    i = _saltar(texto, _esperar(texto, _saltar(texto, 0), '{'))
+    encabezado = {}
+    while texto[i:i + 1] == '"':
+        clave, i = _valor(texto, i)
+        i = _saltar(texto, _esperar(texto, _saltar(texto, i), ':'))
+        if clave == 'transacciones':
+            if texto[i:i + 1] != '[':
+                return None
+            inicio = _saltar(texto, i + 1)
+            if texto[inicio:inicio + 1] == ']': #sin transacciones no hay nada que repartir
+                return None
+            primera, _ = _valor(texto, inicio)
+            return encabezado, primera, len(texto[:inicio].encode())
+        encabezado[clave], i = _valor(texto, i)
+        separador = _separador.match(texto, i)
+        if not separador.group(1):
+            return None
+        i = separador.end()
+    return None
+
+def leer_prefijo(mapa, tamano=2**16): #lee solo el principio del archivo, agrandandolo hasta que entren el encabezado y la primera transaccion
+    while True:
+        final = tamano >= len(mapa)
+        try:
+            return _leer_encabezado(codecs.getincrementaldecoder('utf-8')().decode(mapa[:tamano], final)) #el decodificador incremental no corta un caracter a la mitad
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            if final or tamano >= maximo_prefijo:
+                return None
+            tamano *= 4
+
+def fin_transacciones(mapa): #byte del ']' que cierra las transacciones si el documento termina con ese array, si no None
+    cola = mapa[-4096:]
+    cierre = _cierre.search(cola)
+    return None if cierre is None else len(mapa) - len(cola) + cierre.start()
+
+def fronteras(mapa, inicio, fin, partes): #(inicio, fin) en bytes de cada fragmento, cada uno empieza en el '{' de una transaccion
+    cortes = [inicio]
+    for k in range(1, partes):
+        frontera = _frontera.search(mapa, max(cortes[-1], inicio + k * (fin - inicio) // partes), fin)
+        if frontera is None:
+            break
+        cortes.append(frontera.end() - 1)
+    cortes.append(fin)
+    return list(zip(cortes, cortes[1:]))
+
+def procesar_fragmento(archivo, inicio, fin, ultimo, encabezado, primera, validacion='completa', muestreo=100, motor='reglas', cupo='informado', rapido=False): #corre en un proceso del pool: devuelve (valido, columnas, retiros), o None si el fragmento no son transacciones completas
+    with open(archivo, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        fragmento = mapa[inicio:fin].rstrip(b' \t\n\r')
+    if not ultimo: #los fragmentos terminan en la coma antes del siguiente
+        if not fragmento.endswith(b','):
+            return None
+        fragmento = fragmento[:-1]
+    #un corte adentro de una transaccion deja abierto un string o al menos la transaccion y el array, asi que
+    #el fragmento entre corchetes solo es JSON valido si son transacciones completas
+    try:
+        if rapido: #con msgspec los tipos y enums se chequean al decodificar
+            from .decodificacion import decodificar
+            transacciones, valido = decodificar(b'[' + fragmento + b']', validacion, True)
+        else:
+            transacciones, valido = json.loads(b'[' + fragmento + b']'), None
+    except ValueError:
+        return None
+    if valido is None:
+        valido = validacion == 'confiable' or all(map(validar_transaccion, transacciones[::muestreo if validacion == 'muestreo' else 1]))
+    if not valido or validacion != 'confiable' and not validar_encabezado(encabezado): #cada fragmento valida tambien el encabezado antes de crear el cliente con el
+        return False, None, None
+    cliente = crear_cliente({**encabezado, 'transacciones': [primera]}) #los totales de chequeras y tarjetas salen de la primera transaccion del documento
+    if motor == 'vectorizado':
+        razones = list(cliente.motor_vectorial(cupo).razones_texto(transacciones))
+    else:
+        reglas_cliente = cliente.motor(cupo)
+        razones = [reglas_cliente.razon(transaccion).razon for transaccion in transacciones]
+    columnas = ([t['fecha'] for t in transacciones], [t['tipo'] for t in transacciones], [t['estado'] for t in transacciones], [t['monto'] for t in transacciones], razones)
+    retiros = [(i, {campo: t[campo] for campo in campos_retiro if campo in t}) for i, t in enumerate(transacciones) if t['tipo'] == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO'] if cupo == 'calculado' else None
+    return True, columnas, retiros
+
+def leer_en_paralelo(archivo, procesos=None, validacion='completa', muestreo=100, motor='reglas', cupo='informado', perfil=perfil_nulo, decodificador='auto'): #devuelve (data con solo la primera transaccion, cliente, columnas de cada fragmento) o None si hay que leer el archivo entero
+    try:
+        f = open(archivo, "rb")
+    except IOError:
+        raise ErrorArchivo('El archivo ingresado es inexistente')
+    with f:
+        tamano = os.fstat(f.fileno()).st_size
+        if tamano == 0:
+            return None
+        with perfil.etapa('parseo'), mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            prefijo, fin = leer_prefijo(mapa), fin_transacciones(mapa)
+            if prefijo is None or fin is None:
+                return None
+            encabezado, primera, inicio = prefijo
+            procesos = procesos or os.cpu_count() or 1
+            cortes = fronteras(mapa, inicio, fin, max(1, min(4 * procesos, (fin - inicio) // minimo_fragmento))) #varios fragmentos por proceso para que terminen parejos
+    rapido = usar_msgspec(decodificador, tamano)
+    resultados = []
+    with perfil.etapa('clasificacion'), ProcessPoolExecutor(max_workers=min(procesos, len(cortes))) as pool:
+        tareas = [pool.submit(procesar_fragmento, archivo, inicio, fin_fragmento, fin_fragmento == fin, encabezado, primera, validacion, muestreo, motor, cupo, rapido) for inicio, fin_fragmento in cortes]
+        for tarea in tareas: #en orden: los errores de un fragmento solo cuentan si los anteriores se leyeron completos
+            resultado = tarea.result()
+            if resultado is None: #un corte cayo adentro de una transaccion o el array esta mal formado
+                pool.shutdown(cancel_futures=True)
+                return None
+            resultados.append(resultado)
+    if not all(valido for valido, _, _ in resultados):
+        raise ErrorArchivo('El archivo se encuentra mal formado')
+    data = {**encabezado, 'transacciones': [primera]}
+    cliente = crear_cliente(data)
+    if cupo == 'calculado': #el cupo depende de los retiros aceptados de los fragmentos anteriores: los retiros se vuelven a clasificar en orden
+        with perfil.etapa('clasificacion'):
+            reglas_cliente = cliente.motor(cupo)
+            for _, columnas, retiros in resultados:
+                razones = columnas[4]
+                for i, transaccion in retiros:
+                    razones[i] = reglas_cliente.razon(transaccion).razon
+    return data, cliente, [columnas for _, columnas, _ in resultados]
+
+def filas_fragmentos(fragmentos): #las FilaTransaccion se arman recien al exportar, en el orden del archivo
+    return chain.from_iterable(map(FilaTransaccion, *columnas) for columnas in fragmentos)
+
+def generar_paralelo(archivo, nombrar, procesos=None, validacion='completa', muestreo=100, motor='reglas', comprimir=False, formato='html', perfil=perfil_nulo, cupo='informado', decodificador='auto', registrar=None): #devuelve (informe, nombre, estadisticas) o None si hay que leer el archivo entero
+    leido = leer_en_paralelo(archivo, procesos, validacion, muestreo, motor, cupo, perfil, decodificador)
+    if leido is None:
+        return None
+    data, cliente, fragmentos = leido
+    filename = nombrar(data)
+    info = cliente.datos_usuario()
+    filas = filas_fragmentos(fragmentos)
+    if registrar is not None:
+        filas = registrar(data, filas)
+    estadisticas = exportar(info, filas, filename, formato, comprimir, perfil)
+    return filename, info.nombre_completo, estadisticas
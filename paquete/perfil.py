@@ -0,0 +1,173 @@
+import sys
+import json
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+from contextlib import contextmanager, nullcontext
+from .escritura import escribir_atomico
+
+#Perfil del pipeline por etapas: tiempo real, tiempo de CPU y bloques de memoria reservados (y bytes con tracemalloc).
+#Las etapas se anidan segun quien llama a quien (el render pide filas, las filas piden transacciones al lector), asi que
+#cada etapa guarda su total y su tiempo propio descontando las etapas que corrieron adentro. Sin perfil se usa perfil_nulo,
+#que no mide nada: el costo apagado es una llamada por etapa, nunca por transaccion. MedidorEtapas mide solo el tiempo real
+#propio de cada etapa, para las metricas que quedan prendidas en produccion (ver metricas)
+_nada = nullcontext()
+
+class PerfilNulo:
+    activo = False
+    por_tipo = False
+
+    def etapa(self, nombre):
+        return _nada
+
+    def iterar(self, nombre, iterador, bloque=256):
+        return iterador
+
+perfil_nulo = PerfilNulo()
+
+class MedicionEtapas(ABC): #etapas y bloques comunes a Perfil y MedidorEtapas, que definen que se lee al entrar y al salir de cada etapa
+    activo = True
+
+    @abstractmethod
+    def _entrar(self):
+        pass
+
+    @abstractmethod
+    def _salir(self, nombre):
+        pass
+
+    @contextmanager
+    def etapa(self, nombre):
+        self._entrar()
+        try:
+            yield
+        finally:
+            self._salir(nombre)
+
+    def iterar(self, nombre, iterador, bloque=256): #mide la etapa al pedir cada bloque de elementos, asi medir no cuesta lo mismo que procesar una transaccion
+        iterador = iter(iterador)
+        while True:
+            self._entrar()
+            try:
+                elementos = list(islice(iterador, bloque))
+            finally:
+                self._salir(nombre)
+            if not elementos:
+                return
+            yield from elementos
+
+class MedidorEtapas(MedicionEtapas):
+    por_tipo = False #no mide cada transaccion
+
+    def __init__(self):
+        self.__segundos = {} #nombre -> segundos propios
+        self.__pila = [] #por cada etapa abierta: [inicio, segundos de las etapas hijas]
+
+    def _entrar(self):
+        self.__pila.append([time.perf_counter(), 0.0])
+
+    def _salir(self, nombre):
+        inicio, hijos = self.__pila.pop()
+        consumo = time.perf_counter() - inicio
+        self.__segundos[nombre] = self.__segundos.get(nombre, 0.0) + consumo - hijos
+        if self.__pila:
+            self.__pila[-1][1] += consumo
+
+    def activar(self):
+        return _nada
+
+    def segundos_propios(self):
+        return dict(self.__segundos)
+
+class Perfil(MedicionEtapas):
+    por_tipo = True
+
+    def __init__(self, cprofile=False, tracemalloc=False):
+        self.__cprofile = cprofile
+        self.__tracemalloc = tracemalloc
+        self.__lecturas = (time.perf_counter, time.process_time, sys.getallocatedblocks) + ((self.__bytes_reservados,) if tracemalloc else ())
+        self.__etapas = {} #nombre -> [llamadas, totales..., propios...]
+        self.__pila = [] #por cada etapa abierta: valores al entrar y lo que consumieron las etapas hijas
+        self.__tipos = {} #tipo de transaccion -> [cantidad, segundos]
+        self.__perfilador = None
+        self.__memoria = None
+
+    @staticmethod
+    def __bytes_reservados():
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[0]
+
+    def _entrar(self):
+        self.__pila.append(([leer() for leer in self.__lecturas], [0] * len(self.__lecturas)))
+
+    def _salir(self, nombre):
+        inicio, hijos = self.__pila.pop()
+        consumo = [leer() - valor for leer, valor in zip(self.__lecturas, inicio)]
+        n = len(consumo)
+        acumulado = self.__etapas.setdefault(nombre, [0] + [0] * (2 * n))
+        acumulado[0] += 1
+        for i in range(n):
+            acumulado[1 + i] += consumo[i]
+            acumulado[1 + n + i] += consumo[i] - hijos[i]
+        if self.__pila:
+            padre = self.__pila[-1][1]
+            for i in range(n):
+                padre[i] += consumo[i]
+
+    def sumar_tipo(self, tipo, segundos): #costo de clasificacion de una transaccion de ese tipo
+        acumulado = self.__tipos.get(tipo)
+        if acumulado is None:
+            acumulado = self.__tipos[tipo] = [0, 0.0]
+        acumulado[0] += 1
+        acumulado[1] += segundos
+
+    @contextmanager
+    def activar(self): #mide la corrida completa como etapa 'total' y opcionalmente la envuelve en cProfile y tracemalloc
+        if self.__tracemalloc:
+            import tracemalloc
+            tracemalloc.start()
+        if self.__cprofile:
+            import cProfile
+            self.__perfilador = cProfile.Profile()
+            self.__perfilador.enable()
+        try:
+            with self.etapa('total'):
+                yield self
+        finally:
+            if self.__perfilador is not None:
+                self.__perfilador.disable()
+            if self.__tracemalloc:
+                actual, pico = tracemalloc.get_traced_memory()
+                lineas = tracemalloc.take_snapshot().statistics('lineno')[:10]
+                tracemalloc.stop()
+                self.__memoria = {'pico_bytes': pico, 'retenidos_bytes': actual, 'mayores': [{'linea': str(estadistica.traceback), 'bytes': estadistica.size, 'bloques': estadistica.count} for estadistica in lineas]}
+
+    def segundos_propios(self): #tiempo real propio de cada etapa, sin la corrida completa, como MedidorEtapas
+        return {nombre: acumulado[1 + len(self.__lecturas)] for nombre, acumulado in self.__etapas.items() if nombre != 'total'}
+
+    def a_dict(self):
+        campos = ('segundos', 'cpu_segundos', 'bloques_netos') + (('bytes_netos',) if self.__tracemalloc else ())
+        n = len(campos)
+        etapas = {}
+        for nombre, acumulado in self.__etapas.items():
+            etapa = {'llamadas': acumulado[0]}
+            etapa.update(zip(campos, acumulado[1:1 + n]))
+            etapa.update(zip((f'{campo}_propios' for campo in campos), acumulado[1 + n:]))
+            etapas[nombre] = etapa
+        resultado = {
+            'etapas': etapas,
+            'clasificacion_por_tipo': {tipo: {'transacciones': cantidad, 'segundos': segundos, 'ns_por_transaccion': round(segundos / cantidad * 1e9, 1)} for tipo, (cantidad, segundos) in self.__tipos.items()},
+        }
+        if self.__memoria is not None:
+            resultado['tracemalloc'] = self.__memoria
+        return resultado
+
+    def guardar(self, filename, **datos): #perfil JSON junto al informe y, con cProfile, las estadisticas en formato pstats
+        escribir_atomico(f'{filename}.json', [json.dumps({**datos, **self.a_dict()}, ensure_ascii=False, indent=2)])
+        if self.__perfilador is not None:
+            self.__perfilador.dump_stats(f'{filename}.prof')
+
+def ruta_perfil(filename): #el perfil va al lado del informe, sin la extension .gz; si el informe sale por stdout va al directorio actual
+    if filename == '-':
+        return 'rps.perfil'
+    return f"{filename[:-3] if filename.endswith('.gz') else filename}.perfil"
@@ -0,0 +1,63 @@
+#Creación de la clase Razon, asociada con la clase Cliente
+class Razon:
+    __slots__ = ('__razon',)
+
+    def __init__(self, razon):
+        self.__razon = razon
+
+    @property 
+    def razon(self):
+        return self.__razon
+
+#Las siguientes clases heredan de la clase Razon
+class Razon_alta_chequera(Razon):
+    __slots__ = ()
+
+    def __init__(self, razon):
+        super().__init__(razon)
+
+class Razon_alta_tarjeta_credito(Razon):
+    __slots__ = ()
+
+    def __init__(self, razon):
+        super().__init__(razon)
+
+class Razon_compra_dolar(Razon):
+    __slots__ = ()
+
+    def __init__(self, razon):
+        super().__init__(razon)
+
+class Razon_retiro_efectivo_cajero_automatico(Razon):
+    __slots__ = ()
+
+    def __init__(self, razon):
+        super().__init__(razon)
+
+class Razon_transferencia_enviada(Razon):
+    __slots__ = ()
+
+    def __init__(self, razon):
+        super().__init__(razon)
+
+class Razon_transferencia_recibida(Razon):
+    __slots__ = ()
+
+    def __init__(self, razon):
+        super().__init__(razon)
+
+class Razon_nula(Razon):
+    __slots__ = ()
+
+    def __init__(self, razon):
+        super().__init__(razon)       
+
+#subclase de Razon con la que se rechaza cada tipo de transaccion (ver reglas); los tipos sin regla se rechazan con Razon
+razones_por_tipo = {
+    'ALTA_CHEQUERA': Razon_alta_chequera,
+    'ALTA_TARJETA_CREDITO': Razon_alta_tarjeta_credito,
+    'COMPRA_DOLAR': Razon_compra_dolar,
+    'RETIRO_EFECTIVO_CAJERO_AUTOMATICO': Razon_retiro_efectivo_cajero_automatico,
+    'TRANSFERENCIA_ENVIADA': Razon_transferencia_enviada,
+    'TRANSFERENCIA_RECIBIDA': Razon_transferencia_recibida,
+}
@@ -0,0 +1,157 @@
+from functools import lru_cache
+from operator import itemgetter
+from .fechas import segundos_dia, timestamp
+from .razones import Razon, Razon_nula, Razon_alta_chequera, Razon_alta_tarjeta_credito, Razon_compra_dolar, Razon_retiro_efectivo_cajero_automatico, Razon_transferencia_enviada, Razon_transferencia_recibida
+
+politicas = { #limites y condiciones de cada nivel de cliente segun lo estipulado en la consigna
+    'CLASSIC': {'limiteChequeras': 0, 'limiteTarj': 0, 'accesoDolar': 'NO', 'limite_extraccion': 10000, 'limite_transferencia': 150000, 'saldo_disponible': 0, 'costo_transferencias': 0.01},
+    'GOLD': {'limiteChequeras': 1, 'limiteTarj': 1, 'accesoDolar': 'SI', 'limite_extraccion': 20000, 'limite_transferencia': 500000, 'saldo_disponible': 10000, 'costo_transferencias': 0.005},
+    'BLACK': {'limiteChequeras': 2, 'limiteTarj': 5, 'accesoDolar': 'SI', 'limite_extraccion': 100000, 'limite_transferencia': float('inf'), 'saldo_disponible': 10000, 'costo_transferencias': 0},
+}
+
+
+#Motor de reglas de rechazo: para cada nivel se arma una tabla tipo de transaccion -> regla, y cada regla devuelve
+#objetos Razon creados una sola vez al armar la tabla, asi clasificar una transaccion es una busqueda en un diccionario.
+#Cada fabrica de la tabla devuelve las razones posibles de su tipo y las condiciones que eligen entre ellas: la razon es
+#la de la primera condicion que se cumple, o la ultima si no se cumple ninguna. Las condiciones solo comparan y suman
+#campos, asi valen igual para una transaccion (MotorRazones) que para las columnas de muchas (ver vectorizado)
+razon_nula = Razon_nula('')
+razon_desconocida = Razon('Razon desconocida') #rechazos de un tipo sin regla (por ejemplo COMPRAR_DOLAR)
+
+def _constante(razon):
+    return (razon,), ()
+
+def _regla_compra_dolar(nivel, politica, cantChequeras, cantTarj):
+    if politica['accesoDolar'] == 'NO':
+        return _constante(Razon_compra_dolar(f'Los clientes {nivel} no pueden comprar dolares'))
+    return (Razon_compra_dolar('Fondos insuficientes'), Razon_compra_dolar('Razon desconocida')), (lambda t: t['monto'] > t['saldoEnCuenta'],)
+
+def _regla_alta_tarjeta_credito(nivel, politica, cantChequeras, cantTarj):
+    if cantTarj < politica['limiteTarj']:
+        return _constante(Razon_alta_tarjeta_credito('Razon desconocida'))
+    return _constante(Razon_alta_tarjeta_credito('Alcanzo el limite de tarjetas de credito'))
+
+def _regla_alta_chequera(nivel, politica, cantChequeras, cantTarj):
+    if nivel == 'CLASSIC':
+        return _constante(Razon_alta_chequera(f'Los clientes {nivel} no pueden solicitar chequeras'))
+    if cantChequeras < politica['limiteChequeras']:
+        return _constante(Razon_alta_chequera('Razon desconocida'))
+    return _constante(Razon_alta_chequera('Alcanzo el limite de chequeras'))
+
+def _regla_retiro_efectivo_cajero(nivel, politica, cantChequeras, cantTarj, cupo_restante=itemgetter('cupoDiarioRestante')): #el saldo descubierto de CLASSIC es 0, asi que la misma cuenta vale para todos los niveles
+    saldo_disponible = politica['saldo_disponible']
+    razones = (Razon_retiro_efectivo_cajero_automatico('Saldo en cuenta insuficiente'), Razon_retiro_efectivo_cajero_automatico('La operacion excede el limite de cupo diario restante'), Razon_retiro_efectivo_cajero_automatico('Razon desconocida'))
+    return razones, (lambda t: t['monto'] > t['saldoEnCuenta'] + saldo_disponible, lambda t: t['monto'] > cupo_restante(t))
+
+def _regla_transf_enviada(nivel, politica, cantChequeras, cantTarj):
+    costo, saldo_disponible = politica['costo_transferencias'], politica['saldo_disponible']
+    return (Razon_transferencia_enviada('Saldo en cuenta insuficiente'), Razon_transferencia_enviada('Razon desconocida')), (lambda t: t['monto'] + t['monto']*costo > t['saldoEnCuenta'] + saldo_disponible,)
+
+def _regla_transf_recibida(nivel, politica, cantChequeras, cantTarj):
+    limite = politica['limite_transferencia']
+    return (Razon_transferencia_recibida('Excede el monto limite a recibir'), Razon_transferencia_recibida('Razon desconocida')), (lambda t: t['monto'] > limite,)
+
+reglas = { #tipo de transaccion -> fabrica de la regla de rechazo: (nivel, politica, cantChequeras, cantTarj) -> (razones, condiciones)
+    'COMPRA_DOLAR': _regla_compra_dolar,
+    'ALTA_TARJETA_CREDITO': _regla_alta_tarjeta_credito,
+    'ALTA_CHEQUERA': _regla_alta_chequera,
+    'RETIRO_EFECTIVO_CAJERO_AUTOMATICO': _regla_retiro_efectivo_cajero,
+    'TRANSFERENCIA_ENVIADA': _regla_transf_enviada,
+    'TRANSFERENCIA_RECIBIDA': _regla_transf_recibida,
+}
+campos_rechazo = { #campos que lee cada regla ademas de monto; sin ellos una transaccion rechazada no se puede clasificar
+    'COMPRA_DOLAR': ('saldoEnCuenta',),
+    'RETIRO_EFECTIVO_CAJERO_AUTOMATICO': ('saldoEnCuenta', 'cupoDiarioRestante'),
+    'TRANSFERENCIA_ENVIADA': ('saldoEnCuenta',),
+}
+
+def _regla_escalar(razones, condiciones): #funcion transaccion -> Razon; con una o ninguna condicion no recorre nada
+    if not condiciones:
+        razon = razones[0]
+        return lambda t: razon
+    if len(condiciones) == 1:
+        (condicion,), (si, no) = condiciones, razones
+        return lambda t: si if condicion(t) else no
+    def regla(t):
+        for condicion, razon in zip(condiciones, razones):
+            if condicion(t):
+                return razon
+        return razones[-1]
+    return regla
+
+_regla_sin_tipo = _regla_escalar(*_constante(razon_desconocida))
+
+class MotorRazones:
+    def __init__(self, nivel, cantChequeras, cantTarj):
+        politica = politicas[nivel]
+        self.__reglas = {tipo: _regla_escalar(*fabrica(nivel, politica, cantChequeras, cantTarj)) for tipo, fabrica in reglas.items()}
+
+    def razon(self, t): #devuelve el objeto Razon de la transaccion sin crear objetos nuevos
+        if t['estado'] == 'ACEPTADA':
+            return razon_nula
+        return self.__reglas.get(t['tipo'], _regla_sin_tipo)(t)
+
+@lru_cache(maxsize=None)
+def motor_razones(nivel, cantChequeras, cantTarj): #los clientes con el mismo nivel y totales comparten el motor
+    return MotorRazones(nivel, cantChequeras, cantTarj)
+
+#Cupo diario de extraccion: con cupo 'informado' se usa el cupoDiarioRestante que trae cada transaccion, con 'calculado'
+#el motor lo calcula con el limite_extraccion de la cuenta menos los retiros aceptados de la misma cuenta en el mismo dia.
+#Las sumas se acumulan a medida que se recorren las transacciones (en el orden del TPS), asi cada chequeo es una busqueda
+#en un diccionario y nunca se vuelven a recorrer los retiros anteriores. El dia es el numero de dia de la fecha leida por
+#fechas, asi '1/6/2022', '01/06/2022' y '2022-06-01' son el mismo dia
+modos_cupo = ('informado', 'calculado')
+
+def dia(fecha): #fecha del TPS -> numero de dia desde 1970; con la hora mal formada cuenta el dia, y si el dia tampoco se puede leer, su texto antes de la hora
+    marca = timestamp(fecha)
+    if marca is None:
+        marca = timestamp(fecha.partition(' ')[0])
+        if marca is None:
+            return fecha.partition(' ')[0]
+    return marca // segundos_dia
+
+class CupoDiario:
+    __slots__ = ('__limite', '__retirado')
+
+    def __init__(self, limite, retirado=None):
+        self.__limite = limite
+        self.__retirado = {} if retirado is None else retirado #(cuenta, dia) -> suma de los retiros aceptados
+
+    @property
+    def retirado(self):
+        return self.__retirado
+
+    def restante(self, t): #cupo de la cuenta en el dia de la transaccion antes de ella
+        return self.__limite - self.__retirado.get((t['cuentaNumero'], dia(t['fecha'])), 0)
+
+    def registrar(self, t):
+        clave = (t['cuentaNumero'], dia(t['fecha']))
+        self.__retirado[clave] = self.__retirado.get(clave, 0) + t['monto']
+
+    def recorrer(self, transacciones): #registra los retiros aceptados y devuelve {posicion: cupo restante} de los retiros rechazados
+        restantes = {}
+        for i, t in enumerate(transacciones):
+            if t['tipo'] == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO':
+                if t['estado'] == 'ACEPTADA':
+                    self.registrar(t)
+                else:
+                    restantes[i] = self.restante(t)
+        return restantes
+
+class MotorCupoCalculado(MotorRazones): #tiene estado, se crea uno por cliente y corrida
+    def __init__(self, nivel, cantChequeras, cantTarj, limite_extraccion, retirado=None):
+        super().__init__(nivel, cantChequeras, cantTarj)
+        self.__cupo = CupoDiario(limite_extraccion, retirado)
+        self.__retiro = _regla_escalar(*_regla_retiro_efectivo_cajero(nivel, politicas[nivel], cantChequeras, cantTarj, self.__cupo.restante))
+
+    @property
+    def cupo(self):
+        return self.__cupo
+
+    def razon(self, t):
+        if t['tipo'] != 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO':
+            return super().razon(t)
+        if t['estado'] == 'ACEPTADA':
+            self.__cupo.registrar(t)
+            return razon_nula
+        return self.__retiro(t)
@@ -0,0 +1,139 @@
+import os
+import time
+from itertools import islice
+from .cuarentena import Cuarentena
+from .esquema import validar_documento
+from .fechas import dias_completos, timestamp
+from .lectura import ErrorArchivo, cargar_archivo, abrir_streaming
+from .modelo import FilaTransaccion, crear_cliente
+from .perfil import MedidorEtapas, Perfil, perfil_nulo, ruta_perfil
+from .salida import exportar, generar_partes
+
+#API para usar el paquete sin subprocesos ni archivos intermedios
+def generar_reporte(data, formato=None, validacion='completa', muestreo=100, motor='reglas', cupo='informado'): #recibe el documento TPS ya decodificado; sin formato devuelve (DatosUsuario, [FilaTransaccion]), con formato el informe completo (bytes si es binario)
+    if not validar_documento(data, validacion, muestreo):
+        raise ErrorArchivo('El archivo se encuentra mal formado')
+    info, filas = crear_cliente(data).retorno(motor == 'vectorizado', cupo)
+    if formato is None:
+        return info, filas
+    _, partes = generar_partes(info, filas, formato)
+    return b''.join(partes) if formato == 'binario' else ''.join(partes)
+
+def generar_informe(data, filename, motor='reglas', comprimir=False, formato='html', perfil=perfil_nulo, cupo='informado', registrar=None, rango=None): #devuelve el nombre del cliente y las estadisticas del informe; registrar: None o una funcion (data, filas) -> filas que ademas las guarda (ver analitica); rango: None o (desde, hasta) en segundos (ver fechas), con None en un extremo abierto
+    with perfil.etapa('clasificacion'):
+        cliente = crear_cliente(data) #el nivel y las cantidades salen de la primera transaccion del archivo aunque quede fuera del rango
+        if rango is not None:
+            with perfil.etapa('rango'):
+                cliente.transacciones = seleccionar_rango(cliente.transacciones, rango, cupo)
+        if perfil.por_tipo and motor != 'vectorizado': #con perfil se mide ademas el costo de cada tipo de transaccion
+            info, info_transacciones = cliente.datos_usuario(), list(filas_por_tipo(cliente.motor(cupo), cliente.transacciones, perfil))
+        else:
+            info, info_transacciones = cliente.retorno(motor == 'vectorizado', cupo) # retorna los datos del cliente que se necesitan exportar y la lista de filas de transacciones a recorrer en HTML
+    if rango is not None and cupo == 'calculado':
+        info_transacciones = list(filas_en_rango(info_transacciones, rango))
+    if registrar is not None:
+        info_transacciones = registrar(data, info_transacciones)
+    estadisticas = exportar(info, info_transacciones, filename, formato, comprimir, perfil) #el informe nunca se arma completo en memoria
+    return info.nombre_completo, estadisticas
+
+def seleccionar_rango(transacciones, rango, cupo='informado'): #transacciones a clasificar en el orden del archivo, en una sola pasada con las fechas cacheadas. Con cupo calculado se toman los dias completos, porque el cupo de un retiro depende de los retiros anteriores del mismo dia
+    dias = dias_completos(*rango) if cupo == 'calculado' else rango
+    return [transaccion for transaccion in transacciones if _en(timestamp(transaccion['fecha']), dias)]
+
+def _en(marca, rango): #desde <= marca < hasta; una fecha que no se pudo leer nunca esta en el rango
+    desde, hasta = rango
+    return marca is not None and (desde is None or marca >= desde) and (hasta is None or marca < hasta)
+
+def filas_en_rango(filas, rango): #deja pasar las filas del rango, en el mismo orden
+    return (fila for fila in filas if _en(timestamp(fila.fecha), rango))
+
+def filas_por_tipo(reglas_cliente, transacciones, perfil): #clasifica con el motor de reglas midiendo cada transaccion, solo se usa con el perfil activo
+    reloj = time.perf_counter
+    for transaccion in transacciones:
+        inicio = reloj()
+        razon = reglas_cliente.razon(transaccion).razon
+        perfil.sumar_tipo(transaccion['tipo'], reloj() - inicio)
+        yield FilaTransaccion(transaccion['fecha'], transaccion['tipo'], transaccion['estado'], transaccion['monto'], razon)
+
+def filas_streaming(cliente, transacciones, motor='reglas', bloque=4096, perfil=perfil_nulo, cupo='informado'): #clasifica cada transaccion al leerla (o por bloques con el motor vectorizado), con el mismo formato de fila que retorno()
+    if perfil.por_tipo and motor != 'vectorizado':
+        yield from filas_por_tipo(cliente.motor(cupo), transacciones, perfil)
+        return
+    if motor == 'vectorizado':
+        vectorial = cliente.motor_vectorial(cupo) #con cupo calculado las sumas del dia pasan de un bloque al siguiente
+        while True:
+            parte = list(islice(transacciones, bloque))
+            if not parte:
+                return
+            for transaccion, razon in zip(parte, vectorial.razones_texto(parte)):
+                yield FilaTransaccion(transaccion['fecha'], transaccion['tipo'], transaccion['estado'], transaccion['monto'], razon)
+    reglas_cliente = cliente.motor(cupo)
+    for transaccion in transacciones:
+        yield FilaTransaccion(transaccion['fecha'], transaccion['tipo'], transaccion['estado'], transaccion['monto'], reglas_cliente.razon(transaccion).razon)
+
+def generar_informe_streaming(data, transacciones, filename, motor='reglas', comprimir=False, formato='html', perfil=perfil_nulo, cupo='informado', registrar=None, rango=None): #el informe se genera por partes y cada fila se escribe apenas se clasifica
+    with perfil.etapa('clasificacion'):
+        cliente = crear_cliente(data)
+        info = cliente.datos_usuario()
+    if rango is not None: #sin el documento entero no hay indice: las transacciones se filtran al leerlas
+        dias = dias_completos(*rango) if cupo == 'calculado' else rango
+        transacciones = (transaccion for transaccion in transacciones if _en(timestamp(transaccion['fecha']), dias))
+    filas = perfil.iterar('clasificacion', filas_streaming(cliente, transacciones, motor, perfil=perfil, cupo=cupo))
+    if rango is not None and cupo == 'calculado':
+        filas = filas_en_rango(filas, rango)
+    if registrar is not None:
+        filas = registrar(data, filas)
+    estadisticas = exportar(info, filas, filename, formato, comprimir, perfil)
+    return info.nombre_completo, estadisticas
+
+
+def generar_desde_archivo(archivo, nombrar, streaming=False, validacion='completa', muestreo=100, motor='reglas', comprimir=False, formato='html', perfil=None, incremental=None, cupo='informado', decodificador='auto', paralelo=None, analitica=None, rango=None, cuarentena=False, metricas=None): #nombrar recibe los datos del cliente y devuelve el nombre del informe; perfil: None o las opciones de Perfil; metricas: None o las Metricas donde se registra el archivo; incremental: None o la base SQLite del estado; decodificador: auto, msgspec o json; paralelo: None o la cantidad de procesos (0: uno por nucleo); analitica: None o la base SQLite donde se guardan las transacciones evaluadas; rango: None o (desde, hasta) en segundos para informar solo esas fechas; cuarentena: aparta las transacciones invalidas en <informe>.cuarentena.jsonl en lugar de rechazar el archivo
+    if perfil is None and metricas is None:
+        return _generar_desde_archivo(archivo, nombrar, streaming, validacion, muestreo, motor, comprimir, formato, perfil_nulo, incremental, cupo, decodificador, paralelo, analitica, rango, cuarentena)
+    medidor = MedidorEtapas() if perfil is None else Perfil(**perfil) #las metricas toman el tiempo propio de cada etapa del perfil si esta prendido
+    inicio = time.perf_counter()
+    try:
+        with medidor.activar():
+            filename, nombre, estadisticas = _generar_desde_archivo(archivo, nombrar, streaming, validacion, muestreo, motor, comprimir, formato, medidor, incremental, cupo, decodificador, paralelo, analitica, rango, cuarentena)
+    except Exception:
+        if metricas is not None:
+            metricas.registrar_error(time.perf_counter() - inicio)
+        raise
+    if metricas is not None:
+        metricas.registrar_informe(filename, estadisticas, time.perf_counter() - inicio, medidor.segundos_propios())
+    if perfil is None:
+        return filename, nombre, estadisticas
+    medidor.guardar(ruta_perfil(filename), archivo=archivo, informe=filename, cliente=nombre, transacciones=estadisticas.total, streaming=streaming, validacion=validacion, motor=motor, cupo=cupo, formato=formato, incremental=incremental is not None, decodificador=decodificador, paralelo=paralelo, analitica=analitica is not None, rango=rango, cuarentena=cuarentena)
+    return filename, nombre, estadisticas
+
+def _generar_desde_archivo(archivo, nombrar, streaming, validacion, muestreo, motor, comprimir, formato, perfil, incremental=None, cupo='informado', decodificador='auto', paralelo=None, analitica=None, rango=None, cuarentena=False):
+    if analitica is not None: #sqlite3 se importa solo si se guardan las transacciones
+        from .analitica import AlmacenAnalitico
+        with AlmacenAnalitico(analitica) as almacen:
+            return _generar(archivo, nombrar, streaming, validacion, muestreo, motor, comprimir, formato, perfil, incremental, cupo, decodificador, paralelo, almacen.registrador(os.path.abspath(archivo)), rango, cuarentena)
+    return _generar(archivo, nombrar, streaming, validacion, muestreo, motor, comprimir, formato, perfil, incremental, cupo, decodificador, paralelo, rango=rango, cuarentena=cuarentena)
+
+def _generar(archivo, nombrar, streaming, validacion, muestreo, motor, comprimir, formato, perfil, incremental=None, cupo='informado', decodificador='auto', paralelo=None, registrar=None, rango=None, cuarentena=False):
+    if incremental is not None: #sqlite3 se importa solo en el modo incremental
+        if cuarentena:
+            raise ValueError('La cuarentena no se puede combinar con el modo incremental')
+        from .incremental import generar_incremental
+        return generar_incremental(archivo, nombrar, incremental, validacion, muestreo, motor, comprimir, formato, perfil, cupo, registrar, rango)
+    if paralelo is not None and not streaming and rango is None and not cuarentena: #si el documento no se puede repartir se lee entero como siempre; con rango o cuarentena se procesa en este proceso
+        from .paralelo import generar_paralelo
+        generado = generar_paralelo(archivo, nombrar, paralelo, validacion, muestreo, motor, comprimir, formato, perfil, cupo, decodificador, registrar)
+        if generado is not None:
+            return generado
+    apartadas = Cuarentena(cupo) if cuarentena else None
+    if streaming:
+        with abrir_streaming(archivo, validacion, muestreo, perfil, apartadas) as (data, transacciones):
+            filename = nombrar(data)
+            nombre, estadisticas = generar_informe_streaming(data, transacciones, filename, motor, comprimir, formato, perfil, cupo, registrar, rango)
+    else:
+        data = cargar_archivo(archivo, validacion, muestreo, perfil, decodificador, apartadas)
+        filename = nombrar(data)
+        nombre, estadisticas = generar_informe(data, filename, motor, comprimir, formato, perfil, cupo, registrar, rango)
+    if apartadas is not None:
+        apartadas.guardar(filename, archivo)
+        estadisticas.cuarentena = len(apartadas)
+    return filename, nombre, estadisticas
@@ -0,0 +1,217 @@
+import io
+import os
+import csv
+import sys
+import json
+import struct
+from array import array
+from itertools import islice
+from .modelo import DatosUsuario, FilaTransaccion
+from .estadisticas import Estadisticas
+from .escritura import agrupar, escribir_atomico, escribir_informe
+from .lectura import ErrorArchivo
+from .perfil import perfil_nulo
+
+#Creacion de HTML
+#Los templates compilados se guardan como bytecode en templates/__pycache__, asi un proceso nuevo no vuelve a compilar
+#el template desde el fuente (~8 ms contra menos de 1 ms). Jinja invalida la cache sola si cambia el template o la
+#version de Python, y si el paquete esta instalado donde no se puede escribir se compila en memoria como siempre
+carpeta_templates = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+carpeta_cache_templates = os.path.join(carpeta_templates, '__pycache__')
+_entorno = None
+_templates = {}
+
+def _cache_bytecode(carpeta):
+    from jinja2 import FileSystemBytecodeCache
+    class CacheBytecode(FileSystemBytecodeCache): #sin cache si no se puede leer o escribir la carpeta, por ejemplo de solo lectura
+        def load_bytecode(self, bucket):
+            try:
+                super().load_bytecode(bucket)
+            except OSError:
+                pass
+        def dump_bytecode(self, bucket):
+            try:
+                super().dump_bytecode(bucket)
+            except OSError:
+                pass
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+    except OSError:
+        pass
+    return CacheBytecode(carpeta)
+
+def obtener_template(nombre="template.html"): #el entorno de Jinja y cada template se cargan una unica vez por proceso, y jinja2 recien cuando se pide un HTML
+    global _entorno
+    template = _templates.get(nombre)
+    if template is None:
+        if _entorno is None:
+            from jinja2 import Environment, PackageLoader, select_autoescape
+            _entorno = Environment(
+                loader=PackageLoader("paquete"),
+                autoescape=select_autoescape(),
+                bytecode_cache=_cache_bytecode(carpeta_cache_templates)
+            )
+        template = _templates[nombre] = _entorno.get_template(nombre)
+    return template
+
+def precompilar_templates(): #compila todos los templates y deja su bytecode en la cache, por ejemplo al instalar; devuelve sus nombres
+    nombres = sorted(nombre for nombre in os.listdir(carpeta_templates) if nombre.endswith('.html'))
+    for nombre in nombres:
+        obtener_template(nombre)
+    return nombres
+
+
+#Formatos de salida legibles por maquina: reciben los datos del cliente y las filas ya clasificadas y generan el archivo por partes, sin pasar por Jinja
+def partes_html(info, filas, resumen=None): #el resumen va al final del template, asi se muestra ya completo aunque las filas se cuenten mientras se escriben
+    return obtener_template().generate(info = info, info_transacciones = filas, resumen = resumen)
+
+def partes_csv(info, filas, filas_por_bloque=1024): #cada fila lleva los datos del cliente para poder unir varios informes
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(DatosUsuario._fields + FilaTransaccion._fields)
+    while True:
+        bloque = list(islice(filas, filas_por_bloque))
+        if not bloque:
+            break
+        escritor.writerows(info + fila for fila in bloque)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def partes_jsonl(info, filas): #la primera linea es el cliente y cada linea siguiente una transaccion, como la entrada NDJSON
+    yield json.dumps({'cliente': info._asdict()}, ensure_ascii=False) + '\n'
+    campos = FilaTransaccion._fields
+    for fila in filas:
+        yield json.dumps(dict(zip(campos, fila)), ensure_ascii=False) + '\n'
+
+#Formato binario columnar (.tpsr): cabecera 'TPSR' + version + cliente en JSON, despues bloques de hasta 4096 filas guardadas por columnas
+#y un bloque vacio al final. Cada bloque: cantidad de filas, las entradas nuevas de los diccionarios de tipo/estado/razon, los codigos
+#de tipo y estado (uint8), razon (uint16), monto (float64), el largo de cada fecha (uint32) y las fechas en UTF-8. Todo en little endian.
+MAGIA_BINARIO = b'TPSR\x01'
+
+def _bytes_con_largo(datos, formato='<I'):
+    return struct.pack(formato, len(datos)) + datos
+
+def partes_binario(info, filas, filas_por_bloque=4096):
+    yield MAGIA_BINARIO + _bytes_con_largo(json.dumps(info._asdict(), ensure_ascii=False).encode())
+    diccionarios = ({}, {}, {}) #tipo, estado y razon -> codigo
+    while True:
+        bloque = list(islice(filas, filas_por_bloque))
+        partes = [struct.pack('<I', len(bloque))]
+        if not bloque:
+            yield partes[0]
+            return
+        codigos = []
+        for diccionario, indice, tipo_array in zip(diccionarios, (1, 2, 4), ('B', 'B', 'H')):
+            nuevos = []
+            columna = array(tipo_array)
+            for fila in bloque:
+                valor = fila[indice]
+                codigo = diccionario.get(valor)
+                if codigo is None:
+                    codigo = diccionario[valor] = len(diccionario)
+                    nuevos.append(valor)
+                columna.append(codigo)
+            partes.append(struct.pack('<H', len(nuevos)) + b''.join(_bytes_con_largo(str(valor).encode(), '<H') for valor in nuevos))
+            codigos.append(columna)
+        montos = array('d', (fila.monto for fila in bloque))
+        fechas = [fila.fecha.encode() for fila in bloque]
+        largos = array('I', map(len, fechas))
+        if sys.byteorder == 'big':
+            for columna in (*codigos, montos, largos):
+                columna.byteswap()
+        partes.extend(columna.tobytes() for columna in (*codigos, montos, largos))
+        partes.extend(fechas)
+        yield b''.join(partes)
+
+def leer_binario(f): #lee un informe .tpsr y devuelve los datos del cliente y un iterador de FilaTransaccion
+    if f.read(len(MAGIA_BINARIO)) != MAGIA_BINARIO:
+        raise ErrorArchivo('El archivo no es un informe binario')
+    def leer_largo(formato='<I'):
+        return struct.unpack(formato, f.read(struct.calcsize(formato)))[0]
+    info = DatosUsuario(**json.loads(f.read(leer_largo())))
+    def filas():
+        diccionarios = ([], [], [])
+        while True:
+            n = leer_largo()
+            if n == 0:
+                return
+            columnas = []
+            for diccionario in diccionarios:
+                for _ in range(leer_largo('<H')):
+                    diccionario.append(f.read(leer_largo('<H')).decode())
+            for tipo_array in ('B', 'B', 'H', 'd', 'I'):
+                columna = array(tipo_array)
+                columna.frombytes(f.read(n * columna.itemsize))
+                if sys.byteorder == 'big':
+                    columna.byteswap()
+                columnas.append(columna)
+            tipos, estados, razones, montos, largos = columnas
+            for i in range(n):
+                yield FilaTransaccion(f.read(largos[i]).decode(), diccionarios[0][tipos[i]], diccionarios[1][estados[i]], montos[i], diccionarios[2][razones[i]])
+    return info, filas()
+
+#Informe paginado: una pagina HTML liviana con el cliente y el resumen, y las transacciones en paginas de `filas_por_pagina`
+#filas en la carpeta <informe>_paginas. Cada pagina es un .js chico que le pasa sus filas (un array JSON por fila) a la pagina
+#principal, que carga solo la que se esta viendo; con <script> en lugar de fetch funciona tambien abriendo el informe desde
+#el disco. Cada pagina se escribe apenas se completan sus filas y la pagina principal al final, cuando ya esta el resumen
+filas_por_pagina = 1000
+
+def carpeta_paginas(filename):
+    return f'{os.path.splitext(filename)[0]}_paginas'
+
+def partes_paginas(filas, por_pagina=filas_por_pagina):
+    numero = 0
+    while True:
+        bloque = list(islice(filas, por_pagina))
+        if not bloque:
+            return
+        numero += 1
+        yield f"paginaTPS({numero}, {json.dumps(bloque, ensure_ascii=False, separators=(',', ':'))});\n"
+
+def escribir_paginado(info, filas, filename, comprimir=False, perfil=perfil_nulo, por_pagina=filas_por_pagina): #devuelve las estadisticas, como exportar
+    if filename == '-' or comprimir:
+        raise ErrorArchivo('El formato paginado escribe varios archivos, no se puede combinar con --gzip ni con la salida estandar')
+    with perfil.etapa('template'):
+        template = obtener_template('paginado.html')
+    carpeta = carpeta_paginas(filename)
+    os.makedirs(carpeta, exist_ok=True)
+    estadisticas = Estadisticas()
+    filas = estadisticas.contar(iter(filas))
+    paginas = 0
+    with perfil.etapa('escritura'):
+        ruta_pagina = lambda numero: os.path.join(carpeta, f'pagina_{numero}.js')
+        for pagina in perfil.iterar('render', partes_paginas(filas, por_pagina), 1):
+            paginas += 1
+            escribir_atomico(ruta_pagina(paginas), [pagina])
+        sobrante = paginas + 1
+        while os.path.exists(ruta_pagina(sobrante)): #paginas de un informe anterior con mas transacciones
+            os.remove(ruta_pagina(sobrante))
+            sobrante += 1
+        escribir_atomico(filename, agrupar(template.generate(info = info, resumen = estadisticas, paginas = paginas, por_pagina = por_pagina, carpeta = os.path.basename(carpeta))))
+    return estadisticas
+
+formatos = {'html': partes_html, 'csv': partes_csv, 'jsonl': partes_jsonl, 'binario': partes_binario}
+formatos_archivo = (*formatos, 'paginado') #paginado escribe varios archivos, no se puede generar como un unico documento
+extensiones = {'html': 'html', 'csv': 'csv', 'jsonl': 'jsonl', 'binario': 'tpsr', 'paginado': 'html'}
+
+def generar_partes(info, filas, formato='html'): #devuelve las estadisticas (completas una vez consumidas las partes) y las partes del informe
+    estadisticas = Estadisticas()
+    filas = estadisticas.contar(iter(filas))
+    partes = partes_html(info, filas, estadisticas) if formato == 'html' else formatos[formato](info, filas)
+    return estadisticas, partes
+
+def exportar(info, filas, filename, formato='html', comprimir=False, perfil=perfil_nulo): #escribe el informe y devuelve las estadisticas calculadas en la misma pasada
+    if formato == 'paginado':
+        return escribir_paginado(info, filas, filename, comprimir, perfil)
+    if formato == 'html':
+        with perfil.etapa('template'): #importar jinja2 y compilar el template, solo la primera vez en cada proceso
+            obtener_template()
+    with perfil.etapa('render'):
+        estadisticas, partes = generar_partes(info, filas, formato)
+    if perfil.activo and formato != 'binario':
+        partes = agrupar(partes) #se mide cada bloque de ~64 KB y no cada parte chica de Jinja
+    with perfil.etapa('escritura'): #el render corre dentro de la escritura a medida que se piden las partes
+        escribir_informe(filename, perfil.iterar('render', partes, 1), comprimir, formato == 'binario')
+    return estadisticas
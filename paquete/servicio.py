@@ -0,0 +1,201 @@
+import os
+import sys
+import json
+import time
+import stat
+import signal
+import threading
+import socketserver
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from .estadisticas import Estadisticas
+from .lectura import ErrorArchivo, decodificar_documento, usar_msgspec
+from .reporte import generar_reporte
+from .salida import obtener_template
+
+#Servicio de reportes: proceso de larga duracion con el schema, el template y un pool de procesos ya cargados.
+#Recibe documentos TPS por HTTP local (127.0.0.1) o por un socket Unix y devuelve el informe
+tipos_contenido = {'html': 'text/html; charset=utf-8', 'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson', 'binario': 'application/octet-stream', 'json': 'application/json'}
+
+def procesar_pedido(cuerpo, formato='html', validacion='completa', muestreo=100, motor='reglas', cupo='informado', decodificador='auto'): #corre en un proceso del pool y devuelve (estado HTTP, tipo de contenido, cuerpo)
+    try:
+        data, valido = decodificar_documento(cuerpo, validacion, muestreo, usar_msgspec(decodificador))
+    except ValueError:
+        return 400, 'text/plain; charset=utf-8', 'El archivo ingresado no tiene contenido'.encode()
+    if not valido:
+        return 400, 'text/plain; charset=utf-8', 'El archivo se encuentra mal formado'.encode()
+    validacion = 'confiable' #ya se valido al decodificar
+    try:
+        if formato != 'json':
+            contenido = generar_reporte(data, formato, validacion, muestreo, motor, cupo)
+            return 200, tipos_contenido[formato], contenido if formato == 'binario' else contenido.encode()
+        info, filas = generar_reporte(data, None, validacion, muestreo, motor, cupo)
+    except ErrorArchivo as e:
+        return 400, 'text/plain; charset=utf-8', str(e).encode()
+    except (KeyError, IndexError, TypeError) as e:
+        return 400, 'text/plain; charset=utf-8', f'El archivo se encuentra mal formado: {type(e).__name__} {e}'.encode()
+    estadisticas = Estadisticas() #formato json: documento unico con el cliente, las filas y las estadisticas
+    filas = [fila._asdict() for fila in estadisticas.contar(iter(filas))]
+    return 200, tipos_contenido[formato], json.dumps({'cliente': info._asdict(), 'transacciones': filas, 'estadisticas': estadisticas.a_dict()}, ensure_ascii=False).encode()
+
+def _iniciar_worker_servicio(decodificador='auto'): #cada proceso del pool carga el template (y msgspec si se usa) al arrancar
+    obtener_template()
+    if usar_msgspec(decodificador):
+        from . import decodificacion
+
+class Latencias: #guarda las ultimas latencias de los pedidos para calcular percentiles
+    def __init__(self, maximo=10000):
+        self.__valores = deque(maxlen=maximo)
+        self.__pedidos = 0
+        self.__errores = 0
+        self.__rechazados = 0
+        self.__lock = threading.Lock()
+
+    def registrar(self, segundos, error=False):
+        with self.__lock:
+            self.__valores.append(segundos)
+            self.__pedidos += 1
+            self.__errores += error
+
+    def rechazar(self):
+        with self.__lock:
+            self.__rechazados += 1
+
+    def resumen(self):
+        with self.__lock:
+            valores = sorted(self.__valores)
+            resumen = {'pedidos': self.__pedidos, 'errores': self.__errores, 'rechazados_por_ocupado': self.__rechazados}
+        for nombre, percentil in (('p50_ms', 0.50), ('p90_ms', 0.90), ('p99_ms', 0.99), ('max_ms', 1.0)):
+            resumen[nombre] = round(valores[min(len(valores) - 1, int(percentil * len(valores)))] * 1000, 3) if valores else None
+        return resumen
+
+class ServicioReportes:
+    def __init__(self, procesos=None, cola=None, **opciones):
+        self.__procesos = procesos
+        self.__pool = self.__crear_pool(opciones)
+        self.__lock_pool = threading.Lock()
+        self.__cupos = threading.BoundedSemaphore(cola or 2 * (procesos or os.cpu_count() or 1)) #pedidos en curso como maximo, el resto recibe 503
+        self.__opciones = opciones
+        self.__latencias = Latencias()
+
+    @property
+    def latencias(self):
+        return self.__latencias
+
+    def __crear_pool(self, opciones):
+        return ProcessPoolExecutor(max_workers=self.__procesos, initializer=_iniciar_worker_servicio, initargs=(opciones.get('decodificador', 'auto'),))
+
+    def __renovar_pool(self, roto): #un worker que muere rompe el pool entero: se reemplaza una sola vez aunque fallen varios pedidos a la vez
+        with self.__lock_pool:
+            if self.__pool is roto:
+                self.__pool = self.__crear_pool(self.__opciones)
+                roto.shutdown(wait=False)
+
+    def atender(self, cuerpo, formato): #devuelve (estado HTTP, tipo de contenido, cuerpo)
+        if not self.__cupos.acquire(blocking=False):
+            self.__latencias.rechazar()
+            return 503, 'text/plain; charset=utf-8', 'Servidor ocupado, reintentar mas tarde'.encode()
+        inicio = time.perf_counter()
+        estado = 500
+        pool = self.__pool
+        try:
+            estado, tipo, contenido = pool.submit(procesar_pedido, cuerpo, formato, **self.__opciones).result()
+            return estado, tipo, contenido
+        except BrokenProcessPool as e: #este pedido falla, los siguientes van al pool nuevo
+            self.__renovar_pool(pool)
+            return 500, 'text/plain; charset=utf-8', f'{type(e).__name__}: {e}'.encode()
+        except Exception as e:
+            return 500, 'text/plain; charset=utf-8', f'{type(e).__name__}: {e}'.encode()
+        finally:
+            self.__latencias.registrar(time.perf_counter() - inicio, estado != 200)
+            self.__cupos.release()
+
+    def cerrar(self):
+        self.__pool.shutdown()
+
+class ManejadorReportes(BaseHTTPRequestHandler): #POST /reporte?formato=html|json|csv|jsonl|binario, GET /metricas, GET /salud
+    def responder(self, estado, tipo, contenido):
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/reporte':
+            return self.responder(404, 'text/plain; charset=utf-8', b'No encontrado')
+        formato = parse_qs(url.query).get('formato', ['html'])[0]
+        if formato not in tipos_contenido:
+            return self.responder(400, 'text/plain; charset=utf-8', f'Formato desconocido: {formato}'.encode())
+        largo = self.headers.get('Content-Length')
+        if largo is None: #sin largo no se sabe donde termina el documento (no se acepta Transfer-Encoding: chunked)
+            return self.responder(411, 'text/plain; charset=utf-8', b'Falta Content-Length')
+        if not (largo.isascii() and largo.isdigit()):
+            return self.responder(400, 'text/plain; charset=utf-8', f'Content-Length invalido: {largo}'.encode())
+        cuerpo = self.rfile.read(int(largo))
+        self.responder(*self.server.servicio.atender(cuerpo, formato))
+
+    def do_GET(self):
+        ruta = urlparse(self.path).path
+        if ruta == '/metricas':
+            return self.responder(200, 'application/json', json.dumps(self.server.servicio.latencias.resumen()).encode())
+        if ruta == '/salud':
+            return self.responder(200, 'text/plain; charset=utf-8', b'ok')
+        self.responder(404, 'text/plain; charset=utf-8', b'No encontrado')
+
+    def address_string(self): #en un socket Unix no hay direccion del cliente
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, formato, *args): #las latencias se consultan en /metricas
+        pass
+
+class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def _detener_servicio(signum, frame): #SIGTERM cierra el servicio igual que Ctrl+C
+    raise KeyboardInterrupt
+
+def _es_socket(ruta): #True si en la ruta hay un socket, False si no hay nada; ValueError si hay otra cosa, que nunca se borra
+    try:
+        modo = os.lstat(ruta).st_mode
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISSOCK(modo):
+        raise ValueError(f'{ruta} existe y no es un socket, no se reemplaza')
+    return True
+
+def servir(puerto=8000, socket_unix=None, procesos=None, cola=None, **opciones):
+    if socket_unix:
+        try:
+            if _es_socket(socket_unix): #socket de una corrida anterior
+                os.remove(socket_unix)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+    servicio = ServicioReportes(procesos, cola, **opciones)
+    if socket_unix:
+        servidor = ServidorUnix(socket_unix, ManejadorReportes)
+        direccion = f'unix:{socket_unix}'
+    else:
+        servidor = ThreadingHTTPServer(('127.0.0.1', puerto), ManejadorReportes) #solo acepta conexiones locales
+        direccion = f'http://127.0.0.1:{servidor.server_address[1]}'
+    servidor.servicio = servicio
+    signal.signal(signal.SIGTERM, _detener_servicio)
+    print(f'Servicio de reportes escuchando en {direccion}', flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servicio.cerrar()
+        try:
+            if socket_unix and _es_socket(socket_unix):
+                os.remove(socket_unix)
+        except ValueError: #otro proceso puso algo en la ruta mientras corria
+            pass
+    return 0
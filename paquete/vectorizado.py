@@ -0,0 +1,82 @@
+from functools import lru_cache
+from itertools import repeat
+from operator import itemgetter
+from .reglas import politicas, razon_nula, razon_desconocida, reglas
+try: #numpy es opcional, solo lo usa el motor vectorizado y este modulo se importa recien cuando se lo pide
+    import numpy as np
+except ImportError:
+    np = None
+
+#Motor vectorizado (opcional, necesita numpy): las mismas reglas evaluadas por columnas sobre todas las transacciones a la vez.
+#Las reglas salen de la tabla de reglas: sus condiciones se evaluan sobre las columnas de las transacciones de su tipo y
+#np.select elige el indice de la razon de cada fila. Las razones se convierten a texto recien al armar las filas del reporte
+def _regla_vectorial(condiciones):
+    if not condiciones:
+        return lambda c: 0
+    indices = list(range(len(condiciones)))
+    return lambda c: np.select([condicion(c) for condicion in condiciones], indices, len(condiciones))
+
+codigos_tipo = {tipo: codigo for codigo, tipo in enumerate(reglas)}
+codigo_retiro = codigos_tipo['RETIRO_EFECTIVO_CAJERO_AUTOMATICO']
+clases_transaccion = {(tipo, estado): -1 if estado == 'ACEPTADA' else codigo for tipo, codigo in codigos_tipo.items() for estado in ('ACEPTADA', 'RECHAZADA')}
+
+class _Columnas(dict): #columnas numericas de las transacciones seleccionadas, se extraen recien cuando una regla las pide
+    def __init__(self, transacciones):
+        super().__init__()
+        self.__transacciones = transacciones
+
+    def __missing__(self, campo):
+        columna = self[campo] = np.fromiter(map(itemgetter(campo), self.__transacciones), np.float64, len(self.__transacciones))
+        return columna
+
+class MotorVectorial:
+    def __init__(self, nivel, cantChequeras, cantTarj):
+        politica = politicas[nivel]
+        self.__razones = [razon_nula, razon_desconocida] #codigo 0: aceptada, codigo 1: rechazo de un tipo sin regla
+        self.__reglas = []
+        for tipo, fabrica in reglas.items():
+            razones, condiciones = fabrica(nivel, politica, cantChequeras, cantTarj)
+            self.__reglas.append((codigos_tipo[tipo], len(self.__razones), _regla_vectorial(condiciones)))
+            self.__razones.extend(razones)
+
+    @property
+    def razones(self):
+        return self.__razones
+
+    def codigos(self, transacciones, cupo=None): #devuelve un array con el codigo de razon de cada transaccion; cupo: CupoDiario con el cupo calculado
+        n = len(transacciones)
+        restantes = None if cupo is None else cupo.recorrer(transacciones) #el cupo acumulado depende del orden, se calcula en una pasada antes de las columnas
+        clases = np.fromiter(map(clases_transaccion.get, map(itemgetter('tipo', 'estado'), transacciones), repeat(-2)), np.int8, n) #-1 aceptada, -2 fuera del schema, si no el tipo rechazado
+        codigos = np.zeros(n, np.int32)
+        for i in np.flatnonzero(clases == -2).tolist(): #combinaciones de tipo y estado sin regla, se resuelven una a una
+            codigos[i] = 0 if transacciones[i]['estado'] == 'ACEPTADA' else 1
+        for codigo_tipo, desplazamiento, regla in self.__reglas:
+            filas = np.flatnonzero(clases == codigo_tipo)
+            if len(filas): #las columnas numericas solo se extraen para las transacciones rechazadas de cada tipo
+                columnas = _Columnas([transacciones[i] for i in filas.tolist()])
+                if restantes is not None and codigo_tipo == codigo_retiro:
+                    columnas['cupoDiarioRestante'] = np.fromiter(map(restantes.__getitem__, filas.tolist()), np.float64, len(filas))
+                codigos[filas] = desplazamiento + regla(columnas)
+        return codigos
+
+    def razones_texto(self, transacciones, cupo=None): #mapea los codigos a los textos de razon
+        textos = [razon.razon for razon in self.__razones]
+        return [textos[codigo] for codigo in self.codigos(transacciones, cupo).tolist()]
+
+class MotorVectorialCupo: #el motor vectorizado compartido del nivel con el cupo diario calculado de un cliente
+    def __init__(self, motor, cupo):
+        self.__motor = motor
+        self.__cupo = cupo
+
+    @property
+    def cupo(self):
+        return self.__cupo
+
+    def razones_texto(self, transacciones):
+        return self.__motor.razones_texto(transacciones, self.__cupo)
+
+@lru_cache(maxsize=None)
+def motor_vectorial(nivel, cantChequeras, cantTarj):
+    if np is None:
+        raise RuntimeError('El motor vectorizado necesita numpy (pip install numpy)')
+    return MotorVectorial(nivel, cantChequeras, cantTarj)
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import tempfile
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from .escritura import escribir_atomico
+from .estadisticas import Estadisticas
+from .lote import procesar_archivo
+from .metricas import Metricas, servir_metricas
+from .salida import obtener_template
+from .servicio import Latencias
+
+#Vigilancia de un directorio de spool: proceso de larga duracion que revisa el directorio cada `intervalo` segundos y
+#genera el informe de cada archivo TPS que llega. Un archivo se reclama renombrandolo a una carpeta propia dentro de
+#procesando/ (el rename es atomico: si dos vigilantes comparten el spool solo uno lo consigue y nunca se procesa dos
+#veces) y pasa por una cola asyncio acotada a los procesos que generan los informes. Con la cola llena no se reclama nada
+#mas y los archivos esperan en el spool. Al terminar, el archivo va a procesados/ o a fallidos/ (con el error al lado)
+extensiones_tps = ('.json', '.ndjson', '.jsonl')
+
+def candidatos(carpeta, estable=1.0): #(llegada, ruta) de los archivos TPS sin modificar en los ultimos `estable` segundos, del mas viejo al mas nuevo
+    ahora = time.time()
+    archivos = []
+    with os.scandir(carpeta) as entradas:
+        for entrada in entradas:
+            if entrada.name.startswith('.') or not entrada.name.endswith(extensiones_tps):
+                continue
+            try:
+                if not entrada.is_file():
+                    continue
+                llegada = entrada.stat().st_mtime
+            except FileNotFoundError: #otro vigilante lo reclamo mientras se listaba
+                continue
+            if ahora - llegada >= estable: #un archivo que se sigue escribiendo se deja para la proxima revision
+                archivos.append((llegada, entrada.path))
+    return sorted(archivos)
+
+def reclamar(archivo, procesando): #mueve el archivo a una carpeta nueva dentro de procesando/, o devuelve None si otro vigilante lo reclamo antes
+    carpeta = tempfile.mkdtemp(dir=procesando)
+    destino = os.path.join(carpeta, os.path.basename(archivo)) #el nombre no cambia, asi el informe se nombra como siempre
+    try:
+        os.rename(archivo, destino)
+    except FileNotFoundError:
+        os.rmdir(carpeta)
+        return None
+    return destino
+
+def archivar(archivo, carpeta): #mueve el archivo reclamado a procesados/ o fallidos/ sin pisar uno anterior con el mismo nombre
+    nombre, extension = os.path.splitext(os.path.basename(archivo))
+    destino = os.path.join(carpeta, nombre + extension)
+    repeticion = 0
+    while os.path.exists(destino):
+        repeticion += 1
+        destino = os.path.join(carpeta, f'{nombre}_{repeticion}{extension}')
+    os.rename(archivo, destino)
+    os.rmdir(os.path.dirname(archivo))
+    return destino
+
+def _iniciar_trabajador(): #Ctrl+C llega a todo el grupo de procesos: los trabajadores lo ignoran y terminan lo que tienen mientras el vigilante vacia la cola
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    obtener_template()
+
+def huerfanos(procesando): #archivos reclamados por una corrida que termino antes de procesarlos; no se reprocesan
+    return sorted(os.path.join(raiz, nombre) for raiz, _, nombres in os.walk(procesando) for nombre in nombres)
+
+class Vigilante:
+    def __init__(self, carpeta, salida, procesos=None, cola=None, intervalo=0.5, estable=1.0, metricas=None, informar=None, prometheus=None, puerto_prometheus=None, **opciones): #informar recibe (archivo, informe, error, latencia) de cada archivo terminado; prometheus: archivo de texto y puerto_prometheus: puerto de GET /metrics con las metricas del pipeline
+        self.__carpeta = carpeta
+        self.__salida = salida
+        self.__procesos = procesos or os.cpu_count() or 1
+        self.__capacidad = cola or 2 * self.__procesos
+        self.__intervalo = intervalo
+        self.__estable = estable
+        self.__metricas = metricas
+        self.__informar = informar
+        self.__prometheus = prometheus
+        self.__puerto_prometheus = puerto_prometheus
+        self.__registro = Metricas() if prometheus or puerto_prometheus is not None else None
+        self.__texto = '' #ultimo texto de las metricas; el hilo del endpoint solo lee esta referencia
+        self.__opciones = opciones
+        self.__procesando, self.__procesados, self.__fallidos = (os.path.join(carpeta, nombre) for nombre in ('procesando', 'procesados', 'fallidos'))
+        self.__latencias = Latencias() #desde que el archivo llega al spool (su fecha de modificacion) hasta que su informe esta escrito
+        self.__total = Estadisticas()
+        self.__cola = None
+        self.__en_proceso = 0
+        self.__huerfanos = []
+
+    @property
+    def latencias(self):
+        return self.__latencias
+
+    @property
+    def total(self):
+        return self.__total
+
+    @property
+    def huerfanos(self):
+        return self.__huerfanos
+
+    @property
+    def registro(self):
+        return self.__registro
+
+    def resumen(self): #metricas del vigilante: archivos esperando en la cola, en proceso, terminados y latencias de punta a punta
+        latencias = self.__latencias.resumen()
+        del latencias['rechazados_por_ocupado'] #el vigilante no rechaza: con la cola llena los archivos esperan en el spool
+        return {
+            'en_cola': self.__cola.qsize() if self.__cola is not None else 0,
+            'capacidad_cola': self.__capacidad,
+            'en_proceso': self.__en_proceso,
+            'huerfanos': len(self.__huerfanos),
+            **latencias,
+            'transacciones': self.__total.total,
+        }
+
+    def guardar_metricas(self):
+        if self.__metricas:
+            escribir_atomico(self.__metricas, [json.dumps(self.resumen(), ensure_ascii=False)])
+        if self.__registro is not None:
+            self.__texto = self.__registro.texto((
+                ('tps_vigilancia_cola_archivos', 'Archivos reclamados esperando en la cola', self.__cola.qsize() if self.__cola is not None else 0),
+                ('tps_vigilancia_en_proceso_archivos', 'Archivos que se estan procesando', self.__en_proceso),
+                ('tps_vigilancia_huerfanos_archivos', 'Archivos de una corrida anterior que quedaron en procesando/', len(self.__huerfanos)),
+            ))
+            if self.__prometheus:
+                escribir_atomico(self.__prometheus, [self.__texto])
+
+    async def correr(self, detener): #revisa el spool hasta que se activa el evento detener y despues termina los archivos ya reclamados
+        for carpeta in (self.__salida, self.__procesando, self.__procesados, self.__fallidos):
+            os.makedirs(carpeta, exist_ok=True)
+        self.__huerfanos = huerfanos(self.__procesando)
+        self.__cola = asyncio.Queue(self.__capacidad)
+        servidor = servir_metricas(self.__puerto_prometheus, lambda: self.__texto) if self.__puerto_prometheus is not None else None
+        try:
+            await self.__vigilar(detener)
+        finally:
+            if servidor is not None:
+                servidor.shutdown()
+                servidor.server_close()
+        self.guardar_metricas()
+
+    async def __vigilar(self, detener):
+        with ProcessPoolExecutor(max_workers=self.__procesos, initializer=_iniciar_trabajador) as pool:
+            trabajadores = [asyncio.create_task(self.__trabajar(pool)) for _ in range(self.__procesos)]
+            while not detener.is_set():
+                for llegada, archivo in candidatos(self.__carpeta, self.__estable):
+                    if self.__cola.full(): #contrapresion: lo que no entra en la cola queda en el spool sin reclamar
+                        break
+                    reclamado = reclamar(archivo, self.__procesando)
+                    if reclamado is not None:
+                        self.__cola.put_nowait((llegada, reclamado))
+                self.guardar_metricas()
+                try:
+                    await asyncio.wait_for(detener.wait(), self.__intervalo)
+                except asyncio.TimeoutError:
+                    pass
+            await self.__cola.join()
+            for trabajador in trabajadores:
+                trabajador.cancel()
+
+    async def __trabajar(self, pool): #cada trabajador tiene a lo sumo un archivo en el pool, la cola es la unica espera
+        loop = asyncio.get_running_loop()
+        while True:
+            llegada, archivo = await self.__cola.get()
+            self.__en_proceso += 1
+            try:
+                inicio = time.perf_counter()
+                try:
+                    _, informe, error, estadisticas, medidas = await loop.run_in_executor(pool, partial(procesar_archivo, archivo, self.__salida, medir=self.__registro is not None, **self.__opciones))
+                except Exception as e: #por ejemplo un proceso del pool que murio
+                    informe, error, estadisticas, medidas = None, f'{type(e).__name__}: {e}', None, None
+                if self.__registro is not None:
+                    if medidas is not None:
+                        self.__registro.sumar(medidas)
+                    else:
+                        self.__registro.registrar_error(time.perf_counter() - inicio)
+                if error is None:
+                    self.__total.sumar(estadisticas)
+                try:
+                    if error is None:
+                        archivar(archivo, self.__procesados)
+                    else:
+                        destino = archivar(archivo, self.__fallidos)
+                        escribir_atomico(f'{destino}.error', [error + '\n'])
+                except Exception as e: #un rename entre dispositivos, el disco lleno o el archivo borrado de procesando/ no pueden terminar con el trabajador: el archivo queda en procesando/ como huerfano
+                    print(f'{archivo}: no se pudo archivar ({type(e).__name__}: {e})', file=sys.stderr, flush=True)
+                latencia = time.time() - llegada
+                self.__latencias.registrar(latencia, error is not None)
+                if self.__informar:
+                    try:
+                        self.__informar(archivo, informe, error, latencia)
+                    except Exception as e: #un error de quien llama tampoco
+                        print(f'{archivo}: error al informar ({type(e).__name__}: {e})', file=sys.stderr, flush=True)
+            finally:
+                self.__en_proceso -= 1
+                self.__cola.task_done()
+
+def vigilar(carpeta, salida, procesos=None, cola=None, intervalo=0.5, estable=1.0, metricas=None, informar=None, prometheus=None, puerto_prometheus=None, **opciones): #corre hasta SIGINT o SIGTERM y devuelve el vigilante con sus metricas
+    vigilante = Vigilante(carpeta, salida, procesos, cola, intervalo, estable, metricas, informar, prometheus, puerto_prometheus, **opciones)
+    async def principal():
+        detener = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for senal in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(senal, detener.set)
+        await vigilante.correr(detener)
+    asyncio.run(principal())
+    return vigilante
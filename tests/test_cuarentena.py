@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.lectura import msgspec_instalado
+from paquete.reporte import generar_desde_archivo
+
+ejemplos = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ejemplos')
+
+class TestCuarentena(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        with open(os.path.join(ejemplos, 'eventos_gold.json')) as f:
+            self.data = json.load(f)
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def generar(self, data, nombre, **opciones):
+        archivo = os.path.join(self.carpeta.name, f'{nombre}.json')
+        with open(archivo, 'w') as f:
+            json.dump(data, f)
+        informe = os.path.join(self.carpeta.name, f'{nombre}.csv')
+        generar_desde_archivo(archivo, lambda data: informe, formato='csv', **opciones)
+        with open(informe) as f:
+            return informe, f.read()
+
+    def test_transaccion_sin_monto_va_a_cuarentena(self): #sin monto el motor no puede clasificarla: se aparta en lugar de cortar el archivo
+        sin_monto = json.loads(json.dumps(self.data))
+        del sin_monto['transacciones'][1]['monto']
+        limpio = json.loads(json.dumps(self.data))
+        del limpio['transacciones'][1]
+        for decodificador in ('json', 'msgspec') if msgspec_instalado() else ('json',):
+            for streaming in (False, True):
+                with self.subTest(decodificador=decodificador, streaming=streaming):
+                    informe, contenido = self.generar(sin_monto, 'sin_monto', cuarentena=True, decodificador=decodificador, streaming=streaming)
+                    _, esperado = self.generar(limpio, 'limpio')
+                    self.assertEqual(contenido, esperado)
+                    with open(f'{informe}.cuarentena.jsonl') as f:
+                        apartadas = [json.loads(linea) for linea in f]
+                    self.assertEqual([(apartada['posicion'], apartada['error'].split(':')[0]) for apartada in apartadas], [(1, 'monto')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete import incremental
+from paquete.fechas import limite
+from paquete.generador import escribir_documento, generar_archivo
+from paquete.reglas import modos_cupo
+from paquete.reporte import generar_desde_archivo
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        generado = generar_archivo(os.path.join(self.carpeta.name, 'generado.json'), transacciones=1200, nivel='GOLD', tasa_rechazo=0.5, semilla=7)
+        with open(generado) as f:
+            self.encabezado = json.load(f)
+        self.transacciones = self.encabezado.pop('transacciones')
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def escribir(self, archivo, transacciones):
+        with open(archivo, 'w') as f:
+            escribir_documento(f, self.encabezado, transacciones, archivo.endswith('.ndjson'))
+
+    def informe(self, archivo, nombre, **opciones):
+        ruta = os.path.join(self.carpeta.name, f'{nombre}.csv')
+        generar_desde_archivo(archivo, lambda data: ruta, formato='csv', **opciones)
+        with open(ruta, 'rb') as f:
+            return f.read()
+
+    def comparar(self, archivo, estado, cupo, rango=None): #el informe incremental tiene que ser identico byte a byte al de una corrida normal
+        self.assertEqual(self.informe(archivo, 'incremental', incremental=estado, cupo=cupo, rango=rango), self.informe(archivo, 'normal', cupo=cupo, rango=rango, streaming=archivo.endswith('.ndjson'))) #un NDJSON se lee en streaming
+
+    def test_mismo_informe_que_una_corrida_normal(self):
+        retiro = next(i for i, t in enumerate(self.transacciones) if i > 500 and t['tipo'] == 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO' and t['estado'] == 'ACEPTADA') #con cupo calculado cambia el cupo de los retiros siguientes del dia
+        for extension in ('json', 'ndjson'):
+            for cupo in modos_cupo:
+                with self.subTest(extension=extension, cupo=cupo):
+                    archivo = os.path.join(self.carpeta.name, f'feed.{extension}')
+                    estado = os.path.join(self.carpeta.name, f'estado_{extension}_{cupo}.sqlite')
+                    transacciones = [dict(t) for t in self.transacciones]
+                    self.escribir(archivo, transacciones[:1000])
+                    self.comparar(archivo, estado, cupo)
+                    with mock.patch.object(incremental, '_procesar_completo', side_effect=AssertionError('no tomo el camino rapido')):
+                        self.comparar(archivo, estado, cupo) #sin cambios
+                        self.escribir(archivo, transacciones)
+                        self.comparar(archivo, estado, cupo) #solo crecio
+                    transacciones[retiro]['monto'] += 5000
+                    self.escribir(archivo, transacciones)
+                    self.comparar(archivo, estado, cupo) #fila modificada
+                    del transacciones[300]
+                    self.escribir(archivo, transacciones)
+                    self.comparar(archivo, estado, cupo) #fila borrada
+                    self.comparar(archivo, estado, cupo, (limite('10/06/2022'), limite('20/06/2022', final=True))) #rango de fechas desde el indice del estado
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.cuarentena import Cuarentena
+from paquete.lectura import decodificar_documento, msgspec_instalado
+from paquete.reporte import generar_desde_archivo
+
+ejemplos = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ejemplos')
+
+@unittest.skipUnless(msgspec_instalado(), 'compara msgspec con json')
+class TestDecodificadores(unittest.TestCase): #msgspec descarta los campos que el schema no declara: ninguna salida puede depender de eso
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        with open(os.path.join(ejemplos, 'eventos_gold.json')) as f:
+            self.data = json.load(f)
+        self.data['extra'] = {'origen': 'feed'}
+        self.data['direccion']['piso'] = '3'
+        for i, transaccion in enumerate(self.data['transacciones']):
+            transaccion['nota'] = f'nota {i}'
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def generar(self, data, decodificador, formato, cuarentena):
+        nombre = f'{decodificador}_{formato}_{cuarentena}'
+        archivo = os.path.join(self.carpeta.name, 'cliente.json')
+        with open(archivo, 'w') as f:
+            json.dump(data, f)
+        informe = os.path.join(self.carpeta.name, f'{nombre}.{formato}')
+        analitica = os.path.join(self.carpeta.name, f'{nombre}.sqlite')
+        generar_desde_archivo(archivo, lambda data: informe, formato=formato, decodificador=decodificador, cuarentena=cuarentena, analitica=analitica)
+        salidas = []
+        for ruta in (informe, f'{informe}.cuarentena.jsonl'):
+            if os.path.exists(ruta):
+                with open(ruta, 'rb') as f:
+                    salidas.append(f.read())
+        conexion = sqlite3.connect(analitica)
+        salidas.append(conexion.execute('SELECT cliente, nivel, fecha, fecha_tps, tipo, estado, monto, razon FROM transacciones ORDER BY rowid').fetchall())
+        conexion.close()
+        return salidas
+
+    def test_mismas_salidas_con_msgspec_y_json(self):
+        sin_monto = json.loads(json.dumps(self.data))
+        del sin_monto['transacciones'][3]['monto']
+        for formato in ('html', 'csv', 'jsonl'):
+            for cuarentena, data in ((False, self.data), (True, sin_monto)):
+                with self.subTest(formato=formato, cuarentena=cuarentena):
+                    self.assertEqual(self.generar(data, 'msgspec', formato, cuarentena), self.generar(data, 'json', formato, cuarentena))
+
+    def test_cuarentena_conserva_los_campos_desconocidos(self):
+        del self.data['transacciones'][3]['monto']
+        cuarentena = Cuarentena()
+        data, valido = decodificar_documento(json.dumps(self.data).encode(), rapido=True, cuarentena=cuarentena)
+        self.assertTrue(valido)
+        self.assertEqual(data['extra'], {'origen': 'feed'})
+        self.assertEqual([transaccion['nota'] for transaccion in data['transacciones']], [f'nota {i}' for i in range(10) if i != 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.lote import procesar_lote
+
+ejemplos = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ejemplos')
+
+class TestLote(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def test_mismo_nombre_en_distintas_carpetas(self): #los ejemplos tienen el mismo numero de cliente: sin la posicion el segundo informe pisaria al primero
+        for carpeta, ejemplo, nombre in (('a', 'gold', 'x'), ('b', 'classic', 'x'), ('a', 'black', 'y')):
+            os.makedirs(os.path.join(self.carpeta.name, carpeta), exist_ok=True)
+            shutil.copy(os.path.join(ejemplos, f'eventos_{ejemplo}.json'), os.path.join(self.carpeta.name, carpeta, f'{nombre}.json'))
+        manifiesto = os.path.join(self.carpeta.name, 'lote.txt')
+        with open(manifiesto, 'w') as f:
+            f.write('a/x.json\nb/x.json\na/y.json\n')
+        salida = os.path.join(self.carpeta.name, 'informes')
+        correctos, fallidos, total = procesar_lote(manifiesto, salida, procesos=2, formato='csv')
+        self.assertEqual(fallidos, [])
+        self.assertEqual([os.path.basename(informe) for informe in correctos], ['rps_100001_x_0.csv', 'rps_100001_x_1.csv', 'rps_100001_y.csv'])
+        self.assertEqual(sorted(os.listdir(salida)), ['rps_100001_x_0.csv', 'rps_100001_x_1.csv', 'rps_100001_y.csv'])
+        with open(os.path.join(salida, 'rps_100001_x_1.csv')) as f:
+            self.assertIn('CLASSIC', f.read())
+        self.assertEqual(total.total, 30)
+
+if __name__ == '__main__':
+    unittest.main()
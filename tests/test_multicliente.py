@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.multicliente import procesar_multicliente
+
+ejemplos = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ejemplos')
+
+class TestMulticliente(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        clientes = []
+        for nivel in ('classic', 'gold', 'black'):
+            with open(os.path.join(ejemplos, f'eventos_{nivel}.json')) as f:
+                clientes.append(json.load(f))
+        clientes[0]['nombre'] = 'Nicolás ] [' #fuera de ASCII y con corchetes en el encabezado
+        clientes[1]['transacciones'][2]['nota'] = 'cierra ] sin escape'
+        clientes[2]['transacciones'][0]['nota'] = 'comillas \\"] escapadas' #un ']' despues de una comilla escapada
+        mal_formado = json.loads(json.dumps(clientes[1]))
+        mal_formado['numero'] = 100099
+        mal_formado['transacciones'][0]['estado'] = 'PENDIENTE' #no respeta el schema
+        clientes.insert(2, mal_formado)
+        self.archivo = os.path.join(self.carpeta.name, 'clientes.json')
+        with open(self.archivo, 'w') as f:
+            json.dump(clientes, f, ensure_ascii=False)
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def procesar(self, procesos):
+        carpeta = os.path.join(self.carpeta.name, f'informes_{procesos}')
+        informes, fallidos, total, _ = procesar_multicliente(self.archivo, carpeta, procesos=procesos, formato='csv')
+        archivos = {}
+        for nombre in sorted(os.listdir(carpeta)):
+            with open(os.path.join(carpeta, nombre), 'rb') as f:
+                archivos[nombre] = f.read()
+        return [os.path.basename(informe) for informe in informes], fallidos, total.total, archivos
+
+    def test_mismo_resultado_con_uno_y_tres_procesos(self):
+        uno = self.procesar(1)
+        self.assertEqual(uno, self.procesar(3))
+        informes, fallidos, total, archivos = uno
+        self.assertEqual(len(informes), 3)
+        self.assertEqual([(posicion, numero) for posicion, numero, _ in fallidos], [(2, 100099)])
+        self.assertEqual(total, 30)
+        self.assertIn('Nicolás ] ['.encode(), archivos[informes[0]])
+
+if __name__ == '__main__':
+    unittest.main()
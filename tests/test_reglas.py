@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.reglas import motor_razones
+from paquete.reporte import generar_reporte
+
+ejemplos = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ejemplos')
+
+saldo = 'Saldo en cuenta insuficiente'
+cupo = 'La operacion excede el limite de cupo diario restante'
+desconocida = 'Razon desconocida'
+
+casos = [ #(nivel, cantChequeras, cantTarj, tipo, campos de la transaccion rechazada, razon esperada); los montos estan justo en el limite de cada regla y un centavo arriba
+    ('CLASSIC', 0, 0, 'COMPRA_DOLAR', {'monto': 100.01, 'saldoEnCuenta': 100}, 'Los clientes CLASSIC no pueden comprar dolares'),
+    ('CLASSIC', 0, 0, 'COMPRA_DOLAR', {'monto': 100, 'saldoEnCuenta': 100}, 'Los clientes CLASSIC no pueden comprar dolares'),
+    ('GOLD', 0, 0, 'COMPRA_DOLAR', {'monto': 100, 'saldoEnCuenta': 100}, desconocida),
+    ('GOLD', 0, 0, 'COMPRA_DOLAR', {'monto': 100.01, 'saldoEnCuenta': 100}, 'Fondos insuficientes'),
+    ('BLACK', 0, 0, 'COMPRA_DOLAR', {'monto': 100, 'saldoEnCuenta': 100}, desconocida),
+    ('BLACK', 0, 0, 'COMPRA_DOLAR', {'monto': 100.01, 'saldoEnCuenta': 100}, 'Fondos insuficientes'),
+    ('CLASSIC', 0, 0, 'ALTA_TARJETA_CREDITO', {}, 'Alcanzo el limite de tarjetas de credito'),
+    ('GOLD', 0, 0, 'ALTA_TARJETA_CREDITO', {}, desconocida),
+    ('GOLD', 0, 1, 'ALTA_TARJETA_CREDITO', {}, 'Alcanzo el limite de tarjetas de credito'),
+    ('BLACK', 0, 4, 'ALTA_TARJETA_CREDITO', {}, desconocida),
+    ('BLACK', 0, 5, 'ALTA_TARJETA_CREDITO', {}, 'Alcanzo el limite de tarjetas de credito'),
+    ('CLASSIC', 0, 0, 'ALTA_CHEQUERA', {}, 'Los clientes CLASSIC no pueden solicitar chequeras'),
+    ('GOLD', 0, 0, 'ALTA_CHEQUERA', {}, desconocida),
+    ('GOLD', 1, 0, 'ALTA_CHEQUERA', {}, 'Alcanzo el limite de chequeras'),
+    ('BLACK', 1, 0, 'ALTA_CHEQUERA', {}, desconocida),
+    ('BLACK', 2, 0, 'ALTA_CHEQUERA', {}, 'Alcanzo el limite de chequeras'),
+    ('CLASSIC', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 500, 'saldoEnCuenta': 500, 'cupoDiarioRestante': 500}, desconocida),
+    ('CLASSIC', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 500.01, 'saldoEnCuenta': 500, 'cupoDiarioRestante': 1000}, saldo),
+    ('CLASSIC', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 500.01, 'saldoEnCuenta': 1000, 'cupoDiarioRestante': 500}, cupo),
+    ('GOLD', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 10500, 'saldoEnCuenta': 500, 'cupoDiarioRestante': 20000}, desconocida),
+    ('GOLD', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 10500.01, 'saldoEnCuenta': 500, 'cupoDiarioRestante': 20000}, saldo),
+    ('GOLD', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 500.01, 'saldoEnCuenta': 500, 'cupoDiarioRestante': 500}, cupo),
+    ('BLACK', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 10500, 'saldoEnCuenta': 500, 'cupoDiarioRestante': 10500}, desconocida),
+    ('BLACK', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 10500.01, 'saldoEnCuenta': 500, 'cupoDiarioRestante': 100000}, saldo),
+    ('BLACK', 0, 0, 'RETIRO_EFECTIVO_CAJERO_AUTOMATICO', {'monto': 10500.01, 'saldoEnCuenta': 100000, 'cupoDiarioRestante': 10500}, cupo),
+    ('CLASSIC', 0, 0, 'TRANSFERENCIA_ENVIADA', {'monto': 1000, 'saldoEnCuenta': 1010}, desconocida), #comision del 1%
+    ('CLASSIC', 0, 0, 'TRANSFERENCIA_ENVIADA', {'monto': 1000, 'saldoEnCuenta': 1009.99}, saldo),
+    ('GOLD', 0, 0, 'TRANSFERENCIA_ENVIADA', {'monto': 12000, 'saldoEnCuenta': 2060}, desconocida), #comision del 0.5% y 10000 de descubierto
+    ('GOLD', 0, 0, 'TRANSFERENCIA_ENVIADA', {'monto': 12000, 'saldoEnCuenta': 2059.99}, saldo),
+    ('BLACK', 0, 0, 'TRANSFERENCIA_ENVIADA', {'monto': 12000, 'saldoEnCuenta': 2000}, desconocida), #sin comision y 10000 de descubierto
+    ('BLACK', 0, 0, 'TRANSFERENCIA_ENVIADA', {'monto': 12000, 'saldoEnCuenta': 1999.99}, saldo),
+    ('CLASSIC', 0, 0, 'TRANSFERENCIA_RECIBIDA', {'monto': 150000}, desconocida),
+    ('CLASSIC', 0, 0, 'TRANSFERENCIA_RECIBIDA', {'monto': 150000.01}, 'Excede el monto limite a recibir'),
+    ('GOLD', 0, 0, 'TRANSFERENCIA_RECIBIDA', {'monto': 500000}, desconocida),
+    ('GOLD', 0, 0, 'TRANSFERENCIA_RECIBIDA', {'monto': 500000.01}, 'Excede el monto limite a recibir'),
+    ('BLACK', 0, 0, 'TRANSFERENCIA_RECIBIDA', {'monto': 10 ** 12}, desconocida), #sin limite
+]
+
+razones_ejemplos = { #razon de cada transaccion de los ejemplos, las mismas que muestran sus informes
+    'eventos_classic': ['', cupo, cupo, cupo, 'Alcanzo el limite de tarjetas de credito', 'Los clientes CLASSIC no pueden solicitar chequeras', 'Los clientes CLASSIC no pueden comprar dolares', saldo, '', 'Excede el monto limite a recibir'],
+    'eventos_gold': ['', desconocida, cupo, cupo, 'Alcanzo el limite de tarjetas de credito', 'Alcanzo el limite de chequeras', 'Fondos insuficientes', desconocida, '', 'Excede el monto limite a recibir'],
+    'eventos_black': ['', cupo, cupo, cupo, 'Alcanzo el limite de tarjetas de credito', 'Alcanzo el limite de chequeras', 'Fondos insuficientes', saldo, '', ''],
+    'sin_transacciones': [],
+}
+
+def _transaccion(tipo, estado='RECHAZADA', **campos):
+    return {'tipo': tipo, 'estado': estado, 'fecha': '01/06/2022 10:00:00', 'numero': 1, **campos}
+
+class TestReglas(unittest.TestCase):
+    def test_razones_en_los_limites_de_cada_nivel(self):
+        for nivel, cantChequeras, cantTarj, tipo, campos, esperada in casos:
+            with self.subTest(nivel=nivel, tipo=tipo, campos=campos):
+                self.assertEqual(motor_razones(nivel, cantChequeras, cantTarj).razon(_transaccion(tipo, **campos)).razon, esperada)
+
+    def test_aceptada_no_tiene_razon(self):
+        for nivel in ('CLASSIC', 'GOLD', 'BLACK'):
+            with self.subTest(nivel=nivel):
+                self.assertEqual(motor_razones(nivel, 0, 0).razon(_transaccion('COMPRA_DOLAR', 'ACEPTADA', monto=10 ** 9, saldoEnCuenta=0)).razon, '')
+
+    def test_comprar_dolar_sin_regla(self): #el schema acepta COMPRAR_DOLAR pero no hay regla para ese tipo: en todos los niveles es una razon desconocida, sin leer montos
+        for nivel in ('CLASSIC', 'GOLD', 'BLACK'):
+            with self.subTest(nivel=nivel):
+                self.assertEqual(motor_razones(nivel, 0, 0).razon(_transaccion('COMPRAR_DOLAR')).razon, desconocida)
+        with open(os.path.join(ejemplos, 'eventos_gold.json')) as f:
+            data = json.load(f)
+        data['transacciones'][6]['tipo'] = 'COMPRAR_DOLAR' #la COMPRA_DOLAR rechazada por fondos insuficientes
+        _, filas = generar_reporte(data)
+        self.assertEqual(filas[6].razon, desconocida)
+
+    def test_razones_de_los_ejemplos(self):
+        for nombre, esperadas in razones_ejemplos.items():
+            with self.subTest(ejemplo=nombre):
+                with open(os.path.join(ejemplos, f'{nombre}.json')) as f:
+                    _, filas = generar_reporte(json.load(f))
+                self.assertEqual([fila.razon for fila in filas], esperadas)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import gzip
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.generador import generar_archivo
+from paquete.reporte import generar_desde_archivo, generar_reporte
+from paquete.salida import leer_binario
+
+class TestSalida(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.archivo = generar_archivo(os.path.join(self.carpeta.name, 'cliente.json'), transacciones=9000, nivel='BLACK', tasa_rechazo=0.4, semilla=3) #tres bloques de hasta 4096 filas
+        with open(self.archivo) as f:
+            data = json.load(f)
+        data['transacciones'][5000] = {**data['transacciones'][5000], 'tipo': 'COMPRAR_DOLAR', 'estado': 'RECHAZADA', 'fecha': '12/06/2022 10:00:00 (año)'} #tipo y razon que aparecen recien en el segundo bloque, y una fecha fuera de ASCII
+        with open(self.archivo, 'w') as f:
+            json.dump(data, f)
+        self.esperado = generar_reporte(data)
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def test_ida_y_vuelta_binario(self):
+        info, filas = self.esperado
+        for comprimir in (False, True):
+            with self.subTest(comprimir=comprimir):
+                informe = os.path.join(self.carpeta.name, 'rps.tpsr' + ('.gz' if comprimir else ''))
+                generar_desde_archivo(self.archivo, lambda data: informe, formato='binario', comprimir=comprimir)
+                with (gzip.open if comprimir else open)(informe, 'rb') as f:
+                    leido, leidas = leer_binario(f)
+                    self.assertEqual(leido, info)
+                    self.assertEqual(list(leidas), filas)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import socket
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import ThreadingHTTPServer
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.servicio import ManejadorReportes, servir
+
+class _ServicioEco: #responde con el cuerpo recibido, sin pool de procesos
+    def atender(self, cuerpo, formato):
+        return 200, 'text/plain; charset=utf-8', cuerpo
+
+class TestServicio(unittest.TestCase):
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), ManejadorReportes)
+        self.servidor.servicio = _ServicioEco()
+        self.hilo = threading.Thread(target=self.servidor.serve_forever)
+        self.hilo.start()
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.hilo.join()
+
+    def pedir(self, encabezados, cuerpo=b''): #pedido crudo, para poder mandar encabezados que http.client no arma
+        with socket.create_connection(self.servidor.server_address) as conexion:
+            conexion.sendall(b'POST /reporte?formato=csv HTTP/1.1\r\nHost: local\r\n' + encabezados + b'\r\n' + cuerpo)
+            respuesta = b''
+            while True:
+                datos = conexion.recv(65536)
+                if not datos:
+                    break
+                respuesta += datos
+        estado = int(respuesta.split(b' ', 2)[1])
+        return estado, respuesta.partition(b'\r\n\r\n')[2]
+
+    def test_content_length(self):
+        self.assertEqual(self.pedir(b'Content-Length: 4\r\n', b'{}{}'), (200, b'{}{}'))
+        self.assertEqual(self.pedir(b''), (411, b'Falta Content-Length'))
+        for largo in (b'abc', b'-1', b'1_0', b'4.0'):
+            with self.subTest(largo=largo):
+                self.assertEqual(self.pedir(b'Content-Length: ' + largo + b'\r\n', b'{}{}'), (400, b'Content-Length invalido: ' + largo))
+
+    def test_ruta_que_no_es_socket(self): #el error va a stderr y el servicio no arranca
+        with tempfile.NamedTemporaryFile() as archivo:
+            salida, errores = StringIO(), StringIO()
+            with redirect_stdout(salida), redirect_stderr(errores):
+                self.assertEqual(servir(socket_unix=archivo.name), 1)
+            self.assertEqual(salida.getvalue(), '')
+            self.assertIn('no es un socket', errores.getvalue())
+            self.assertTrue(os.path.exists(archivo.name))
+
+if __name__ == '__main__':
+    unittest.main()
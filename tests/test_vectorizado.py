@@ -0,0 +1,42 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete.generador import generar_archivo
+from paquete.reglas import modos_cupo, politicas
+from paquete.reporte import generar_desde_archivo
+
+@unittest.skipIf(find_spec('numpy') is None, 'el motor vectorizado necesita numpy')
+class TestVectorizado(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def generar(self, archivo, motor, cupo):
+        informe = os.path.join(self.carpeta.name, f'{motor}_{cupo}.csv')
+        generar_desde_archivo(archivo, lambda data: informe, motor=motor, cupo=cupo, formato='csv')
+        with open(informe) as f:
+            return f.read()
+
+    def test_mismo_informe_que_el_motor_de_reglas(self):
+        for semilla, nivel in enumerate(politicas):
+            archivo = os.path.join(self.carpeta.name, f'{nivel}.json')
+            generar_archivo(archivo, transacciones=3000, nivel=nivel, tasa_rechazo=0.6, semilla=semilla)
+            with open(archivo) as f:
+                data = json.load(f)
+            data['transacciones'].append({**data['transacciones'][-1], 'tipo': 'COMPRAR_DOLAR', 'estado': 'RECHAZADA'}) #tipo sin regla
+            with open(archivo, 'w') as f:
+                json.dump(data, f)
+            for cupo in modos_cupo:
+                with self.subTest(nivel=nivel, cupo=cupo):
+                    self.assertEqual(self.generar(archivo, 'vectorizado', cupo), self.generar(archivo, 'reglas', cupo))
+
+if __name__ == '__main__':
+    unittest.main()
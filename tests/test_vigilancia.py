@@ -0,0 +1,60 @@
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete import vigilancia
+
+ejemplos = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ejemplos')
+
+class TestVigilancia(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.spool = os.path.join(self.carpeta.name, 'spool')
+        self.salida = os.path.join(self.carpeta.name, 'informes')
+        os.makedirs(self.spool)
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def copiar(self, nombre):
+        shutil.copy(os.path.join(ejemplos, 'eventos_gold.json'), os.path.join(self.spool, nombre))
+
+    def test_archivar_que_falla_no_detiene_al_trabajador(self): #con un solo trabajador, si el error lo terminara los archivos siguientes no se procesarian nunca
+        archivar = vigilancia.archivar
+        fallas = []
+        def archivar_que_falla_una_vez(archivo, carpeta):
+            if not fallas:
+                fallas.append(archivo)
+                raise OSError('Invalid cross-device link')
+            return archivar(archivo, carpeta)
+        informados = []
+        vigilante = vigilancia.Vigilante(self.spool, self.salida, procesos=1, intervalo=0.05, estable=0, informar=lambda *datos: informados.append(datos))
+        procesados = os.path.join(self.spool, 'procesados')
+        async def correr():
+            detener = asyncio.Event()
+            tarea = asyncio.create_task(vigilante.correr(detener))
+            for nombre in ('a.json', 'b.json', 'c.json'):
+                self.copiar(nombre)
+                while len(informados) < ('a.json', 'b.json', 'c.json').index(nombre) + 1:
+                    await asyncio.sleep(0.05)
+            detener.set()
+            await tarea
+        errores = StringIO()
+        with mock.patch.object(vigilancia, 'archivar', archivar_que_falla_una_vez), redirect_stderr(errores):
+            asyncio.run(asyncio.wait_for(correr(), 60))
+        self.assertEqual(len(fallas), 1)
+        self.assertIn('no se pudo archivar', errores.getvalue())
+        self.assertEqual(sorted(os.listdir(procesados)), ['b.json', 'c.json'])
+        self.assertEqual(vigilancia.huerfanos(os.path.join(self.spool, 'procesando')), [fallas[0]])
+        self.assertEqual([error for _, _, error, _ in informados], [None, None, None])
+
+if __name__ == '__main__':
+    unittest.main()